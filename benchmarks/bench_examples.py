@@ -0,0 +1,208 @@
+"""
+Measures few-shot example retrieval, and compares model results with and
+without examples by replaying recorded runs.
+
+Retrieval speed is measured on synthetic documented functions:
+
+    python benchmarks/bench_examples.py [--functions 20000] [--queries 2000]
+
+Model results need two cassettes recorded from the same project and model,
+one without and one with examples:
+
+    docmancer --force-all --record-cassette without.cassette
+    docmancer --force-all --examples 2 --record-cassette with.cassette
+    python benchmarks/bench_examples.py --project . \\
+        --without without.cassette --with with.cassette --examples 2
+
+Each cassette is replayed over a copy of the project, and the share of
+functions whose first response could be read, the re-prompts and
+escalations, and the prompt tokens are reported for both.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+from dataclasses import replace
+from docmancer.generator.examples import DEFAULT_EXAMPLE_TOKENS, ExampleRetriever
+from docmancer.models.function_context import FunctionContextModel
+
+WORDS = (
+    "load save parse read write user config file path request response client "
+    "server cache index token model prompt summary docstring format review "
+    "commit journal metrics trace queue worker shard batch stream buffer"
+).split()
+
+
+def make_context(rng: random.Random, index: int) -> FunctionContextModel:
+    name = "_".join(rng.sample(WORDS, rng.randint(1, 3)))
+    params = ", ".join(rng.sample(WORDS, rng.randint(0, 3)))
+    return FunctionContextModel(
+        qualified_name=f"module_{index % 500}.Class{index % 40}.{name}",
+        signature=f"def {name}(self, {params}):",
+        body="    pass",
+        comments=[],
+        start_line=1,
+        end_line=2,
+        calls=["_".join(rng.sample(WORDS, 2)) for _ in range(rng.randint(0, 3))],
+        docstring=f'"""\n    {name.replace("_", " ").capitalize()}.\n    """',
+    )
+
+
+def bench_retrieval(functions: int, queries: int, count: int):
+    rng = random.Random(0)
+    contexts = [make_context(rng, index) for index in range(functions)]
+    retriever = ExampleRetriever(count=count)
+
+    start = time.perf_counter()
+    for index, context in enumerate(contexts):
+        retriever.add(f"module_{index % 500}.py", context)
+    added = time.perf_counter() - start
+
+    # The same functions, undocumented, as they are when generating
+    sampled = rng.sample(contexts, min(queries, len(contexts)))
+    queries = [replace(context, docstring=None) for context in sampled]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.get_examples(query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(
+        f"index {functions} documented functions: {added:.2f}s "
+        f"({added / functions * 1e6:.1f} us each)"
+    )
+    print(
+        f"query top {count}: p50 {timings[len(timings) // 2] * 1e6:.0f} us, "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us"
+    )
+
+
+def replay(args, cassette_path: str, examples: int) -> dict:
+    from docmancer.config import DocmancerConfig
+    from docmancer.core.engine import DocumentationBuilderEngine
+    from docmancer.core.metrics import MetricsRecorder
+    from docmancer.core.presenter import Presenter
+    from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from docmancer.generator.llm.cassette_agent import Cassette, ReplayAgent
+    from docmancer.generator.model_router import DEFAULT_AGENT_NAME
+    from docmancer.generator.templates import TemplateSummarizer
+    from docmancer.parser.python_parser import PythonParser
+
+    root = tempfile.mkdtemp(prefix="docmancer-bench-")
+    cwd = os.getcwd()
+    agent = ReplayAgent(Cassette.load(cassette_path), DEFAULT_AGENT_NAME)
+    metrics = MetricsRecorder()
+    config = DocmancerConfig.from_dict(
+        {
+            **DocmancerConfig().to_dict(),
+            "project_dir": root,
+            "files": args.files,
+            "language": "python",
+            "style": "PEP",
+            "force_all": True,
+        }
+    )
+    # Prompts have to match the recorded ones, so the generator is set up
+    # like the CLI's
+    generator = DocumentationGenerator(
+        model=agent,
+        language="python",
+        max_prompt_tokens=args.max_prompt_tokens,
+        templates=TemplateSummarizer(config.template_rules),
+        examples=(
+            ExampleRetriever(examples, args.example_tokens) if examples else None
+        ),
+        metrics=metrics,
+    )
+    try:
+        shutil.copytree(args.project, root, dirs_exist_ok=True, ignore=ignore_cache)
+        os.chdir(root)
+        engine = DocumentationBuilderEngine(
+            generator=generator,
+            parser=PythonParser(),
+            presenter=Presenter(),
+            formatter=PyDocstringFormatter(),
+            metrics=metrics,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.run(config)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+    stats = generator.repair_stats
+    sent = stats.valid + stats.repaired + stats.reprompt_fixed + stats.failed
+    return {
+        "functions": sent,
+        "first_response_read": (stats.valid + stats.repaired) / sent if sent else 0,
+        "reprompted": stats.reprompted,
+        "failed": stats.failed,
+        "escalations": sum(
+            route_stats.escalations
+            for _, _, route_stats in generator.router.get_summary()
+        ),
+        "replay_misses": agent.misses,
+        "prompt_tokens": generator.prompt_tokens,
+        "prompt_examples": metrics.get_counter("prompt_examples"),
+    }
+
+
+def ignore_cache(directory, names):
+    return [name for name in names if name in (".docmancer", ".git")]
+
+
+def compare_replays(args):
+    for name, path, examples in (
+        ("without examples", args.without, 0),
+        (f"with {args.examples} examples", args.with_, args.examples),
+    ):
+        result = replay(args, path, examples)
+        print(
+            f"{name}: {result['functions']} functions, "
+            f"{result['first_response_read']:.1%} read from the first response, "
+            f"{result['reprompted']} re-prompted, {result['failed']} failed, "
+            f"{result['escalations']} escalated, {result['prompt_tokens']} prompt "
+            f"tokens, {result['prompt_examples']} examples sent"
+        )
+        if result["replay_misses"]:
+            print(
+                f"  {result['replay_misses']} prompts were not in {path}. Record "
+                "and replay with the same project, model and example settings."
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--functions", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--project", help="Project the cassettes were recorded on")
+    parser.add_argument("--without", help="Cassette recorded without examples")
+    parser.add_argument("--with", dest="with_", help="Cassette recorded with them")
+    parser.add_argument("--files", nargs="+", default=["src/**/*.py"])
+    parser.add_argument(
+        "--max-prompt-tokens",
+        type=int,
+        help="The prompt limit of the recorded model, if its prompts were compacted",
+    )
+    parser.add_argument("--examples", type=int, default=2)
+    parser.add_argument("--example-tokens", type=int, default=DEFAULT_EXAMPLE_TOKENS)
+    args = parser.parse_args()
+
+    if args.project:
+        if not (args.without and args.with_):
+            parser.error("--project needs both --without and --with")
+        compare_replays(args)
+    else:
+        bench_retrieval(args.functions, args.queries, args.examples)
+
+
+if __name__ == "__main__":
+    main()
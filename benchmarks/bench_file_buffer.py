@@ -0,0 +1,121 @@
+"""
+Compares the per-function file scans used before FileBuffer with the
+shared buffer cache, on a synthetic module.
+
+Usage:
+    python benchmarks/bench_file_buffer.py [--lines 50000] [--functions 2000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+from docmancer.models.documentation_model import DocumentationModel
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+from docmancer.utils.file_buffer import FileBuffer
+import docmancer.utils.file_utils as fu
+
+
+def write_module(path: str, total_lines: int, functions: int) -> list:
+    """Writes a module of methods and returns each function's start line."""
+    body_lines = max(1, total_lines // functions - 1)
+    start_lines = []
+    lines = ["class Generated:\n"]
+    for i in range(functions):
+        start_lines.append(len(lines) + 1)
+        lines.append(f"    def method_{i}(self, value):\n")
+        lines.extend(f"        value = value + {j}\n" for j in range(body_lines - 1))
+        lines.append("        return value\n")
+    with open(path, "w", encoding="utf8") as f:
+        f.writelines(lines)
+    return start_lines
+
+
+def make_docs(path: str, start_lines: list, formatter_kwargs) -> list:
+    formatter = PyDocstringFormatter()
+    summary = FunctionSummaryModel(summary="Adds numbers.", return_description="sum")
+    docs = []
+    for line in start_lines:
+        context = FunctionContextModel(
+            qualified_name=f"m.f{line}",
+            signature="def f(self, value)",
+            body="",
+            comments=[],
+            start_line=line,
+            end_line=line,
+        )
+        docs.append(
+            formatter.get_formatted_documentation(
+                context, summary, path, **formatter_kwargs()
+            )
+        )
+    return docs
+
+
+def commit_by_slicing(path: str, docs: list):
+    """The commit implementation that FileBuffer.with_insertions replaced."""
+    with open(path, "r") as f:
+        lines = f.readlines()
+    docs.sort(key=lambda x: x.start_line)
+    offset = 0
+    for doc in docs:
+        adjusted_line = doc.start_line + offset
+        lines[adjusted_line:adjusted_line] = [
+            " " * doc.offset_spaces + line for line in doc.formatted_documentation
+        ]
+        offset += len(doc.formatted_documentation)
+    with open(path, "w") as f:
+        f.writelines(lines)
+
+
+def commit_with_buffer(path: str, docs: list, buffer: FileBuffer):
+    lines = buffer.with_insertions(
+        [
+            (
+                doc.start_line,
+                [" " * doc.offset_spaces + l for l in doc.formatted_documentation],
+            )
+            for doc in docs
+        ]
+    )
+    with open(path, "w", encoding="utf8") as f:
+        f.writelines(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--functions", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "module.py")
+
+        start_lines = write_module(path, args.lines, args.functions)
+        start = time.perf_counter()
+        docs = make_docs(path, start_lines, dict)
+        formatted = time.perf_counter()
+        commit_by_slicing(path, docs)
+        done = time.perf_counter()
+        print(
+            f"per-function scans: format {formatted - start:.3f}s, "
+            f"commit {done - formatted:.3f}s"
+        )
+
+        start_lines = write_module(path, args.lines, args.functions)
+        start = time.perf_counter()
+        buffer = FileBuffer.read(path)
+        docs = make_docs(path, start_lines, lambda: {"file_buffer": buffer})
+        formatted = time.perf_counter()
+        commit_with_buffer(path, docs, buffer)
+        done = time.perf_counter()
+        print(
+            f"shared file buffer: format {formatted - start:.3f}s, "
+            f"commit {done - formatted:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Indexes synthetic functions and their summaries into FunctionalContextDatabase,
+comparing a transaction per write with batched writes, then times the index
+queries.
+
+Usage:
+    python benchmarks/bench_index.py [--functions 100000] [--files 1000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from docmancer.core.functional_context_database import (
+    WRITE_BATCH_SIZE,
+    FunctionalContextDatabase,
+)
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+
+
+def make_files(functions: int, files: int) -> list:
+    """Returns (file path, function contexts) for each synthetic file."""
+    per_file = max(1, functions // files)
+    project = []
+    for file_index in range(files):
+        contexts = []
+        for function in range(per_file):
+            # Methods of different classes share names, as in real projects
+            contexts.append(
+                FunctionContextModel(
+                    qualified_name=f"module_{file_index}.Component{function % 7}"
+                    f".step_{function}",
+                    signature=f"def step_{function}(self, value, scale=2):",
+                    body=f"    value = value * scale + {function}\n"
+                    f"    return step_{function // 2}(value)\n",
+                    comments=[],
+                    start_line=function * 4 + 1,
+                    end_line=function * 4 + 3,
+                    docstring="Steps." if function % 3 == 0 else None,
+                )
+            )
+        project.append((f"src/pkg_{file_index % 10}/module_{file_index}.py", contexts))
+    return project
+
+
+def index_project(index: FunctionalContextDatabase, project: list) -> float:
+    start = time.perf_counter()
+    for file_path, contexts in project:
+        index.index_file(file_path, contexts, file_hash=file_path)
+    index.flush()
+    return time.perf_counter() - start
+
+
+def record_summaries(index: FunctionalContextDatabase, project: list) -> float:
+    summary = FunctionSummaryModel(summary="Steps.", return_description="value")
+    start = time.perf_counter()
+    for file_path, contexts in project:
+        for context in contexts:
+            index.record_summary(file_path, context.qualified_name, "0", summary)
+    index.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--functions", type=int, default=100000)
+    parser.add_argument("--files", type=int, default=1000)
+    args = parser.parse_args()
+
+    project = make_files(args.functions, args.files)
+    total = sum(len(contexts) for _, contexts in project)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, batch_size in (
+            ("transaction per write", 1),
+            (f"batches of {WRITE_BATCH_SIZE}", WRITE_BATCH_SIZE),
+        ):
+            path = os.path.join(tmp, f"index_{batch_size}.db")
+            index = FunctionalContextDatabase(path, batch_size=batch_size)
+            parsed = index_project(index, project)
+            generated = record_summaries(index, project)
+            reindexed = index_project(index, project)
+            index.close()
+            print(
+                f"{name}: index {total} functions {parsed:.2f}s "
+                f"({total / parsed:,.0f}/sec), record summaries {generated:.2f}s "
+                f"({total / generated:,.0f}/sec), re-index unchanged "
+                f"{reindexed:.2f}s"
+            )
+
+        index = FunctionalContextDatabase(path)
+        since = time.time()
+        for name, query in (
+            ("undocumented", index.get_undocumented),
+            ("undocumented in one file", lambda: index.get_undocumented(project[0][0])),
+            ("stale", index.get_stale),
+            ("changed since", lambda: index.get_changed_since(since)),
+        ):
+            start = time.perf_counter()
+            count = len(query())
+            print(
+                f"query {name}: {count} rows in "
+                f"{(time.perf_counter() - start) * 1000:.1f} ms"
+            )
+        index.close()
+        print(f"index size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Runs the full DocumentationBuilderEngine over synthetic projects with a
+simulated model and reports functions/sec, peak memory and the time spent
+in each pipeline stage. Results are compared with stored baselines, and the
+script exits with status 1 if a scenario regressed by more than the
+threshold.
+
+Each scenario runs in a fresh process so peak memory is its own. Baselines
+are machine specific; update them on the machine that runs the comparison.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--scenario small ...] [--repeat 3]
+        [--threshold 0.2] [--update-baseline] [--json results.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+from synthetic_project import ProjectSpec, write_project
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "pipeline_baseline.json")
+
+STAGES = ["discover", "parse", "prioritize", "generate", "format", "review", "commit"]
+
+
+@dataclass
+class Scenario:
+    project: ProjectSpec
+    latency: float = 0.0  # Per request, in seconds
+    prompt_tokens_per_second: Optional[float] = None
+    completion_tokens_per_second: Optional[float] = None
+    config: Dict = field(default_factory=dict)  # DocmancerConfig overrides
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    # Engine overhead alone: the model answers instantly
+    "small": Scenario(ProjectSpec(files=20, functions_per_file=10)),
+    "many_files": Scenario(ProjectSpec(files=400, functions_per_file=5, nesting=3)),
+    "large_files": Scenario(
+        ProjectSpec(files=4, functions_per_file=500, body_lines=12)
+    ),
+    "long_bodies": Scenario(
+        ProjectSpec(files=20, functions_per_file=10, body_lines=200)
+    ),
+    # A fast local model, serialized like a single llama.cpp context
+    "model_bound": Scenario(
+        ProjectSpec(files=10, functions_per_file=10),
+        latency=0.002,
+        prompt_tokens_per_second=200000,
+        completion_tokens_per_second=20000,
+    ),
+    "dependency": Scenario(
+        ProjectSpec(files=40, functions_per_file=16),
+        config={"schedule": "dependency", "generation_workers": 4},
+    ),
+    "budgeted": Scenario(
+        ProjectSpec(files=100, functions_per_file=10),
+        config={"max_functions": 200},
+    ),
+}
+
+
+def run_once(scenario: Scenario) -> dict:
+    """Runs one scenario in the current process and returns its measurements."""
+    from docmancer.config import DocmancerConfig
+    from docmancer.core.engine import DocumentationBuilderEngine
+    from docmancer.core.metrics import MetricsRecorder
+    from docmancer.core.presenter import Presenter
+    from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from docmancer.parser.python_parser import PythonParser
+    from simulated_agent import SimulatedLLMAgent
+
+    root = tempfile.mkdtemp(prefix="docmancer-bench-")
+    cwd = os.getcwd()
+    try:
+        write_project(scenario.project, root)
+        os.chdir(root)  # File patterns are relative to the working directory
+        config = DocmancerConfig.from_dict(
+            {
+                **DocmancerConfig().to_dict(),
+                "project_dir": root,
+                "files": ["src/**/*.py"],
+                "language": "python",
+                "style": "PEP",
+                "force_all": True,
+                "template_rules": [],
+                **scenario.config,
+            }
+        )
+        metrics = MetricsRecorder()
+        agent = SimulatedLLMAgent(
+            latency=scenario.latency,
+            prompt_tokens_per_second=scenario.prompt_tokens_per_second,
+            completion_tokens_per_second=scenario.completion_tokens_per_second,
+        )
+        engine = DocumentationBuilderEngine(
+            generator=DocumentationGenerator(
+                model=agent, language="python", metrics=metrics
+            ),
+            parser=PythonParser(),
+            presenter=Presenter(),
+            formatter=PyDocstringFormatter(),
+            metrics=metrics,
+        )
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.run(config)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = metrics.get_report()
+    stage_seconds = {}
+    for histogram in report["histograms"]:
+        if histogram["name"] in ("stage_item_seconds", "stage_finish_seconds"):
+            stage = histogram["labels"]["stage"]
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + histogram["sum"]
+    functions = sum(
+        counter["value"]
+        for counter in report["counters"]
+        if counter["name"] == "functions_parsed"
+    )
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return {
+        "functions": functions,
+        "requests": agent.requests,
+        "seconds": elapsed,
+        "functions_per_second": functions / elapsed if elapsed else 0.0,
+        "peak_memory_mb": peak_mb,
+        "stage_seconds": stage_seconds,
+    }
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> dict:
+    """Runs a scenario `repeat` times, each in a new process, keeping the fastest."""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(run_once, scenario).result())
+    best = max(results, key=lambda result: result["functions_per_second"])
+    best["peak_memory_mb"] = max(result["peak_memory_mb"] for result in results)
+    return best
+
+
+def get_regressions(
+    name: str, result: dict, baseline: Optional[dict], threshold: float
+) -> List[str]:
+    if baseline is None:
+        return []
+    regressions = []
+    if result["functions_per_second"] < baseline["functions_per_second"] * (
+        1 - threshold
+    ):
+        regressions.append(
+            f"{name}: {result['functions_per_second']:.1f} functions/sec, baseline "
+            f"{baseline['functions_per_second']:.1f}"
+        )
+    if result["peak_memory_mb"] > baseline["peak_memory_mb"] * (1 + threshold):
+        regressions.append(
+            f"{name}: peak memory {result['peak_memory_mb']:.1f} MB, baseline "
+            f"{baseline['peak_memory_mb']:.1f} MB"
+        )
+    return regressions
+
+
+def load_baselines(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf8") as f:
+        return json.load(f).get("scenarios", {})
+
+
+def save_baselines(path: str, results: Dict[str, dict]):
+    baselines = load_baselines(path)
+    for name, result in results.items():
+        baselines[name] = {
+            "functions_per_second": round(result["functions_per_second"], 1),
+            "peak_memory_mb": round(result["peak_memory_mb"], 1),
+        }
+    with open(path, "w", encoding="utf8") as f:
+        json.dump(
+            {
+                "machine": f"{platform.machine()} {platform.processor()}".strip(),
+                "cpus": os.cpu_count(),
+                "python": platform.python_version(),
+                "scenarios": dict(sorted(baselines.items())),
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def print_result(name: str, scenario: Scenario, result: dict, baseline: dict):
+    change = ""
+    if baseline:
+        ratio = result["functions_per_second"] / baseline["functions_per_second"]
+        change = f" ({ratio - 1:+.0%} vs baseline)"
+    print(
+        f"{name}: {result['functions']} functions in {result['seconds']:.2f}s, "
+        f"{result['functions_per_second']:.1f} functions/sec{change}, "
+        f"peak {result['peak_memory_mb']:.1f} MB"
+    )
+    stages = result["stage_seconds"]
+    print(
+        "    "
+        + ", ".join(
+            f"{stage} {stages[stage]:.3f}s" for stage in STAGES if stage in stages
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenario",
+        nargs="*",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed throughput drop or memory growth as a fraction of the baseline",
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    baselines = load_baselines(args.baseline)
+    results = {}
+    regressions = []
+    for name in args.scenario:
+        scenario = SCENARIOS[name]
+        results[name] = run_scenario(scenario, max(1, args.repeat))
+        print_result(name, scenario, results[name], baselines.get(name))
+        regressions += get_regressions(
+            name, results[name], baselines.get(name), args.threshold
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as f:
+            json.dump(
+                {
+                    name: {"scenario": asdict(SCENARIOS[name]), **result}
+                    for name, result in results.items()
+                },
+                f,
+                indent=2,
+            )
+    if args.update_baseline:
+        save_baselines(args.baseline, results)
+        print(f"Baselines written to {args.baseline}")
+    elif regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"    {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Runs a synthetic project through the work queue with worker processes of
+different speeds, as on a mix of build hosts, and compares the run's wall
+time with the best possible time for those workers and with splitting the
+functions evenly between them, as static sharding does.
+
+Workers use the simulated model with the given per-request latencies, one
+worker process per latency:
+
+    python benchmarks/bench_queue.py [--files 100] [--functions-per-file 5]
+        [--latencies 0.05 0.05 0.1 0.2]
+
+Each job costs a few milliseconds of queue transactions, which only matter
+next to very fast models.
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from synthetic_project import ProjectSpec, write_project
+
+
+def run_worker(queue_path: str, latency: float, name: str, ready, results):
+    from docmancer.core.work_queue import QueueWorker, WorkQueue
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from simulated_agent import SimulatedLLMAgent
+
+    queue = WorkQueue(queue_path)
+    worker = QueueWorker(
+        queue,
+        DocumentationGenerator(
+            model=SimulatedLLMAgent(latency=latency), language="python"
+        ),
+        worker_id=name,
+        poll_seconds=0.05,
+    )
+    ready.release()
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker.run()
+    queue.close()
+    results.put((name, worker.stats.completed, worker.stats.lost))
+
+
+def run_coordinator(root: str, queue_path: str) -> float:
+    from docmancer.config import DocmancerConfig
+    from docmancer.core.engine import DocumentationBuilderEngine
+    from docmancer.core.presenter import Presenter
+    from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from docmancer.parser.python_parser import PythonParser
+    from simulated_agent import SimulatedLLMAgent
+
+    config = DocmancerConfig.from_dict(
+        {
+            **DocmancerConfig().to_dict(),
+            "project_dir": root,
+            "files": ["src/**/*.py"],
+            "language": "python",
+            "style": "PEP",
+            "force_all": True,
+            "template_rules": [],
+            "queue": queue_path,
+        }
+    )
+    engine = DocumentationBuilderEngine(
+        generator=DocumentationGenerator(model=SimulatedLLMAgent(), language="python"),
+        parser=PythonParser(),
+        presenter=Presenter(),
+        formatter=PyDocstringFormatter(),
+    )
+    cwd = os.getcwd()
+    try:
+        os.chdir(root)  # File patterns are relative to the working directory
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.run(config)
+        return time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--functions-per-file", type=int, default=5)
+    parser.add_argument(
+        "--latencies", type=float, nargs="+", default=[0.05, 0.05, 0.1, 0.2]
+    )
+    args = parser.parse_args()
+
+    spec = ProjectSpec(files=args.files, functions_per_file=args.functions_per_file)
+    functions = spec.get_function_count()
+    tmp = tempfile.mkdtemp(prefix="docmancer-bench-")
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    ready = context.Semaphore(0)
+    try:
+        root = os.path.join(tmp, "project")
+        write_project(spec, root)
+        queue_path = os.path.join(tmp, "shared", "queue.db")
+        from docmancer.core.work_queue import WorkQueue
+
+        WorkQueue(queue_path).close()  # Created before the workers open it
+        workers = [
+            context.Process(
+                target=run_worker,
+                args=(queue_path, latency, f"worker-{index}", ready, results),
+            )
+            for index, latency in enumerate(args.latencies)
+        ]
+        for worker in workers:
+            worker.start()
+        # Process start and imports are not part of the run
+        for _ in workers:
+            ready.acquire()
+        elapsed = run_coordinator(root, queue_path)
+        for worker in workers:
+            worker.join()
+        served = {}
+        for _ in [worker for worker in workers if worker.exitcode == 0]:
+            name, completed, lost = results.get()
+            served[name] = (completed, lost)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    rate = sum(1 / latency for latency in args.latencies)
+    best = functions / rate
+    even = max(functions / len(args.latencies) * latency for latency in args.latencies)
+    print(
+        f"{functions} functions, {len(args.latencies)} workers with latencies "
+        f"{', '.join(f'{latency * 1000:g} ms' for latency in args.latencies)}"
+    )
+    for index, latency in enumerate(args.latencies):
+        completed, lost = served.get(f"worker-{index}", (0, 0))
+        print(
+            f"  worker-{index} ({latency * 1000:g} ms): {completed} functions, "
+            f"{lost} lost"
+        )
+    print(f"queue: {elapsed:.2f}s, best possible {best:.2f}s, even split {even:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Splits a `generate` run over shards as CI machines would, each shard on its
+own copy of a synthetic project with a simulated model, and compares the
+slowest shard's wall time with one unsharded run. The shards' review files
+are then merged into another copy, which is checked to match the unsharded
+run's sources.
+
+Shards run one after another, each in a new process, so their wall times are
+what separate machines would see.
+
+Usage:
+    python benchmarks/bench_shards.py [--shards 8] [--files 400]
+        [--functions-per-file 5] [--latency 0.005]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+from synthetic_project import ProjectSpec, write_project
+
+
+def get_config(root: str, command: str, **values):
+    from docmancer.config import DocmancerConfig
+
+    return DocmancerConfig.from_dict(
+        {
+            **DocmancerConfig().to_dict(),
+            "command": command,
+            "project_dir": root,
+            "files": ["src/**/*.py"],
+            "language": "python",
+            "style": "PEP",
+            "force_all": True,
+            "template_rules": [],
+            **values,
+        }
+    )
+
+
+def run_generate(root: str, latency: float, shard: Optional[str]) -> dict:
+    """Runs `generate` on a project in the current process."""
+    from docmancer.core.engine import DocumentationBuilderEngine
+    from docmancer.core.metrics import MetricsRecorder
+    from docmancer.core.presenter import Presenter
+    from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from docmancer.parser.python_parser import PythonParser
+    from simulated_agent import SimulatedLLMAgent
+
+    cwd = os.getcwd()
+    metrics = MetricsRecorder()
+    agent = SimulatedLLMAgent(latency=latency)
+    try:
+        os.chdir(root)  # File patterns are relative to the working directory
+        engine = DocumentationBuilderEngine(
+            generator=DocumentationGenerator(
+                model=agent, language="python", metrics=metrics
+            ),
+            parser=PythonParser(),
+            presenter=Presenter(),
+            formatter=PyDocstringFormatter(),
+            metrics=metrics,
+        )
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.run(get_config(root, "generate", shard=shard))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+    return {
+        "seconds": elapsed,
+        "functions": metrics.get_counter("functions_parsed"),
+        "requests": agent.requests,
+    }
+
+
+def run_in_process(root: str, latency: float, shard: Optional[str]) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_generate, root, latency, shard).result()
+
+
+def read_sources(root: str) -> dict:
+    return {
+        str(path.relative_to(root)): path.read_text()
+        for path in sorted(Path(root, "src").rglob("*.py"))
+    }
+
+
+def apply_review_file(root: str) -> dict:
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.review_file import run_apply
+
+    cwd = os.getcwd()
+    try:
+        os.chdir(root)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_apply(get_config(root, "apply"), Presenter())
+    finally:
+        os.chdir(cwd)
+    return read_sources(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--functions-per-file", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.review_file import run_merge
+
+    spec = ProjectSpec(
+        files=args.files, functions_per_file=args.functions_per_file, nesting=3
+    )
+    tmp = tempfile.mkdtemp(prefix="docmancer-bench-")
+    try:
+
+        def new_copy(name: str) -> str:
+            root = os.path.join(tmp, name)
+            write_project(spec, root)
+            return root
+
+        full_root = new_copy("full")
+        full = run_in_process(full_root, args.latency, None)
+        expected = apply_review_file(full_root)
+        print(
+            f"unsharded: {full['functions']} functions, {full['requests']} "
+            f"requests, {full['seconds']:.2f}s"
+        )
+
+        merge_files = []
+        shards = []
+        for index in range(1, args.shards + 1):
+            shard = f"{index}/{args.shards}"
+            root = new_copy(f"shard_{index}")
+            shards.append(run_in_process(root, args.latency, shard))
+            merge_files.append(
+                os.path.join(
+                    root,
+                    ".docmancer",
+                    f"review.shard-{index}-of-{args.shards}.jsonl",
+                )
+            )
+        slowest = max(result["seconds"] for result in shards)
+        functions = [result["functions"] for result in shards]
+        print(
+            f"{args.shards} shards: {min(functions)}-{max(functions)} functions "
+            f"each, slowest {slowest:.2f}s, "
+            f"{full['seconds'] / slowest:.1f}x faster than unsharded"
+        )
+
+        merged_root = new_copy("merged")
+        cwd = os.getcwd()
+        try:
+            os.chdir(merged_root)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                exit_code = run_merge(
+                    get_config(merged_root, "merge", merge_files=merge_files),
+                    Presenter(),
+                )
+            merged = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+        matches = exit_code == 0 and read_sources(merged_root) == expected
+        print(
+            f"merge: {merged:.2f}s, sources "
+            f"{'match' if matches else 'DIFFER from'} the unsharded run"
+        )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measures how long `docmancer watch` takes from saving a file to having a
+suggestion for the edited function, on a synthetic project with a
+simulated CPU model. One function body is edited and saved at a time, and
+each save waits for its suggestion.
+
+The simulated model's default token rates are those of a small quantized
+model on a laptop CPU. The report separates the model's time from
+Docmancer's: the debounce, parsing the saved file and writing the
+suggestions file.
+
+Usage:
+    python benchmarks/bench_watch.py [--files 400] [--functions-per-file 5]
+        [--edits 20] [--debounce 0.3] [--prompt-rate 300] [--completion-rate 25]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from synthetic_project import ProjectSpec, get_file_path, write_project
+
+
+def get_session(root: str, agent, debounce: float):
+    from docmancer.config import DocmancerConfig
+    from docmancer.core.functional_context_database import FunctionalContextDatabase
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.watch import WatchSession
+    from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from docmancer.parser.python_parser import PythonParser
+
+    config = DocmancerConfig.from_dict(
+        {
+            **DocmancerConfig().to_dict(),
+            "command": "watch",
+            "project_dir": root,
+            "files": ["src/**/*.py"],
+            "language": "python",
+            "style": "PEP",
+            "template_rules": [],
+            "watch_debounce": debounce,
+        }
+    )
+    index = FunctionalContextDatabase.for_project(root)
+    session = WatchSession(
+        config,
+        parser=PythonParser(),
+        generator=DocumentationGenerator(model=agent, language="python"),
+        formatter=PyDocstringFormatter(),
+        presenter=Presenter(),
+        index=index,
+    )
+    return session, index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--functions-per-file", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--debounce", type=float, default=0.3)
+    parser.add_argument("--prompt-rate", type=float, default=300)
+    parser.add_argument("--completion-rate", type=float, default=25)
+    args = parser.parse_args()
+
+    from docmancer.utils.file_watcher import get_file_watcher
+    from simulated_agent import SimulatedLLMAgent
+
+    spec = ProjectSpec(
+        files=args.files, functions_per_file=args.functions_per_file, nesting=3
+    )
+    agent = SimulatedLLMAgent(
+        prompt_tokens_per_second=args.prompt_rate,
+        completion_tokens_per_second=args.completion_rate,
+    )
+    model_seconds = []
+    send_message = agent.send_message
+
+    def timed_send_message(message: str) -> str:
+        start = time.perf_counter()
+        response = send_message(message)
+        model_seconds.append(time.perf_counter() - start)
+        return response
+
+    agent.send_message = timed_send_message
+
+    tmp = tempfile.mkdtemp(prefix="docmancer-bench-")
+    cwd = os.getcwd()
+    stop = threading.Event()
+    try:
+        root = os.path.join(tmp, "project")
+        write_project(spec, root)
+        os.chdir(root)  # File patterns are relative to the working directory
+        session, session_index = get_session(root, agent, args.debounce)
+        watcher = get_file_watcher(root)
+        start = time.perf_counter()
+        functions = session.scan()
+        scan_seconds = time.perf_counter() - start
+        thread = threading.Thread(target=session.run, args=(watcher, stop))
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            latencies = []
+            edited = random.Random(0).sample(range(spec.files), args.edits)
+            for edit, index in enumerate(edited):
+                path = get_file_path(spec, index)
+                with open(path, encoding="utf8") as f:
+                    source = f.read()
+                # Edits the first function in the file
+                source = source.replace(
+                    "return value\n", f"return value + {edit + 1}\n", 1
+                )
+                saved = time.perf_counter()
+                with open(path, "w", encoding="utf8") as f:
+                    f.write(source)
+                while len(session.suggestions) <= edit:
+                    time.sleep(0.002)
+                latencies.append(time.perf_counter() - saved)
+            stop.set()
+            thread.join()
+        watcher.close()
+        session_index.close()
+    finally:
+        stop.set()
+        os.chdir(cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    model = statistics.median(model_seconds)
+    overhead = [latency - seconds for latency, seconds in zip(latencies, model_seconds)]
+    print(
+        f"{functions} functions scanned in {scan_seconds:.2f}s with "
+        f"{type(watcher).__name__}, {args.edits} edits"
+    )
+    print(
+        f"save to suggestion: median {statistics.median(latencies):.2f}s, "
+        f"max {max(latencies):.2f}s, model median {model:.2f}s, "
+        f"Docmancer median {statistics.median(overhead):.2f}s "
+        f"({args.debounce:g}s debounce)"
+    )
+
+
+if __name__ == "__main__":
+    main()
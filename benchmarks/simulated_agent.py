@@ -0,0 +1,65 @@
+"""
+A deterministic LLMAgent for benchmarks that models a local model's cost:
+a fixed per-request latency plus prompt evaluation and decoding at
+configurable token rates. Requests to one agent are serialized, like a
+single llama.cpp context.
+"""
+
+import json
+import threading
+import time
+from typing import Optional
+from docmancer.generator.llm.llm_agent_base import LLMAgent
+from docmancer.utils.token_utils import estimate_tokens
+
+
+class SimulatedLLMAgent(LLMAgent):
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        prompt_tokens_per_second: Optional[float] = None,
+        completion_tokens_per_second: Optional[float] = None,
+    ):
+        self._latency = latency
+        self._prompt_rate = prompt_tokens_per_second
+        self._completion_rate = completion_tokens_per_second
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.requests = 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def get_response(self, message: str) -> str:
+        name = "function"
+        if "Qualified Name: " in message:
+            name = message.split("Qualified Name: ")[1].split("\n")[0]
+        return json.dumps(
+            {
+                "summary": f"Computes the next value for {name}.",
+                "return_description": "The updated value.",
+                "parameters": [
+                    {"name": "value", "type": "int", "desc": "The current value."}
+                ],
+            }
+        )
+
+    def get_delay(self, message: str, response: str) -> float:
+        delay = self._latency
+        if self._prompt_rate:
+            delay += estimate_tokens(message) / self._prompt_rate
+        if self._completion_rate:
+            delay += estimate_tokens(response) / self._completion_rate
+        return delay
+
+    def send_message(self, message: str) -> str:
+        if self._cancelled.is_set():
+            raise RuntimeError("Generation cancelled")
+        response = self.get_response(message)
+        delay = self.get_delay(message, response)
+        with self._lock:
+            self.requests += 1
+            if delay:
+                time.sleep(delay)
+        return response
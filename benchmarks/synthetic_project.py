@@ -0,0 +1,67 @@
+"""
+Writes synthetic Python projects for benchmarks.
+
+Files are spread over a package tree `nesting` directories deep. Every
+other function is a method, and each function calls an earlier one in its
+file so that the call graph has depth for the dependency schedule.
+"""
+
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class ProjectSpec:
+    files: int = 20
+    functions_per_file: int = 10
+    nesting: int = 1  # Package directories between the root and each file
+    body_lines: int = 6  # Statements per function, including the return
+    packages_per_level: int = 4
+
+    def get_function_count(self) -> int:
+        return self.files * self.functions_per_file
+
+
+def get_file_path(spec: ProjectSpec, index: int) -> str:
+    parts = []
+    position = index
+    for level in range(spec.nesting):
+        parts.append(f"pkg_{level}_{position % spec.packages_per_level}")
+        position //= spec.packages_per_level
+    return os.path.join("src", *parts, f"module_{index}.py")
+
+
+def get_module_source(spec: ProjectSpec, index: int) -> str:
+    lines = [f'"""Synthetic module {index}."""\n', "\n"]
+    in_class = False
+    for function in range(spec.functions_per_file):
+        is_method = function % 2 == 1
+        if is_method and not in_class:
+            lines += [f"class Component{index}_{function}:\n"]
+            in_class = True
+        elif not is_method and in_class:
+            lines.append("\n")
+            in_class = False
+        indent = "    " if is_method else ""
+        self_param = "self, " if is_method else ""
+        lines.append(f"{indent}def step_{function}({self_param}value, scale=2):\n")
+        body = indent + "    "
+        for statement in range(max(0, spec.body_lines - 2)):
+            if statement % 3 == 2:
+                lines.append(f"{body}if value > {statement * 10}:\n")
+                lines.append(f"{body}    value = value - {statement}\n")
+            else:
+                lines.append(f"{body}value = value * scale + {statement}\n")
+        if function:
+            lines.append(f"{body}value = step_{function // 2}(value)\n")
+        lines.append(f"{body}return value\n")
+        lines.append("\n")
+    return "".join(lines)
+
+
+def write_project(spec: ProjectSpec, root: str):
+    for index in range(spec.files):
+        path = os.path.join(root, get_file_path(spec, index))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf8") as f:
+            f.write(get_module_source(spec, index))
@@ -1,13 +1,68 @@
 import os
 import sys
+from typing import TYPE_CHECKING
 from docmancer.core.cli import parse_args
-from docmancer.core.engine import DocumentationBuilderEngine
-from docmancer.generator.documentation_generator import DocumentationGenerator
-from docmancer.generator.llm.llm_agent_factory import LLMAgentFactory
-from docmancer.formatter.formatter_factory import FormatterFactory
-from docmancer.core.presenter import Presenter
-from docmancer.parser.parser_factory import ParserFactory
-from docmancer.config import DocmancerConfig, LLMType
+from docmancer.core.options import Command, LLMType
+
+if TYPE_CHECKING:
+    from docmancer.config import DocmancerConfig
+
+# Commands import their dependencies when they run, so modes that never
+# load a model (--check, rollback) do not pay for llama_cpp, httpx, etc.
+
+
+def check(config: "DocmancerConfig"):
+    from docmancer.core.checker import run_check
+
+    sys.exit(run_check(config))
+
+
+def rollback(config: "DocmancerConfig"):
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.rollback import rollback_latest_run
+
+    presenter = Presenter()
+    result = rollback_latest_run(config.project_dir)
+    if result.run_id is None:
+        presenter.print_error("No run to roll back.")
+        sys.exit(1)
+    for file_path in result.restored:
+        presenter.print_message(f"Restored {file_path}")
+    for file_path in result.skipped:
+        presenter.print_error(f"{file_path} was modified after the run. Not restored.")
+    presenter.print_success(
+        f"Rolled back run {result.run_id} ({len(result.restored)} files restored)"
+    )
+
+
+def review(config: "DocmancerConfig"):
+    from docmancer.core.metrics import MetricsRecorder, write_reports
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.review_file import run_review
+
+    presenter = Presenter()
+    metrics = MetricsRecorder(enabled=config.is_metrics_enabled())
+    exit_code = run_review(config, presenter, metrics)
+    if metrics.enabled:
+        path = write_reports(
+            metrics, config.project_dir, config.metrics_output, config.metrics_textfile
+        )
+        presenter.print_message(f"Review metrics written to {path}")
+    sys.exit(exit_code)
+
+
+def apply(config: "DocmancerConfig"):
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.review_file import run_apply
+
+    sys.exit(run_apply(config, Presenter()))
+
+
+def merge(config: "DocmancerConfig"):
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.review_file import run_merge
+
+    sys.exit(run_merge(config, Presenter()))
 
 
 def main():
@@ -15,6 +70,41 @@ def main():
     if not os.path.isdir(config.project_dir):
         raise Exception("Error: Project directory does not exist.")
 
+    if config.command == Command.ROLLBACK.value:
+        rollback(config)
+        return
+    if config.command == Command.REVIEW.value:
+        review(config)
+        return
+    if config.command == Command.APPLY.value:
+        apply(config)
+        return
+    if config.command == Command.MERGE.value:
+        merge(config)
+        return
+    if config.command == Command.WORKER.value:
+        worker(config)
+        return
+    if config.command == Command.WATCH.value:
+        watch(config)
+        return
+    if config.check:
+        check(config)
+        return
+
+    run(config)
+
+
+def run(config: "DocmancerConfig"):
+    from docmancer.core.engine import DocumentationBuilderEngine
+    from docmancer.core.metrics import MetricsRecorder
+    from docmancer.core.progress import ProgressTracker
+    from docmancer.core.tracing import Tracer
+    from docmancer.generator.examples import ExampleRetriever
+    from docmancer.formatter.formatter_factory import FormatterFactory
+    from docmancer.core.presenter import Presenter
+    from docmancer.parser.parser_factory import ParserFactory
+
     try:
 
         # --- Accessing config settings ---
@@ -70,15 +160,26 @@ def main():
         print(f"An unexpected error occurred: {e}", file=sys.stderr)
         sys.exit(1)
 
-    try:
-        agent_factory = LLMAgentFactory()
-        agent = agent_factory.get_agent(llm_config=config.llm_config)
-    except Exception as e:
-        print(e)
+    metrics = MetricsRecorder(enabled=config.is_metrics_enabled())
+    tracer = Tracer(enabled=bool(config.trace))
+    # Shown only when nothing is reviewed during the run
+    progress = ProgressTracker(
+        enabled=config.force_all or config.command == Command.GENERATE.value
+    )
 
-    presenter = Presenter()
+    generator, recording = get_generator(
+        config,
+        metrics,
+        tracer,
+        progress,
+        examples=(
+            ExampleRetriever(config.examples, config.example_tokens)
+            if config.examples > 0
+            else None
+        ),
+    )
 
-    generator = DocumentationGenerator(model=agent, language=config.language)
+    presenter = Presenter()
 
     formatter_factory = FormatterFactory()
     formatter = formatter_factory.get_formatter(
@@ -89,10 +190,213 @@ def main():
     parser = parser_factory.get_parser(language=config.language)
 
     builder_engine = DocumentationBuilderEngine(
-        generator=generator, formatter=formatter, presenter=presenter, parser=parser
+        generator=generator,
+        formatter=formatter,
+        presenter=presenter,
+        parser=parser,
+        metrics=metrics,
+        tracer=tracer,
+        progress=progress,
     )
 
-    builder_engine.run(config)
+    try:
+        builder_engine.run(config)
+    finally:
+        if recording is not None:
+            recording.save(config.record_cassette)
+            print(f"Recorded {len(recording)} responses to {config.record_cassette}")
+
+
+def worker(config: "DocmancerConfig"):
+    from docmancer.core.metrics import MetricsRecorder, write_reports
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.progress import NULL_PROGRESS
+    from docmancer.core.tracing import NULL_TRACER
+    from docmancer.core.work_queue import QueueWorker, WorkQueue
+
+    presenter = Presenter()
+    metrics = MetricsRecorder(enabled=config.is_metrics_enabled())
+    # Style examples are chosen by the coordinator and sent with each job
+    generator, recording = get_generator(config, metrics, NULL_TRACER, NULL_PROGRESS)
+    queue = WorkQueue(
+        config.queue,
+        lease_seconds=config.lease_timeout,
+        max_attempts=config.max_attempts,
+    )
+    queue_worker = QueueWorker(queue, generator, metrics=metrics)
+    presenter.print_message(
+        f"Worker {queue_worker.worker_id} waiting for functions in {config.queue}"
+    )
+
+    def on_job(job, succeeded):
+        result = "done" if succeeded else f"failed (attempt {job.attempts})"
+        presenter.print_message(f"{job.context.qualified_name}: {result}")
+
+    try:
+        queue_worker.run(on_job)
+    except KeyboardInterrupt:
+        queue_worker.stop()
+    finally:
+        queue.close()
+        if recording is not None:
+            recording.save(config.record_cassette)
+    stats = queue_worker.stats
+    presenter.print_success(
+        f"Worker finished: {stats.completed} summaries, {stats.failed} failed "
+        f"attempts, {stats.lost} results returned after their lease expired"
+    )
+    if metrics.enabled:
+        path = write_reports(
+            metrics, config.project_dir, config.metrics_output, config.metrics_textfile
+        )
+        presenter.print_message(f"Worker metrics written to {path}")
+
+
+def watch(config: "DocmancerConfig"):
+    from docmancer.core.functional_context_database import FunctionalContextDatabase
+    from docmancer.core.metrics import MetricsRecorder, write_reports
+    from docmancer.core.presenter import Presenter
+    from docmancer.core.progress import NULL_PROGRESS
+    from docmancer.core.tracing import NULL_TRACER
+    from docmancer.core.watch import WatchSession
+    from docmancer.formatter.formatter_factory import FormatterFactory
+    from docmancer.generator.examples import ExampleRetriever
+    from docmancer.parser.parser_factory import ParserFactory
+    from docmancer.utils.file_watcher import get_file_watcher
+
+    presenter = Presenter()
+    metrics = MetricsRecorder(enabled=config.is_metrics_enabled())
+    # Loaded once, so a save only waits for the model to respond
+    generator, recording = get_generator(
+        config,
+        metrics,
+        NULL_TRACER,
+        NULL_PROGRESS,
+        examples=(
+            ExampleRetriever(config.examples, config.example_tokens)
+            if config.examples > 0
+            else None
+        ),
+    )
+    index = FunctionalContextDatabase.for_project(config.project_dir)
+    session = WatchSession(
+        config,
+        parser=ParserFactory().get_parser(language=config.language),
+        generator=generator,
+        formatter=FormatterFactory().get_formatter(
+            style=config.style, language=config.language
+        ),
+        presenter=presenter,
+        index=index,
+        metrics=metrics,
+    )
+    # Started before the scan so saves made during it are not missed
+    watcher = get_file_watcher(config.project_dir, config.ignore_files)
+    try:
+        count = session.scan()
+        presenter.print_message(
+            f"Watching {count} functions in {config.project_dir} "
+            f"({type(watcher).__name__}). Suggestions are written to "
+            f"{session.path}. Press Ctrl+C to stop."
+        )
+        session.run(watcher)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        index.close()
+        if recording is not None:
+            recording.save(config.record_cassette)
+    presenter.print_success(
+        f"{len(session.suggestions)} suggestions in {session.path}. Review them "
+        f"with 'docmancer review --out {session.path}'"
+    )
+    if metrics.enabled:
+        path = write_reports(
+            metrics, config.project_dir, config.metrics_output, config.metrics_textfile
+        )
+        presenter.print_message(f"Watch metrics written to {path}")
+
+
+def get_generator(config: "DocmancerConfig", metrics, tracer, progress, examples=None):
+    """
+    Returns the documentation generator for the configured models, and the
+    cassette being recorded if `--record-cassette` was given. Exits if the
+    models cannot be loaded. With --no-summary no model is loaded.
+    """
+    from docmancer.generator.documentation_generator import DocumentationGenerator
+    from docmancer.generator.model_router import DEFAULT_AGENT_NAME, ModelRouter
+    from docmancer.generator.templates import TemplateSummarizer
+
+    if config.no_summary:
+        from docmancer.generator.llm.llm_agent_base import NoModelAgent
+
+        generator = DocumentationGenerator(
+            model=NoModelAgent(),
+            language=config.language,
+            examples=examples,
+            metrics=metrics,
+            tracer=tracer,
+            progress=progress,
+        )
+        return generator, None
+
+    try:
+        agents, recording = get_agents(config, metrics, tracer)
+        router = ModelRouter(agents, config.llm_config.routing, metrics=metrics)
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
+    generator = DocumentationGenerator(
+        model=agents[DEFAULT_AGENT_NAME],
+        language=config.language,
+        max_prompt_tokens=config.llm_config.get_max_prompt_tokens(),
+        router=router,
+        templates=TemplateSummarizer(config.template_rules),
+        examples=examples,
+        metrics=metrics,
+        tracer=tracer,
+        progress=progress,
+    )
+    return generator, recording
+
+
+def get_agents(config: "DocmancerConfig", metrics, tracer):
+    """
+    Returns the agents by name, and the cassette being recorded if
+    --record-cassette is set. With --replay-cassette no model is loaded.
+    """
+    from docmancer.generator.llm.cassette_agent import (
+        Cassette,
+        RecordingAgent,
+        ReplayAgent,
+    )
+    from docmancer.generator.model_router import DEFAULT_AGENT_NAME
+
+    if config.replay_cassette and config.record_cassette:
+        raise ValueError("--record-cassette and --replay-cassette cannot be combined.")
+    if config.replay_cassette:
+        cassette = Cassette.load(config.replay_cassette)
+        names = [DEFAULT_AGENT_NAME] + list(config.llm_config.agents)
+        agents = {
+            name: ReplayAgent(cassette, name, latency=config.replay_latency)
+            for name in names
+        }
+        return agents, None
+
+    from docmancer.generator.llm.llm_agent_factory import LLMAgentFactory
+
+    agents = LLMAgentFactory().get_agents(
+        llm_config=config.llm_config, metrics=metrics, tracer=tracer
+    )
+    if not config.record_cassette:
+        return agents, None
+    cassette = Cassette()
+    agents = {
+        name: RecordingAgent(agent, cassette, name) for name, agent in agents.items()
+    }
+    return agents, cassette
 
 
 if __name__ == "__main__":
@@ -1,16 +1,19 @@
 import yaml
 import os
 import sys
-from enum import Enum
 from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List
 from dataclasses_json import dataclass_json
 from docmancer.core.styles import DocstringStyle
-
-
-class LLMType(Enum):
-    LOCAL = "LOCAL"
-    REMOTE_API = "REMOTE_API"
+from docmancer.core.check_report import CheckReportFormat
+from docmancer.core.sharding import Shard
+from docmancer.core.options import (
+    Command,
+    GenerationSchedule,
+    LLMType,
+    ReplayLatency,
+    ReviewMode,
+)
 
 
 @dataclass_json
@@ -38,6 +41,24 @@ class RemoteApiLLMSettings:
     user_max_prompt_tokens: Optional[int] = None
 
 
+@dataclass_json
+@dataclass
+class RoutingSettings:
+    """
+    Chooses which named agent in `LLMConfig.agents` generates each function,
+    based on the function's complexity. Routes without an agent use the
+    default agent described by the top level LLMConfig.
+    """
+
+    trivial: Optional[str] = None
+    typical: Optional[str] = None
+    complex: Optional[str] = None
+    trivial_max_score: float = 2.0  # Complexity scores up to this are trivial
+    complex_min_score: float = 15.0  # Complexity scores from this are complex
+    quality: int = 1  # 0 moves functions one route down, 2 one route up
+    escalate: bool = False  # Retry on the next route up if no summary is read
+
+
 @dataclass_json
 @dataclass
 class LLMConfig:
@@ -51,6 +72,11 @@ class LLMConfig:
     local: Optional[LocalLLMSettings] = None
     remote_api: Optional[RemoteApiLLMSettings] = None
 
+    # Additional agents by name, used by routing. Their own agents and
+    # routing settings are ignored.
+    agents: Dict[str, "LLMConfig"] = field(default_factory=dict)
+    routing: RoutingSettings = field(default_factory=RoutingSettings)
+
     def get_mode_enum(self) -> LLMType:
         try:
             return LLMType[self.mode.upper()]
@@ -62,12 +88,35 @@ class LLMConfig:
         except AttributeError:
             raise TypeError(f"Mode '{self.mode}' is not a string type.")
 
+    def get_max_prompt_tokens(self) -> Optional[int]:
+        """
+        Returns how many tokens a prompt may use, leaving room for the
+        response, or None if the selected backend does not define a limit.
+        """
+        if self.mode.upper() == LLMType.LOCAL.name and self.local:
+            return max(0, self.local.n_ctx - self.max_tokens_per_response)
+        if self.mode.upper() == LLMType.REMOTE_API.name and self.remote_api:
+            return self.remote_api.user_max_prompt_tokens
+        return None
+
+
+@dataclass_json
+@dataclass
+class PipelineSettings:
+    """Queue and concurrency settings for the engine's pipeline stages."""
+
+    queue_size: int = 16  # Maximum items waiting between two stages
+    parse_workers: int = 2
+    format_workers: int = 1
+    commit_workers: int = 4
+
 
 @dataclass_json
 @dataclass
 class DocmancerConfig:
     """Main configuration for the application."""
 
+    command: str = Command.RUN.value
     project_dir: str = None
     llm_config: LLMConfig = None
     files: List[str] = field(default_factory=lambda: ["*"])
@@ -78,8 +127,49 @@ class DocmancerConfig:
     ignore_functions: List[str] = field(default_factory=list)
     no_summary: bool = False
     check: bool = False
+    check_format: str = CheckReportFormat.TEXT.value
+    check_output: Optional[str] = None  # Report path, stdout if not set
+    check_threshold: float = 0.0  # Minimum coverage percentage for --check
     write: bool = True
     force_all: bool = False
+    resume: bool = False
+    schedule: str = GenerationSchedule.FLAT.value
+    generation_workers: int = 1
+    review_lookahead: int = 4  # Summaries generated ahead of interactive review
+    review_mode: str = ReviewMode.SINGLE.value
+    # Trivial function shapes summarized without the model, see generator/templates.py
+    template_rules: List[str] = field(
+        default_factory=lambda: ["getter", "setter", "property", "repr", "passthrough"]
+    )
+    # Similar documented functions added to each prompt as style examples, 0 for none
+    examples: int = 0
+    example_tokens: int = 300  # Token budget for all of a prompt's examples
+    time_budget: Optional[float] = None  # Seconds before new generation stops
+    max_functions: Optional[int] = None  # Summaries generated before stopping
+    metrics: bool = False  # Writes a JSON run report to the cache directory
+    metrics_output: Optional[str] = None  # JSON run report path, implies metrics
+    metrics_textfile: Optional[str] = None  # Prometheus textfile path, implies metrics
+    trace: Optional[str] = None  # Chrome Trace Event file written at the end of a run
+    record_cassette: Optional[str] = None  # Records model responses to this file
+    replay_cassette: Optional[str] = None  # Serves model responses from this file
+    replay_latency: str = ReplayLatency.NONE.value
+    # Written by `generate`, read by `review` and `apply`. Defaults to the cache directory
+    review_file: Optional[str] = None
+    shard: Optional[str] = None  # "i/N": only this shard's files are documented
+    merge_files: List[str] = field(default_factory=list)  # Read by `merge`
+    # SQLite work queue shared with `docmancer worker` processes, see core/work_queue.py
+    queue: Optional[str] = None
+    lease_timeout: float = 300.0  # Seconds a worker holds a job without renewing it
+    max_attempts: int = 3  # Leases of a queued function before it is given up
+    # Seconds `watch` waits for a save to finish before parsing, see core/watch.py
+    watch_debounce: float = 0.3
+    pipeline: PipelineSettings = field(default_factory=PipelineSettings)
+
+    def is_metrics_enabled(self) -> bool:
+        return bool(self.metrics or self.metrics_output or self.metrics_textfile)
+
+    def get_shard(self) -> Optional[Shard]:
+        return Shard.parse(self.shard) if self.shard else None
 
     def get_default_style_enum(self) -> DocstringStyle:
         try:
@@ -0,0 +1,306 @@
+import fnmatch
+import re
+from enum import Enum
+from typing import Callable, Dict, List
+from prompt_toolkit.application import Application, run_in_terminal
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.filters import Condition
+from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.layout import (
+    ConditionalContainer,
+    FormattedTextControl,
+    HSplit,
+    Layout,
+    Window,
+)
+from prompt_toolkit.layout.controls import BufferControl
+from prompt_toolkit.widgets import Frame
+from docmancer.models.documentation_model import DocumentationModel
+
+# Each function's docs are preceded by one of these lines when all of a
+# file's docs are edited in one editor session
+EDIT_MARKER = "# --- docmancer {index}: {name} (line {line}) ---"
+EDIT_MARKER_PATTERN = re.compile(r"^# --- docmancer (\d+): .*---\s*$")
+
+
+class BatchItemStatus(Enum):
+    PENDING = " "
+    ACCEPTED = "✓"
+    SKIPPED = "✗"
+
+
+def format_edit_buffer(docs: List[DocumentationModel]) -> List[str]:
+    """
+    Returns the lines of a single editor session holding every doc, each
+    below a marker line naming its function.
+    """
+    lines = [
+        "# Edit the documentation below. Lines starting with '# --- docmancer'\n",
+        "# separate the functions and must be kept.\n",
+    ]
+    for index, doc in enumerate(docs):
+        lines.append(
+            EDIT_MARKER.format(
+                index=index, name=doc.qualified_name, line=doc.start_line
+            )
+            + "\n"
+        )
+        lines += [
+            line if line.endswith("\n") else line + "\n"
+            for line in doc.formatted_documentation
+        ]
+    return lines
+
+
+def parse_edit_buffer(lines: List[str], count: int) -> Dict[int, List[str]]:
+    """
+    Splits an edited session back into per-function docs.
+
+    Args:
+        lines (List[str]): the edited lines
+        count (int): number of docs in the session
+
+    Returns:
+        Dict[int, List[str]]: docs by index. Functions whose marker was
+            removed are left out, so they keep their current docs.
+    """
+    edits: Dict[int, List[str]] = {}
+    current = None
+    for line in lines:
+        match = EDIT_MARKER_PATTERN.match(line)
+        if match:
+            index = int(match.group(1))
+            current = index if index < count else None
+            if current is not None:
+                edits[current] = []
+        elif current is not None:
+            edits[current].append(line if line.endswith("\n") else line + "\n")
+    return edits
+
+
+class BatchReviewState:
+    """Decisions and cursor of a batch review, separate from the screen."""
+
+    def __init__(self, docs: List[DocumentationModel]):
+        self.docs = docs
+        self.statuses = [BatchItemStatus.PENDING] * len(docs)
+        self.edited = [False] * len(docs)
+        self.cursor = 0
+        self.quit = False
+
+    def move(self, delta: int):
+        if self.docs:
+            self.cursor = max(0, min(len(self.docs) - 1, self.cursor + delta))
+
+    def decide(self, status: BatchItemStatus):
+        """Decides the function under the cursor and moves to the next pending one."""
+        self.statuses[self.cursor] = status
+        for index in range(self.cursor + 1, len(self.docs)):
+            if self.statuses[index] == BatchItemStatus.PENDING:
+                self.cursor = index
+                return
+
+    def decide_pending(self, status: BatchItemStatus):
+        self.statuses = [
+            status if current == BatchItemStatus.PENDING else current
+            for current in self.statuses
+        ]
+
+    def accept_matching(self, pattern: str) -> int:
+        """
+        Accepts every function whose qualified or short name matches a glob
+        pattern.
+
+        Returns:
+            int: number of functions accepted
+        """
+        count = 0
+        for index, doc in enumerate(self.docs):
+            name = doc.qualified_name
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(
+                name.rsplit(".", 1)[-1], pattern
+            ):
+                self.statuses[index] = BatchItemStatus.ACCEPTED
+                count += 1
+        return count
+
+    def apply_edits(self, edits: Dict[int, List[str]]):
+        for index, lines in edits.items():
+            if lines != self.docs[index].formatted_documentation:
+                self.docs[index].formatted_documentation = lines
+                self.edited[index] = True
+
+    def get_counts(self) -> Dict[BatchItemStatus, int]:
+        return {status: self.statuses.count(status) for status in BatchItemStatus}
+
+
+KEY_HELP = (
+    "<b>a</b> accept  <b>s</b> skip  <b>A</b>/<b>S</b> accept/skip all pending  "
+    "<b>/</b> accept by pattern  <b>e</b> edit file  <b>enter</b> done (pending "
+    "are skipped)  <b>q</b> quit"
+)
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def review_file_batch(
+    file_path: str,
+    state: BatchReviewState,
+    edit_lines: Callable[[List[str]], List[str]],
+    **app_options,
+) -> BatchReviewState:
+    """
+    Shows a file's functions in a full-screen list for keyboard review.
+
+    Args:
+        file_path (str): file the docs belong to, shown in the header
+        state (BatchReviewState): docs to review, updated in place
+        edit_lines (Callable): opens lines in an editor and returns them edited
+        app_options: passed to the prompt_toolkit Application, e.g. input
+            and output for tests
+
+    Returns:
+        BatchReviewState: `state`, with `quit` set if the reviewer quit
+    """
+    pattern_buffer = Buffer(multiline=False)
+    entering_pattern = [False]
+    message = [""]
+
+    def get_header():
+        counts = state.get_counts()
+        return HTML(
+            f"<b>{_escape(str(file_path))}</b>  {len(state.docs)} functions: "
+            f"<ansigreen>{counts[BatchItemStatus.ACCEPTED]} accepted</ansigreen>, "
+            f"<ansired>{counts[BatchItemStatus.SKIPPED]} skipped</ansired>, "
+            f"{counts[BatchItemStatus.PENDING]} pending  {_escape(message[0])}"
+        )
+
+    def get_list():
+        fragments = []
+        for index, doc in enumerate(state.docs):
+            style = ""
+            if index == state.cursor:
+                # The list window scrolls to keep this row visible
+                fragments.append(("[SetCursorPosition]", ""))
+                style = "reverse"
+            edited = "*" if state.edited[index] else " "
+            fragments.append(
+                (
+                    style,
+                    f" {state.statuses[index].value}{edited} {doc.start_line:>5}  "
+                    f"{doc.qualified_name}\n",
+                )
+            )
+        return fragments
+
+    def get_preview():
+        if not state.docs:
+            return ""
+        doc = state.docs[state.cursor]
+        lines = [f"{doc.signature}\n"]
+        if doc.existing_docstring:
+            lines.append(f"Existing: {''.join(doc.existing_docstring).strip()}\n")
+        lines.append("\n")
+        lines += doc.formatted_documentation
+        return [("", "".join(lines))]
+
+    bindings = KeyBindings()
+    not_entering = Condition(lambda: not entering_pattern[0])
+
+    @bindings.add("up", filter=not_entering)
+    @bindings.add("k", filter=not_entering)
+    def _(event):
+        state.move(-1)
+
+    @bindings.add("down", filter=not_entering)
+    @bindings.add("j", filter=not_entering)
+    def _(event):
+        state.move(1)
+
+    @bindings.add("a", filter=not_entering)
+    def _(event):
+        state.decide(BatchItemStatus.ACCEPTED)
+
+    @bindings.add("s", filter=not_entering)
+    def _(event):
+        state.decide(BatchItemStatus.SKIPPED)
+
+    @bindings.add("A", filter=not_entering)
+    def _(event):
+        state.decide_pending(BatchItemStatus.ACCEPTED)
+
+    @bindings.add("S", filter=not_entering)
+    def _(event):
+        state.decide_pending(BatchItemStatus.SKIPPED)
+
+    @bindings.add("/", filter=not_entering)
+    def _(event):
+        entering_pattern[0] = True
+        pattern_buffer.reset()
+        event.app.layout.focus(pattern_buffer)
+
+    @bindings.add("enter", filter=~not_entering)
+    def _(event):
+        entering_pattern[0] = False
+        pattern = pattern_buffer.text.strip()
+        if pattern:
+            count = state.accept_matching(pattern)
+            message[0] = f"Accepted {count} matching '{pattern}'"
+        event.app.layout.focus(list_window)
+
+    @bindings.add("escape", filter=~not_entering)
+    def _(event):
+        entering_pattern[0] = False
+        event.app.layout.focus(list_window)
+
+    @bindings.add("e", filter=not_entering)
+    def _(event):
+        def edit():
+            edited = edit_lines(format_edit_buffer(state.docs))
+            state.apply_edits(parse_edit_buffer(edited, len(state.docs)))
+
+        run_in_terminal(edit)
+
+    @bindings.add("enter", filter=not_entering)
+    def _(event):
+        state.decide_pending(BatchItemStatus.SKIPPED)
+        event.app.exit()
+
+    @bindings.add("q", filter=not_entering)
+    @bindings.add("c-c")
+    def _(event):
+        state.quit = True
+        event.app.exit()
+
+    list_window = Window(
+        FormattedTextControl(get_list, focusable=True, show_cursor=False)
+    )
+    layout = Layout(
+        HSplit(
+            [
+                Window(FormattedTextControl(get_header), height=1),
+                Frame(list_window, title="Functions"),
+                Frame(
+                    Window(FormattedTextControl(get_preview), wrap_lines=True),
+                    title="Generated Docstring",
+                ),
+                ConditionalContainer(
+                    Window(
+                        BufferControl(pattern_buffer),
+                        height=1,
+                        get_line_prefix=lambda *_: "Accept pattern: ",
+                    ),
+                    filter=Condition(lambda: entering_pattern[0]),
+                ),
+                Window(FormattedTextControl(HTML(KEY_HELP)), height=1),
+            ]
+        ),
+        focused_element=list_window,
+    )
+    Application(
+        layout=layout, key_bindings=bindings, full_screen=True, **app_options
+    ).run()
+    return state
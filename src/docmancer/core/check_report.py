@@ -0,0 +1,152 @@
+import json
+import xml.etree.ElementTree as ET
+from enum import Enum
+from typing import TYPE_CHECKING, List
+
+# Only used in annotations; the command line parser imports this module for
+# CheckReportFormat and should not have to load dataclasses_json
+if TYPE_CHECKING:
+    from docmancer.models.coverage_model import FileCoverageModel
+
+RULE_ID = "DOC001"
+RULE_DESCRIPTION = "Function has no docstring"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+class CheckReportFormat(Enum):
+    TEXT = "text"
+    JSON = "json"
+    JUNIT = "junit"
+    SARIF = "sarif"
+
+
+def get_coverage(files: List["FileCoverageModel"]) -> float:
+    """
+    Returns the percentage of functions that have a docstring. A project
+    without functions counts as fully documented.
+    """
+    total = sum(len(f.functions) for f in files)
+    if total == 0:
+        return 100.0
+    documented = sum(f.get_documented_count() for f in files)
+    return 100.0 * documented / total
+
+
+def to_text(files: List["FileCoverageModel"], threshold: float) -> str:
+    lines = []
+    for f in files:
+        for function in f.functions:
+            if not function.documented:
+                lines.append(
+                    f"{f.file_path}:{function.start_line}: "
+                    f"{function.qualified_name} is undocumented"
+                )
+    total = sum(len(f.functions) for f in files)
+    documented = sum(f.get_documented_count() for f in files)
+    lines.append(
+        f"Documentation coverage: {get_coverage(files):.1f}% "
+        f"({documented}/{total} functions, threshold {threshold:.1f}%)"
+    )
+    return "\n".join(lines) + "\n"
+
+
+def to_json(files: List["FileCoverageModel"], threshold: float) -> str:
+    report = {
+        "coverage": round(get_coverage(files), 2),
+        "threshold": threshold,
+        "files": [
+            {
+                "file": f.file_path,
+                "functions": len(f.functions),
+                "documented": f.get_documented_count(),
+                "coverage": round(get_coverage([f]), 2),
+                "undocumented": [
+                    {"name": function.qualified_name, "line": function.start_line}
+                    for function in f.functions
+                    if not function.documented
+                ],
+            }
+            for f in files
+        ],
+    }
+    return json.dumps(report, indent=2) + "\n"
+
+
+def to_junit(files: List["FileCoverageModel"], threshold: float) -> str:
+    total = sum(len(f.functions) for f in files)
+    failures = total - sum(f.get_documented_count() for f in files)
+    suites = ET.Element(
+        "testsuites",
+        name="docmancer",
+        tests=str(total),
+        failures=str(failures),
+    )
+    for f in files:
+        suite = ET.SubElement(
+            suites,
+            "testsuite",
+            name=f.file_path,
+            tests=str(len(f.functions)),
+            failures=str(len(f.functions) - f.get_documented_count()),
+        )
+        for function in f.functions:
+            case = ET.SubElement(
+                suite,
+                "testcase",
+                classname=f.file_path,
+                name=function.qualified_name,
+            )
+            if not function.documented:
+                failure = ET.SubElement(case, "failure", message=RULE_DESCRIPTION)
+                failure.text = f"{f.file_path}:{function.start_line}"
+    return ET.tostring(suites, encoding="unicode") + "\n"
+
+
+def to_sarif(files: List["FileCoverageModel"], threshold: float) -> str:
+    results = [
+        {
+            "ruleId": RULE_ID,
+            "level": "warning",
+            "message": {"text": f"{function.qualified_name} has no docstring"},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": f.file_path},
+                        "region": {"startLine": function.start_line},
+                    }
+                }
+            ],
+        }
+        for f in files
+        for function in f.functions
+        if not function.documented
+    ]
+    report = {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [
+            {
+                "tool": {
+                    "driver": {
+                        "name": "docmancer",
+                        "rules": [
+                            {
+                                "id": RULE_ID,
+                                "shortDescription": {"text": RULE_DESCRIPTION},
+                            }
+                        ],
+                    }
+                },
+                "results": results,
+            }
+        ],
+    }
+    return json.dumps(report, indent=2) + "\n"
+
+
+REPORT_WRITERS = {
+    CheckReportFormat.TEXT.value: to_text,
+    CheckReportFormat.JSON.value: to_json,
+    CheckReportFormat.JUNIT.value: to_junit,
+    CheckReportFormat.SARIF.value: to_sarif,
+}
@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+from docmancer.config import DocmancerConfig
+from docmancer.core.check_report import REPORT_WRITERS, get_coverage
+from docmancer.models.coverage_model import FileCoverageModel, FunctionCoverageModel
+from docmancer.parser.parser_factory import ParserFactory
+import docmancer.utils.file_utils as file_utils
+
+CHECK_CACHE_NAME = "check_cache.json"
+CHECK_CACHE_VERSION = 4
+
+# Below this many uncached files, spawning worker processes costs more
+# than parsing in the current process.
+PARALLEL_PARSE_THRESHOLD = 64
+
+_worker_parser = None
+
+
+def _init_worker(language: str):
+    global _worker_parser
+    _worker_parser = ParserFactory().get_parser(language=language)
+
+
+def _check_file(file_path: str, function_patterns: List[str]) -> FileCoverageModel:
+    coverage = FileCoverageModel(file_path=file_path)
+    func_contexts = _worker_parser.parse(Path(file_path), function_patterns)
+    for func_context in func_contexts or []:
+        context = func_context[0]
+        coverage.functions.append(
+            FunctionCoverageModel(
+                qualified_name=context.qualified_name,
+                start_line=context.start_line,
+                documented=context.docstring is not None,
+            )
+        )
+    coverage.functions.sort(key=lambda function: function.start_line)
+    return coverage
+
+
+# Cache entries hold plain [name, line, documented] rows: decoding tens of
+# thousands of functions through dataclasses_json would dominate warm runs.
+def _to_cache_rows(coverage: FileCoverageModel) -> List[list]:
+    return [
+        [function.qualified_name, function.start_line, function.documented]
+        for function in coverage.functions
+    ]
+
+
+def _from_cache_rows(file_path: str, rows: List[list]) -> FileCoverageModel:
+    return FileCoverageModel(
+        file_path=file_path,
+        functions=[
+            FunctionCoverageModel(
+                qualified_name=name, start_line=line, documented=documented
+            )
+            for name, line, documented in rows
+        ],
+    )
+
+
+class CoverageChecker:
+    """
+    Finds undocumented functions without generating anything.
+
+    Results are cached per file under the project's cache directory, keyed on
+    the file's size and modification time, so only changed files are parsed
+    again. Large batches of changed files are parsed in worker processes.
+    """
+
+    def __init__(
+        self,
+        language: str,
+        function_patterns: List[str],
+        cache_path: Optional[str] = None,
+        workers: Optional[int] = None,
+    ):
+        if ParserFactory().get_parser(language=language) is None:
+            raise ValueError(f"Language '{language}' is not supported by --check.")
+        self._language = language
+        self._function_patterns = function_patterns
+        self._cache_path = cache_path
+        self._workers = workers or os.cpu_count() or 1
+
+    def _load_cache(self) -> Dict[str, dict]:
+        if not self._cache_path or not os.path.isfile(self._cache_path):
+            return {}
+        try:
+            with open(self._cache_path, "r", encoding="utf8") as f:
+                cache = json.load(f)
+        except ValueError:
+            return {}
+        if (
+            cache.get("version") != CHECK_CACHE_VERSION
+            or cache.get("language") != self._language
+            or cache.get("functions") != self._function_patterns
+        ):
+            return {}
+        return cache.get("files", {})
+
+    def _save_cache(self, entries: Dict[str, dict]):
+        if not self._cache_path:
+            return
+        cache = {
+            "version": CHECK_CACHE_VERSION,
+            "language": self._language,
+            "functions": self._function_patterns,
+            "files": entries,
+        }
+        Path(self._cache_path).parent.mkdir(parents=True, exist_ok=True)
+        file_utils.write_file_atomic(
+            self._cache_path, json.dumps(cache).encode("utf8"), sync=False
+        )
+
+    def check(self, file_patterns: List[str]) -> List[FileCoverageModel]:
+        """
+        Returns documentation coverage for every file matching the patterns.
+
+        Args:
+            file_patterns (List[str]): glob patterns of files to check
+
+        Returns:
+            List[FileCoverageModel]: coverage per file, sorted by path
+        """
+        file_paths = sorted(
+            {
+                str(f)
+                for pattern in file_patterns
+                for f in file_utils.get_files_by_pattern(pattern)
+            }
+        )
+        cached = self._load_cache()
+        entries = {}
+        results = {}
+        stale = []
+        for file_path in file_paths:
+            stat = os.stat(file_path)
+            entry = cached.get(file_path)
+            if (
+                entry
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                results[file_path] = _from_cache_rows(file_path, entry["functions"])
+                entries[file_path] = entry
+            else:
+                stale.append((file_path, stat))
+
+        for (file_path, stat), coverage in zip(stale, self._parse(stale)):
+            results[file_path] = coverage
+            entries[file_path] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "functions": _to_cache_rows(coverage),
+            }
+
+        if stale or len(entries) != len(cached):
+            self._save_cache(entries)
+        return [results[file_path] for file_path in file_paths]
+
+    def _parse(self, stale) -> List[FileCoverageModel]:
+        paths = [file_path for file_path, _ in stale]
+        patterns = [self._function_patterns] * len(paths)
+        if len(paths) < PARALLEL_PARSE_THRESHOLD or self._workers < 2:
+            _init_worker(self._language)
+            return list(map(_check_file, paths, patterns))
+        # Imported here since most checks are incremental and never need it
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=_init_worker,
+            initargs=(self._language,),
+        ) as executor:
+            chunksize = max(1, len(paths) // (self._workers * 4))
+            return list(executor.map(_check_file, paths, patterns, chunksize=chunksize))
+
+
+def run_check(settings: DocmancerConfig) -> int:
+    """
+    Runs --check: reports undocumented functions and returns the process exit
+    code, which is non-zero when coverage is below the configured threshold.
+    """
+    checker = CoverageChecker(
+        language=settings.language,
+        function_patterns=settings.functions,
+        cache_path=str(
+            file_utils.get_cache_dir(settings.project_dir) / CHECK_CACHE_NAME
+        ),
+    )
+    files = checker.check(settings.files)
+    report = REPORT_WRITERS[settings.check_format](files, settings.check_threshold)
+    if settings.check_output:
+        with open(settings.check_output, "w", encoding="utf8") as f:
+            f.write(report)
+    else:
+        sys.stdout.write(report)
+
+    coverage = get_coverage(files)
+    if coverage < settings.check_threshold:
+        print(
+            f"Documentation coverage {coverage:.1f}% is below the threshold of "
+            f"{settings.check_threshold:.1f}%",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
@@ -1,8 +1,13 @@
 import argparse
 import os
-import yaml
 from pathlib import Path
-from docmancer.config import DocmancerConfig, EnvVarLoader
+from typing import TYPE_CHECKING
+from docmancer.core.options import (
+    Command,
+    GenerationSchedule,
+    ReplayLatency,
+    ReviewMode,
+)
 from docmancer.core.styles import (
     STYLE_DEFINITIONS,
     CANONICAL_STYLE_NAMES,
@@ -10,12 +15,23 @@ from docmancer.core.styles import (
     DEFAULT_STYLE_NAME,
 )
 from docmancer.core.languages import Languages, CANONICAL_LANGUAGE_NAMES
+from docmancer.core.check_report import CheckReportFormat
+from docmancer.core.sharding import Shard
+
+# The configuration model pulls in dataclasses_json and yaml, which take
+# longer to import than the rest of startup, so it is only imported once
+# the arguments are parsed. `--help` never needs it.
+if TYPE_CHECKING:
+    from docmancer.config import DocmancerConfig
 
 
 def load_config(config_path: str) -> dict:
     """
     Loads and parses a YAML configuration file.
     """
+    import yaml
+    from docmancer.config import EnvVarLoader
+
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
     if not os.path.isfile(config_path):
@@ -60,6 +76,41 @@ def validate_style_case_insensitive(style_string: str) -> str:
         )
 
 
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_shard(shard_string: str) -> str:
+    """
+    Custom type function for argparse that validates a shard such as "3/8".
+    """
+    try:
+        return str(Shard.parse(shard_string))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_duration(duration_string: str) -> float:
+    """
+    Custom type function for argparse that converts a duration such as
+    "90", "45m" or "2h" to seconds.
+    """
+    text = duration_string.strip().lower()
+    multiplier = 1
+    if text and text[-1] in DURATION_UNITS:
+        multiplier = DURATION_UNITS[text[-1]]
+        text = text[:-1]
+    try:
+        seconds = float(text) * multiplier
+    except ValueError:
+        seconds = -1
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(
+            f"Invalid duration '{duration_string}'. "
+            "Use seconds or a number followed by s, m or h (e.g., 90, 45m, 2h)."
+        )
+    return seconds
+
+
 def find_and_load_config(
     start_path: Path, config_file_name: str = ".docmancer.yaml"
 ) -> dict:
@@ -99,13 +150,33 @@ def get_default(config, arg_name, fallback=None):
     )  # Config keys are snake_case
 
 
-def parse_args() -> DocmancerConfig:
+def parse_args() -> "DocmancerConfig":
 
     parser = argparse.ArgumentParser(
         description="Generate documentation from source code.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
 
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=[command.value for command in Command],
+        default=Command.RUN.value,
+        help="'run' generates and writes documentation. 'rollback' restores the files changed by the most recent run. "
+        "'generate' writes documentation to a review file without prompting, 'review' walks that file and writes the accepted "
+        "documentation, and 'apply' writes everything in it that was not rejected. 'merge' combines the review files of "
+        "sharded 'generate' runs and writes them. 'worker' generates summaries for the functions in a --queue. 'watch' "
+        "suggests documentation for undocumented functions as they are edited, in .docmancer/suggestions.jsonl",
+    )
+
+    parser.add_argument(
+        "merge_files",
+        nargs="*",
+        metavar="review_file",
+        default=argparse.SUPPRESS,
+        help="Review files combined by 'merge'",
+    )
+
     # CLI Argument for the configuration file
     parser.add_argument(
         "--config",
@@ -173,6 +244,25 @@ def parse_args() -> DocmancerConfig:
         default=argparse.SUPPRESS,
         help="Returns a message indicating which functions are undocumented",
     )
+    parser.add_argument(
+        "--check-format",
+        type=str,
+        choices=[report_format.value for report_format in CheckReportFormat],
+        default=argparse.SUPPRESS,
+        help="Report format for --check",
+    )
+    parser.add_argument(
+        "--check-output",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="File to write the --check report to instead of stdout",
+    )
+    parser.add_argument(
+        "--check-threshold",
+        type=float,
+        default=argparse.SUPPRESS,
+        help="Minimum documentation coverage percentage. --check exits with an error below it",
+    )
     parser.add_argument(
         "--force-all",
         action="store_true",
@@ -180,6 +270,13 @@ def parse_args() -> DocmancerConfig:
         help="If included, force-approves all generated documention. User will not be prompted to accept/skip/edit/etc..",
     )
 
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Continues the previous run from its journal, reusing generated summaries and review decisions",
+    )
+
     parser.add_argument(
         "--no-summary",
         action="store_true",
@@ -194,6 +291,170 @@ def parse_args() -> DocmancerConfig:
         help="Skips functions that already appear to have a docstring.",
     )
 
+    parser.add_argument(
+        "--schedule",
+        type=str,
+        choices=[schedule.value for schedule in GenerationSchedule],
+        default=argparse.SUPPRESS,
+        help="Order of summary generation. 'dependency' documents called functions first and passes their summaries to callers",
+    )
+
+    parser.add_argument(
+        "--generation-workers",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Number of summaries generated in parallel within a dependency level",
+    )
+
+    parser.add_argument(
+        "--review-lookahead",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Number of summaries generated in the background ahead of the one being reviewed",
+    )
+
+    parser.add_argument(
+        "--review-mode",
+        type=str,
+        choices=[mode.value for mode in ReviewMode],
+        default=argparse.SUPPRESS,
+        help="'single' reviews one function at a time. 'batch' lists each file's functions on one screen, with bulk accept and a single editor session per file",
+    )
+
+    parser.add_argument(
+        "--template-rules",
+        nargs="*",
+        default=argparse.SUPPRESS,
+        help="Trivial function shapes summarized without the model: getter, setter, property, repr, passthrough. Pass no rules to always use the model",
+    )
+
+    parser.add_argument(
+        "--examples",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Adds up to this many of the most similar already documented functions in the project to each prompt as style examples. 0 adds none",
+    )
+
+    parser.add_argument(
+        "--example-tokens",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Token budget for the examples of one prompt. Examples that do not fit are left out",
+    )
+
+    parser.add_argument(
+        "--time-budget",
+        type=parse_duration,
+        default=argparse.SUPPRESS,
+        help="Stops generating new summaries after this long and commits what is done (e.g., 900, 45m, 2h). With the flat schedule, functions are generated in priority order",
+    )
+
+    parser.add_argument(
+        "--max-functions",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Stops generating new summaries after this many and commits what is done. With the flat schedule, functions are generated in priority order",
+    )
+
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Records per-stage timings, model latency, token counts and cache hits and writes them to .docmancer/metrics.json at the end of the run",
+    )
+
+    parser.add_argument(
+        "--metrics-output",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="File to write the JSON run report to. Implies --metrics",
+    )
+
+    parser.add_argument(
+        "--metrics-textfile",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="File to write run metrics to in the Prometheus text format, e.g. for the node exporter's textfile collector. Implies --metrics",
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="Writes a timeline of the run to this file in the Chrome Trace Event format, for chrome://tracing or ui.perfetto.dev",
+    )
+
+    parser.add_argument(
+        "--record-cassette",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="Records every model response with its latency to this file, for replaying the run later with --replay-cassette",
+    )
+
+    parser.add_argument(
+        "--replay-cassette",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="Serves model responses from a file written by --record-cassette instead of loading a model",
+    )
+
+    parser.add_argument(
+        "--replay-latency",
+        type=str,
+        choices=[latency.value for latency in ReplayLatency],
+        default=argparse.SUPPRESS,
+        help="Whether replayed responses are returned immediately or after their recorded latency",
+    )
+
+    parser.add_argument(
+        "--out",
+        "--review-file",
+        dest="review_file",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="Review file written by 'generate', 'merge' and 'watch' and read by 'review' and 'apply'. Defaults to "
+        ".docmancer/review.jsonl, or .docmancer/suggestions.jsonl for 'watch'",
+    )
+
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=argparse.SUPPRESS,
+        help="SQLite database, e.g. on a shared filesystem, that functions are sent to for 'docmancer worker' processes "
+        "to summarize. 'worker' reads functions from it",
+    )
+
+    parser.add_argument(
+        "--lease-timeout",
+        type=parse_duration,
+        default=argparse.SUPPRESS,
+        help="How long a worker holds a queued function without renewing its lease before the function is given to "
+        "another worker (e.g., 300, 5m)",
+    )
+
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=argparse.SUPPRESS,
+        help="Times a queued function is leased to a worker before it is given up",
+    )
+
+    parser.add_argument(
+        "--debounce",
+        type=parse_duration,
+        default=argparse.SUPPRESS,
+        dest="watch_debounce",
+        help="How long 'watch' waits after a file is saved for other saves before parsing it (e.g., 0.3)",
+    )
+
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=argparse.SUPPRESS,
+        help="Documents only one of N disjoint parts of the project, e.g. 3/8, so a run can be split over N machines. "
+        "Files are assigned by a hash of their path. Combine the review files of 'generate --shard' runs with 'merge'",
+    )
+
     parser.add_argument(
         "--model-type",
         type=str,
@@ -219,6 +480,10 @@ def parse_args() -> DocmancerConfig:
     # Parse arguments after defaults are set
     args = parser.parse_args()
     app_config = vars(args)
+    if app_config.get("merge_files") and args.command != Command.MERGE.value:
+        parser.error("Review files can only be given to 'merge'.")
+
+    from docmancer.config import DocmancerConfig
 
     # Dictionary representation of defaults
     config = DocmancerConfig().to_dict()
@@ -290,6 +555,14 @@ def parse_args() -> DocmancerConfig:
     # update config with args
     config.update(app_config)
 
+    if (
+        config.get("queue")
+        and config.get("schedule") == GenerationSchedule.DEPENDENCY.value
+    ):
+        parser.error("--queue cannot be combined with the dependency schedule.")
+    if args.command == Command.WORKER.value and not config.get("queue"):
+        parser.error("'worker' needs the --queue to read functions from.")
+
     # TODO: if no core function like generate, check, etc.. is given, throw an error
 
     return DocmancerConfig.from_dict(config)
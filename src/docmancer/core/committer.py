@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from docmancer.core.rollback import RollbackJournal
+from docmancer.models.documentation_model import DocumentationModel
+from docmancer.utils.file_buffer import FileBuffer
+import docmancer.utils.file_utils as file_utils
+
+
+class FileCommitter:
+    """
+    Writes documented files back to disk. Safe to call from several threads.
+
+    Each file is checked against the hash recorded when it was read, backed
+    up to the rollback journal, and replaced atomically in its original
+    encoding and line ending style. Directory entries are synced once per
+    directory in `finish` rather than after every rename.
+    """
+
+    def __init__(self, rollback_journal: Optional[RollbackJournal] = None):
+        self._rollback_journal = rollback_journal
+        self._lock = threading.Lock()
+        self._directories = set()
+        self._first_start = None
+        self._last_end = None
+        self.files_committed = 0
+
+    def write(self, file_path, lines: List[str], file_buffer: FileBuffer) -> str:
+        """
+        Replaces a file's content with `lines`.
+
+        Args:
+            file_path: path of the file to write
+            lines (List[str]): new content, with "\\n" line endings
+            file_buffer (FileBuffer): buffer the new content was derived from
+
+        Returns:
+            str: sha256 of the written content
+
+        Raises:
+            ValueError: If the file changed after it was read into the buffer.
+        """
+        start = time.perf_counter()
+        with open(file_path, "rb") as f:
+            original = f.read()
+        if file_buffer.hash and hashlib.sha256(original).hexdigest() != (
+            file_buffer.hash
+        ):
+            raise ValueError(
+                f"{file_path} changed since it was parsed. Its documentation was not written."
+            )
+
+        content = file_buffer.encode(lines)
+        new_hash = hashlib.sha256(content).hexdigest()
+        if self._rollback_journal is not None:
+            self._rollback_journal.record(file_path, original, new_hash)
+        file_utils.write_file_atomic(file_path, content)
+
+        end = time.perf_counter()
+        with self._lock:
+            self._directories.add(Path(file_path).absolute().parent)
+            self.files_committed += 1
+            if self._first_start is None:
+                self._first_start = start
+            self._last_end = end
+        return new_hash
+
+    def write_docs(
+        self,
+        file_path,
+        docs: List[DocumentationModel],
+        file_buffer: Optional[FileBuffer] = None,
+    ) -> str:
+        """
+        Inserts formatted docs into a file and writes it atomically.
+
+        Returns:
+            str: sha256 of the file's new content
+        """
+        # Use the buffer the docs were formatted against, or read the file
+        if file_buffer is None:
+            file_buffer = FileBuffer.read(file_path)
+
+        # Insert every doc below its start line in a single pass
+        insertions = [
+            (
+                doc.start_line,
+                [
+                    " " * doc.offset_spaces + doc_line
+                    for doc_line in doc.formatted_documentation
+                ],
+            )
+            for doc in docs
+        ]
+        return self.write(
+            file_path, file_buffer.with_insertions(insertions), file_buffer
+        )
+
+    def finish(self):
+        """Syncs the directories of written files and closes the rollback journal."""
+        with self._lock:
+            directories, self._directories = self._directories, set()
+        for directory in directories:
+            file_utils.sync_directory(directory)
+        if self._rollback_journal is not None:
+            self._rollback_journal.close()
+
+    def get_throughput(self) -> float:
+        """Returns committed files per second between the first and last write."""
+        if not self.files_committed:
+            return 0.0
+        elapsed = max(self._last_end - self._first_start, 1e-9)
+        return self.files_committed / elapsed
+
+    def get_elapsed(self) -> float:
+        if not self.files_committed:
+            return 0.0
+        return self._last_end - self._first_start
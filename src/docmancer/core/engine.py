@@ -1,13 +1,45 @@
-from typing import List
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from docmancer.parser.base_parser import BaseParser
-from docmancer.generator.llm.llm_agent_factory import LLMAgentFactory
 from docmancer.models.function_summary import FunctionSummaryModel
 from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.dependency_scheduler import DependencyScheduler
+from docmancer.generator.priority import get_priority_order
+from docmancer.models.work_item import WorkItemModel
+from docmancer.core.pipeline import Pipeline, Stage
 from docmancer.formatter.formatter_base import FormatterBase
 from docmancer.core.presenter import Presenter, UserResponse
 from docmancer.models.documentation_model import DocumentationModel
-from docmancer.config import DocmancerConfig
+from docmancer.config import Command, DocmancerConfig, GenerationSchedule, ReviewMode
+from docmancer.core.run_journal import RunJournal, JournalState, JOURNAL_FILE_NAME
+from docmancer.utils.file_buffer import FileBuffer, FileBufferCache
 import docmancer.utils.file_utils as file_utils
+import docmancer.utils.hash_utils as hash_utils
+from docmancer.core.committer import FileCommitter
+from docmancer.core.rollback import RollbackJournal
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder, write_reports
+from docmancer.core.tracing import NULL_TRACER, Tracer
+from docmancer.core.progress import NULL_PROGRESS, ProgressTracker
+from docmancer.core.functional_context_database import FunctionalContextDatabase
+from docmancer.core.work_queue import (
+    COLLECT_SECONDS,
+    ENQUEUE_BATCH_SIZE,
+    JobStatus,
+    WorkQueue,
+)
+from docmancer.core.review_file import (
+    ReviewEntry,
+    ReviewFileWriter,
+    get_review_file_path,
+)
+from docmancer.core.run_budget import (
+    RunBudget,
+    get_deferred_path,
+    load_deferred,
+    save_deferred,
+)
 
 
 class DocumentationBuilderEngine:
@@ -17,109 +49,753 @@ class DocumentationBuilderEngine:
         parser: BaseParser,
         presenter: Presenter,
         formatter: FormatterBase,
+        metrics: MetricsRecorder = NULL_METRICS,
+        tracer: Tracer = NULL_TRACER,
+        progress: ProgressTracker = NULL_PROGRESS,
     ):
         self._generator = generator
         self._parser = parser
         self._presenter = presenter
         self._formatter = formatter
+        self._metrics = metrics
+        self._tracer = tracer
+        self._progress = progress
+        self._committer = FileCommitter()
 
     def run(self, settings: DocmancerConfig):
-        errors = []
+        """
+        Runs the documentation pipeline:
+        discover -> parse -> generate -> format -> review -> commit.
 
-        # Step 1. parse all files/functions into {file_path: List[function]} map
-        file_contexts = {}
-        for file_pattern in settings.files:
-            files = file_utils.get_files_by_pattern(file_pattern)
-            for f in files:
-                func_contexts = self._parser.parse(f, settings.functions)
-                file_contexts[f] = func_contexts
+        Stages are connected by bounded queues so memory use depends on the
+        queue size rather than the size of the project, and each file is
+        committed as soon as all of its functions have been reviewed.
+
+        The `generate` command writes the formatted documentation to a review
+        file instead of reviewing and committing it. With a work queue,
+        summaries are generated by `docmancer worker` processes.
+        """
+        self._quit = False
+        budget = RunBudget(
+            time_budget=settings.time_budget, max_functions=settings.max_functions
+        )
+        deferred: List[Tuple[str, str]] = []
+        journal = RunJournal(
+            file_utils.get_cache_dir(settings.project_dir) / JOURNAL_FILE_NAME
+        )
+        journal_state = journal.open(resume=settings.resume)
+        review_writer = None
+        if settings.command == Command.GENERATE.value:
+            shard = settings.get_shard()
+            review_writer = ReviewFileWriter(
+                get_review_file_path(settings.project_dir, settings.review_file, shard),
+                shard=shard,
+            )
+            review_writer.open()
+            self._committer = FileCommitter()
+        else:
+            self._committer = FileCommitter(
+                RollbackJournal.for_new_run(settings.project_dir)
+            )
+        buffer_cache = FileBufferCache()
+        index = FunctionalContextDatabase.for_project(settings.project_dir)
+        queue = None
+        if settings.queue:
+            queue = WorkQueue(
+                settings.queue,
+                lease_seconds=settings.lease_timeout,
+                max_attempts=settings.max_attempts,
+            )
+            queue.start_run()
+        pipeline = self.build_pipeline(
+            settings,
+            journal,
+            journal_state,
+            budget=budget,
+            deferred=deferred,
+            buffer_cache=buffer_cache,
+            review_writer=review_writer,
+            index=index,
+            queue=queue,
+        )
+        try:
+            # Interactive review owns the terminal, so the live view is only
+            # shown when nothing needs reviewing
+            if settings.force_all or review_writer is not None:
+                with self._presenter.show_progress(self._progress):
+                    pipeline.run(settings.files)
+            else:
+                pipeline.run(settings.files)
+        finally:
+            with self._metrics.time("commit_finish_seconds"):
+                self._committer.finish()
+            journal.close()
+            index.close()
+            if queue is not None:
+                queue.close_run()
+                queue.close()
+            if review_writer is not None:
+                review_writer.close()
+            # A quit run did not finish the previous run's deferred functions
+            if deferred or not self._quit:
+                save_deferred(settings.project_dir, deferred)
+            # Written even if the run failed, since that is when it is most useful
+            if self._tracer.enabled and settings.trace:
+                try:
+                    self._tracer.write(settings.trace)
+                except OSError as e:
+                    self._presenter.print_error(f"Unable to write trace: {e}")
+        metrics_path = None
+        if self._metrics.enabled:
+            metrics_path = self._write_metrics(
+                settings, pipeline, buffer_cache, len(deferred)
+            )
+
+        if deferred:
+            self._presenter.print_message(
+                f"Generation budget used up after {budget.dispatched} functions. "
+                f"{len(deferred)} functions were deferred to the next run and are "
+                f"listed in {get_deferred_path(settings.project_dir)}"
+            )
+
+        if self._quit:
+            self._presenter.print_message(
+                "Progress was saved. Run again with --resume to continue."
+            )
+            if metrics_path:
+                self._presenter.print_message(f"Run metrics written to {metrics_path}")
+            self._print_trace_path(settings)
+            return
+
+        # TODO: Implement better error notification system
+        errors = pipeline.errors
+        if len(errors) > 0:
+            for e in errors:
+                self._presenter.print_error(f"Error: {e}")
+        else:
+            self._presenter.clear_console()
+            self._presenter.print_success("Documentation Generation Complete")
+        if review_writer is not None:
+            self._presenter.print_message(
+                f"Wrote {review_writer.count} functions to {review_writer.path}. "
+                "Run `docmancer review` or `docmancer apply` to write them."
+            )
+        if not settings.no_summary:
+            self._presenter.print_message(
+                f"Estimated prompt tokens: {self._generator.prompt_tokens}"
+            )
+            stats = self._generator.repair_stats
+            if stats.repaired or stats.reprompted or stats.failed:
+                self._presenter.print_message(
+                    f"Model responses: {stats.valid} valid, {stats.repaired} "
+                    f"repaired locally, {stats.reprompted} re-prompted "
+                    f"({stats.reprompt_fixed} fixed), {stats.failed} failed"
+                )
+            template_counts = self._generator.template_counts
+            if template_counts:
+                self._presenter.print_message(
+                    f"Model calls avoided with templates: "
+                    f"{sum(template_counts.values())} ("
+                    + ", ".join(
+                        f"{rule}: {count}"
+                        for rule, count in sorted(template_counts.items())
+                    )
+                    + ")"
+                )
+            for route, agent_name, route_stats in self._generator.router.get_summary():
+                self._presenter.print_message(
+                    f"Route {route.value} ({agent_name}): "
+                    f"{route_stats.functions} functions, "
+                    f"{route_stats.requests} requests, "
+                    f"{route_stats.get_mean_latency():.2f}s mean latency, "
+                    f"{route_stats.escalations} escalated"
+                )
+            for name, compaction in self._generator.compactions:
+                self._presenter.print_message(
+                    f"Compacted {name}: {compaction.original_tokens} -> "
+                    f"{compaction.tokens} tokens "
+                    f"({compaction.get_reduction():.0%} smaller, "
+                    f"{', '.join(compaction.steps)})"
+                )
+        if self._committer.files_committed:
+            self._presenter.print_message(
+                f"Committed {self._committer.files_committed} files in "
+                f"{self._committer.get_elapsed():.3f}s "
+                f"({self._committer.get_throughput():.1f} files/sec)"
+            )
+        if metrics_path:
+            self._presenter.print_message(f"Run metrics written to {metrics_path}")
+        self._print_trace_path(settings)
 
-        # TODO: implement display message for all function context models that dont
-        # have existing docstrings. Make sure existing docstrings are parsed depending on language and style(?)
-        # if settings.check:
-        #     self._presenter.display_message()
+    def _print_trace_path(self, settings: DocmancerConfig):
+        if not self._tracer.enabled or not settings.trace:
+            return
+        message = f"Trace written to {settings.trace}"
+        if self._tracer.dropped:
+            message += f" ({self._tracer.dropped} events dropped after the limit)"
+        self._presenter.print_message(message)
 
-        # Loop through function context and get formatted docs
-        doc_model_database = {}
-        for file_path, func_contexts in file_contexts.items():
+    def _write_metrics(
+        self,
+        settings: DocmancerConfig,
+        pipeline: Pipeline,
+        buffer_cache: FileBufferCache,
+        deferred: int,
+    ) -> Path:
+        """
+        Adds the run's totals to the metrics and writes the JSON report and
+        Prometheus textfile.
+
+        Returns:
+            Path: where the JSON report was written
+        """
+        metrics = self._metrics
+        metrics.add("errors", len(pipeline.errors))
+        metrics.add("deferred_functions", deferred)
+        metrics.add("cache_hits", buffer_cache.hits, cache="file_buffer")
+        metrics.add("cache_misses", buffer_cache.misses, cache="file_buffer")
+        stats = self._generator.repair_stats
+        for result in ("valid", "repaired", "reprompted", "reprompt_fixed", "failed"):
+            metrics.add("model_responses", getattr(stats, result), result=result)
+        for rule, count in self._generator.template_counts.items():
+            metrics.add("template_summaries", count, rule=rule)
+        metrics.add("compacted_prompts", len(self._generator.compactions))
+        metrics.add("files_committed", self._committer.files_committed)
+
+        # Exact token counts are only known for streamed local completions
+        decode_seconds = metrics.get_histogram_sum("decode_seconds")
+        if decode_seconds:
+            metrics.set(
+                "completion_tokens_per_second",
+                metrics.get_counter("completion_tokens") / decode_seconds,
+            )
+        for route, agent_name, route_stats in self._generator.router.get_summary():
+            response_tokens = metrics.get_counter("response_tokens", route=route.value)
+            if route_stats.seconds:
+                metrics.set(
+                    "response_tokens_per_second",
+                    response_tokens / route_stats.seconds,
+                    route=route.value,
+                    agent=agent_name,
+                )
+        if self._committer.files_committed:
+            metrics.set("commit_files_per_second", self._committer.get_throughput())
+
+        return write_reports(
+            metrics,
+            settings.project_dir,
+            settings.metrics_output,
+            settings.metrics_textfile,
+        )
+
+    def build_pipeline(
+        self,
+        settings: DocmancerConfig,
+        journal: RunJournal,
+        journal_state: JournalState,
+        budget: Optional[RunBudget] = None,
+        deferred: Optional[List[Tuple[str, str]]] = None,
+        buffer_cache: Optional[FileBufferCache] = None,
+        review_writer: Optional[ReviewFileWriter] = None,
+        index: Optional[FunctionalContextDatabase] = None,
+        queue: Optional[WorkQueue] = None,
+    ) -> Pipeline:
+        budget = budget or RunBudget()
+        deferred = deferred if deferred is not None else []
+        buffer_cache = buffer_cache or FileBufferCache()
+        metrics = self._metrics
+        tracer = self._tracer
+        progress = self._progress
+        # Queue workers see one function at a time, so callee summaries
+        # cannot be passed to callers
+        dependency_order = (
+            not settings.no_summary
+            and queue is None
+            and settings.schedule == GenerationSchedule.DEPENDENCY.value
+        )
+        # A budgeted run may stop early, so it should spend the budget on the
+        # most valuable functions rather than on whatever was parsed first
+        priority_order = not dependency_order and (
+            settings.schedule == GenerationSchedule.PRIORITY.value
+            or (settings.schedule == GenerationSchedule.FLAT.value and budget.limited)
+        )
+        # A file's functions are only indexed when all of them were parsed
+        index_parsed = index is not None and "*" in settings.functions
+        examples = self._generator.examples
+        seen_files = set()
+        file_results: Dict[Path, List[WorkItemModel]] = {}
+        results_lock = threading.Lock()
+
+        shard = settings.get_shard()
+
+        def discover(file_pattern: str, emit):
+            with tracer.span("discover", pattern=file_pattern):
+                files = file_utils.get_files_by_pattern(file_pattern)
+            for f in files:
+                if f in seen_files:
+                    continue
+                seen_files.add(f)
+                if shard is None or shard.contains(f, settings.project_dir):
+                    emit(f)
+
+        def parse(file_path: Path, emit):
+            # Reading the buffer now records the hash that commit verifies
+            file_buffer = buffer_cache.get(file_path)
+            committed_hash = journal_state.committed_files.get(str(file_path))
+            if committed_hash and committed_hash == file_buffer.hash:
+                buffer_cache.evict(file_path)
+                metrics.add("cache_hits", cache="journal_file")
+                return  # Finished by the run being resumed
+            with metrics.time("parse_seconds"), tracer.span(
+                "parse", file=str(file_path)
+            ):
+                func_contexts = self._parser.parse(file_path, settings.functions)
+            if func_contexts is None:
+                metrics.add("parse_errors")
+                raise ValueError(f"Unable to parse {file_path}")
+            metrics.add("functions_parsed", len(func_contexts))
+            if examples is not None:
+                for func_context in func_contexts:
+                    examples.add(file_path, func_context[0])
+            if index_parsed:
+                index.index_file(
+                    file_path,
+                    [func_context[0] for func_context in func_contexts],
+                    file_buffer.hash,
+                )
+            progress.add(len(func_contexts))
             for func_context in func_contexts:
+                emit(
+                    WorkItemModel(
+                        file_path=file_path,
+                        context=func_context[0],
+                        file_total=len(func_contexts),
+                        fingerprint=hash_utils.get_function_fingerprint(
+                            func_context[0]
+                        ),
+                    )
+                )
+
+        # Bounds how far generation runs ahead of interactive review. A permit
+        # is taken before generating a summary and returned once it is reviewed,
+        # so the item on screen plus `review_lookahead` more can be in progress.
+        batch_review = settings.review_mode == ReviewMode.BATCH.value
+        # Batch review holds a whole file's items, which may be more than
+        # the lookahead, so it is not limited by it
+        lookahead = None
+        if (
+            not settings.force_all
+            and not dependency_order
+            and queue is None
+            and review_writer is None
+            and not batch_review
+        ):
+            lookahead = threading.BoundedSemaphore(
+                max(0, settings.review_lookahead) + 1
+            )
+
+        def record_generated(item: WorkItemModel):
+            journal.record_generated(item.get_key(), item.summary)
+            if index is not None:
+                index.record_summary(
+                    item.file_path,
+                    item.context.qualified_name,
+                    item.fingerprint,
+                    item.summary,
+                )
+
+        def generate(item: WorkItemModel, emit):
+            if lookahead is not None:
+                with tracer.span("review lookahead wait"):
+                    while not lookahead.acquire(timeout=0.1):
+                        if pipeline.cancelled:
+                            return
+            # Past the cancellation check the item is always passed on, even
+            # if this raises, and the review stage releases its permit
+            passed_on = False
+            try:
+                if pipeline.cancelled:
+                    return
+                passed_on = True
+                generate_item(item, emit)
+            finally:
+                if lookahead is not None and not passed_on:
+                    lookahead.release()
 
-                # Step 2. Convert function contexts to Documention Models
+        def generate_item(item: WorkItemModel, emit):
+            item.summary = journal_state.summaries.get(item.get_key())
+            if item.summary is not None:
+                metrics.add("cache_hits", cache="journal_summary")
+                progress.skip()
+            elif not try_acquire_budget(item):
+                emit(item)
+                return
+            if item.summary is None:
                 try:
                     if settings.no_summary:
-                        summary = self._generator.get_default_summary(func_context[0])
+                        progress.skip()
+                        item.summary = self._generator.get_default_summary(item.context)
                     else:
-                        summary = self._generator.generate_summary(func_context[0])
+                        item.summary = self._generator.generate_summary(item.context)
+                        if item.summary is None:
+                            pipeline.errors.append(
+                                RuntimeError(
+                                    "No summary could be read for "
+                                    f"{item.context.qualified_name}"
+                                )
+                            )
                 except Exception as e:
-                    errors.append(e)
-                    continue
+                    pipeline.errors.append(e)
+                if item.summary is not None:
+                    record_generated(item)
+            emit(item)
+
+        # Items sent to the queue by job id, and those waiting to be sent
+        queued: Dict[int, WorkItemModel] = {}
+        to_enqueue: List[WorkItemModel] = []
+
+        def enqueue(item: WorkItemModel, emit):
+            item.summary = journal_state.summaries.get(item.get_key())
+            if item.summary is not None:
+                metrics.add("cache_hits", cache="journal_summary")
+                progress.skip()
+                emit(item)
+                return
+            if not try_acquire_budget(item):
+                emit(item)
+                return
+            if settings.no_summary:
+                progress.skip()
+                item.summary = self._generator.get_default_summary(item.context)
+                emit(item)
+                return
+            to_enqueue.append(item)
+            if len(to_enqueue) >= ENQUEUE_BATCH_SIZE:
+                send_queued()
+            emit_collected(emit)
 
-                # Step 3. Convert function summary to formatted documentation
-                doc = self._formatter.get_formatted_documentation(
-                    func_context=func_context[0],
-                    func_summary=summary,
-                    file_path=file_path,
+        def send_queued():
+            if not to_enqueue:
+                return
+            with tracer.span("enqueue", functions=len(to_enqueue)):
+                # Examples are chosen here so workers prompt with the same
+                # examples as a local run would
+                job_ids = queue.enqueue(
+                    [
+                        (
+                            item.context,
+                            (
+                                None
+                                if examples is None
+                                else examples.get_examples(item.context)
+                            ),
+                        )
+                        for item in to_enqueue
+                    ]
                 )
+            queued.update(zip(job_ids, to_enqueue))
+            to_enqueue.clear()
 
-                if file_path in doc_model_database:
-                    doc_model_database[file_path].append(doc)
+        def emit_collected(emit):
+            for result in queue.collect():
+                item = queued.pop(result.id, None)
+                if item is None:
+                    continue
+                item.summary = result.summary
+                progress.start(item.context.qualified_name)
+                progress.finish(failed=result.summary is None)
+                status = JobStatus.FAILED if result.summary is None else JobStatus.DONE
+                metrics.add("queue_results", status=status.value)
+                metrics.add("queue_retries", result.attempts - 1)
+                if result.summary is None:
+                    pipeline.errors.append(
+                        RuntimeError(
+                            f"No summary for {item.context.qualified_name} after "
+                            f"{result.attempts} attempts: {result.error}"
+                        )
+                    )
                 else:
-                    doc_model_database[file_path] = [doc]
-
-        # Step 4. Present the user with generated docs and get approval if "force-all" is not present
-        if not settings.force_all:
-            for file_path, doc_models in doc_model_database.copy().items():
-                approved_docs = []
-                while doc_models:
-                    doc = doc_models.pop()
-                    approval_response = self._presenter.get_user_approval(doc)
+                    record_generated(item)
+                emit(item)
+
+        def collect_queued(emit):
+            send_queued()
+            with tracer.span("queue wait", functions=len(queued)):
+                while queued and not pipeline.cancelled:
+                    emit_collected(emit)
+                    if queued:
+                        time.sleep(COLLECT_SECONDS)
+
+        def format(item: WorkItemModel, emit):
+            try:
+                if item.summary is not None:
+                    with tracer.span("format", function=item.context.qualified_name):
+                        item.doc = self._formatter.get_formatted_documentation(
+                            func_context=item.context,
+                            func_summary=item.summary,
+                            file_path=item.file_path,
+                            file_buffer=buffer_cache.get(item.file_path),
+                        )
+            except Exception as e:
+                pipeline.errors.append(e)
+            emit(item)
+
+        def review_without_prompt(item: WorkItemModel) -> bool:
+            """Decides items that need no reviewer, returning whether it did."""
+            decision = journal_state.reviews.get(item.get_key())
+            if item.doc is None:
+                return True
+            if decision is not None:
+                item.approved = decision.approved
+                item.doc.formatted_documentation = decision.formatted_documentation
+                metrics.add("cache_hits", cache="journal_review")
+                return True
+            if settings.force_all:
+                record_review(item, True)
+                return True
+            return False
+
+        def record_review(item: WorkItemModel, approved: bool):
+            item.approved = approved
+            journal.record_reviewed(
+                item.get_key(), approved, item.doc.formatted_documentation
+            )
+
+        def quit_run():
+            self._quit = True
+            pipeline.cancel()
+            self._generator.cancel()
+
+        def review(item: WorkItemModel, emit):
+            try:
+                if not review_without_prompt(item):
+                    start = time.perf_counter()
+                    with tracer.span(
+                        "review wait", function=item.context.qualified_name
+                    ):
+                        approval_response = self._presenter.get_user_approval(item.doc)
                     if approval_response.response == UserResponse.QUIT:
+                        quit_run()
                         return
-                    if approval_response.response == UserResponse.SKIP:
-                        continue
-                    if approval_response.response == UserResponse.ACCEPT:
-                        approved_docs.append(doc)
-                doc_model_database[file_path] = approved_docs
+                    metrics.observe("review_seconds", time.perf_counter() - start)
+                    metrics.add(
+                        "reviews", decision=approval_response.response.name.lower()
+                    )
+                    record_review(
+                        item, approval_response.response == UserResponse.ACCEPT
+                    )
+            except Exception as e:
+                # Emitted anyway, so the file's other accepted docs are written
+                pipeline.errors.append(e)
+                item.approved = False
+            finally:
+                if lookahead is not None:
+                    lookahead.release()
+            emit(item)
+
+        review_batches: Dict[Path, List[WorkItemModel]] = {}
 
-        # Step 5. Commit formatted docs to files and save
-        for file_path, doc_models in doc_model_database.items():
-            if len(doc_models) > 0:
+        def review_file(item: WorkItemModel, emit):
+            # Runs in one worker, so the batches need no lock
+            items = review_batches.setdefault(item.file_path, [])
+            items.append(item)
+            if len(items) < item.file_total:
+                return
+            del review_batches[item.file_path]
+            to_review = [item for item in items if not review_without_prompt(item)]
+            if to_review:
+                start = time.perf_counter()
                 try:
-                    self.commit(file_path=file_path, docs=doc_models)
+                    with tracer.span(
+                        "review wait",
+                        file=str(item.file_path),
+                        functions=len(to_review),
+                    ):
+                        responses = self._presenter.review_batch(
+                            str(item.file_path), [item.doc for item in to_review]
+                        )
                 except Exception as e:
-                    errors.append(e)
+                    # The file's docs already decided are still written
+                    pipeline.errors.append(e)
+                    for reviewed in to_review:
+                        reviewed.approved = False
+                    responses = []
+                # Reviewer time per function is the file's time spread evenly
+                seconds = (time.perf_counter() - start) / len(to_review)
+                quit = False
+                for reviewed, response in zip(to_review, responses):
+                    if response.response == UserResponse.QUIT:
+                        quit = True
+                        continue
+                    metrics.observe("review_seconds", seconds)
+                    metrics.add("reviews", decision=response.response.name.lower())
+                    # Kept for --resume even if the reviewer quit
+                    record_review(reviewed, response.response == UserResponse.ACCEPT)
+                if quit:
+                    quit_run()
+                    return
+            for reviewed in items:
+                emit(reviewed)
 
-        # TODO: Implement better error notification system
-        if len(errors) > 0:
-            for e in errors:
-                self._presenter.print_error(f"Error: {e}")
-        else:
-            self._presenter.clear_console()
-            self._presenter.print_success("Documentation Generation Complete")
+        def commit(item: WorkItemModel, emit):
+            with results_lock:
+                results = file_results.setdefault(item.file_path, [])
+                results.append(item)
+                if len(results) < item.file_total:
+                    return
+                del file_results[item.file_path]
+            docs = [result.doc for result in results if result.approved]
+            file_buffer = buffer_cache.get(item.file_path)
+            buffer_cache.evict(item.file_path)
+            file_hash = file_buffer.hash
+            if len(docs) > 0:
+                with metrics.time("commit_seconds"), tracer.span(
+                    "commit", file=str(item.file_path)
+                ):
+                    file_hash = self.commit(
+                        file_path=item.file_path, docs=docs, file_buffer=file_buffer
+                    )
+            journal.record_committed(str(item.file_path), file_hash)
 
-    def commit(self, file_path: str, docs: List[DocumentationModel]):
+        def write_review(item: WorkItemModel, emit):
+            if item.doc is not None:
+                review_writer.write(
+                    ReviewEntry(
+                        fingerprint=item.fingerprint,
+                        doc=item.doc,
+                        docstring=item.context.docstring,
+                    )
+                )
 
-        # Sort docs by start_line and write to files
-        # Read the file into memory
-        with open(file_path, "r") as f:
-            lines = f.readlines()
+        buffered_items: List[WorkItemModel] = []
 
-        # Sort insertions by line number (ascending)
-        docs.sort(key=lambda x: x.start_line)
+        def buffer(item: WorkItemModel, emit):
+            buffered_items.append(item)
 
-        offset = 0
-        for doc in docs:
-            adjusted_line = doc.start_line + offset
-            indented_documentation = [
-                " " * doc.offset_spaces + doc_line
-                for doc_line in doc.formatted_documentation
-            ]
-            lines[adjusted_line:adjusted_line] = [
-                line for line in indented_documentation
+        def try_acquire_budget(item: WorkItemModel) -> bool:
+            if budget.try_acquire():
+                return True
+            progress.skip()
+            deferred.append((str(item.file_path), item.context.qualified_name))
+            return False
+
+        def emit_after_parsing(emit):
+            for item in buffered_items:
+                emit(item)
+
+        def emit_in_priority_order(emit):
+            # Scoring needs callers from every file, so parsing has to finish
+            previously_deferred = load_deferred(settings.project_dir)
+            with tracer.span("prioritize", functions=len(buffered_items)):
+                order = get_priority_order(
+                    [(item.file_path, item.context) for item in buffered_items],
+                    deferred=previously_deferred,
+                )
+            for idx in order:
+                emit(buffered_items[idx])
+
+        def generate_in_dependency_order(emit):
+            # The call graph spans the whole project, so this mode has to wait
+            # for parsing to finish before the first summary is generated.
+            known_summaries = {}
+            for idx, item in enumerate(buffered_items):
+                if item.get_key() in journal_state.summaries:
+                    known_summaries[idx] = journal_state.summaries[item.get_key()]
+            metrics.add("cache_hits", len(known_summaries), cache="journal_summary")
+            progress.skip(len(known_summaries))
+
+            def on_summary(idx: int, summary: FunctionSummaryModel):
+                item = buffered_items[idx]
+                item.summary = summary
+                if summary is not None and idx not in known_summaries:
+                    record_generated(item)
+                emit(item)
+
+            scheduler = DependencyScheduler(
+                generator=self._generator, max_workers=settings.generation_workers
+            )
+            scheduler.generate(
+                [(item.file_path, item.context) for item in buffered_items],
+                pipeline.errors,
+                on_summary=on_summary,
+                known_summaries=known_summaries,
+                should_generate=lambda idx: try_acquire_budget(buffered_items[idx]),
+            )
+
+        if queue is not None:
+            generate_stage = Stage(
+                "generate",
+                enqueue,
+                on_finish=collect_queued,
+                cancellable=True,
+            )
+        elif dependency_order:
+            generate_stage = Stage(
+                "generate",
+                buffer,
+                on_finish=generate_in_dependency_order,
+                cancellable=True,
+            )
+        else:
+            generate_stage = Stage(
+                "generate",
+                generate,
+                workers=settings.generation_workers,
+                cancellable=True,
+                emit_on_error=True,
+            )
+
+        pipeline_settings = settings.pipeline
+        stages = [
+            Stage("discover", discover),
+            Stage("parse", parse, workers=pipeline_settings.parse_workers),
+        ]
+        if priority_order:
+            stages.append(
+                Stage(
+                    "prioritize",
+                    buffer,
+                    on_finish=emit_in_priority_order,
+                    cancellable=True,
+                )
+            )
+        elif examples is not None and not dependency_order:
+            # Every documented function is indexed before the first prompt, so
+            # the examples chosen do not depend on how far parsing had got
+            stages.append(
+                Stage(
+                    "index examples",
+                    buffer,
+                    on_finish=emit_after_parsing,
+                    cancellable=True,
+                )
+            )
+        stages += [
+            generate_stage,
+            Stage("format", format, workers=pipeline_settings.format_workers),
+        ]
+        if review_writer is not None:
+            stages.append(Stage("write review", write_review))
+        else:
+            stages += [
+                Stage("review", review_file if batch_review else review),
+                Stage("commit", commit, workers=pipeline_settings.commit_workers),
             ]
+        pipeline = Pipeline(
+            stages, queue_size=pipeline_settings.queue_size, metrics=metrics
+        )
+        return pipeline
 
-            offset += len(doc.formatted_documentation)
+    def commit(
+        self,
+        file_path: str,
+        docs: List[DocumentationModel],
+        file_buffer: Optional[FileBuffer] = None,
+    ) -> str:
+        """
+        Inserts formatted docs into a file and writes it atomically.
 
-        # Write modified lines back to file
-        with open(file_path, "w") as f:
-            f.writelines(lines)
+        Returns:
+            str: sha256 of the file's new content
+        """
+        return self._committer.write_docs(file_path, docs, file_buffer)
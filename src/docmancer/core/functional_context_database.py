@@ -1,20 +1,355 @@
+import json
 import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+import docmancer.utils.file_utils as file_utils
+import docmancer.utils.hash_utils as hash_utils
+
+INDEX_FILE_NAME = "index.db"
+
+# Bumped when the schema changes. The index only caches what parsing the
+# project yields, so an index of another version is rebuilt, not migrated.
+SCHEMA_VERSION = 3
+
+# Writes are buffered and written in one transaction per batch, since a
+# transaction per function spends most of its time committing
+WRITE_BATCH_SIZE = 5000
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        file_path TEXT PRIMARY KEY,
+        file_hash TEXT,
+        indexed_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS functions (
+        file_path TEXT NOT NULL,
+        qualified_name TEXT NOT NULL,
+        signature TEXT NOT NULL,
+        start_line INTEGER NOT NULL,
+        end_line INTEGER NOT NULL,
+        fingerprint TEXT NOT NULL,
+        docstring_hash TEXT,
+        -- Fingerprint of the function when its docstring last changed
+        documented_fingerprint TEXT,
+        summary TEXT,
+        summary_fingerprint TEXT,
+        changed_at REAL NOT NULL,
+        indexed_at REAL NOT NULL,
+        PRIMARY KEY (file_path, qualified_name)
+    ) WITHOUT ROWID;
+    -- Lookups by file use the primary key, whose first column is the file
+    CREATE INDEX IF NOT EXISTS functions_fingerprint ON functions (fingerprint);
+"""
+
+UPSERT_FILE = """
+    INSERT INTO files (file_path, file_hash, indexed_at) VALUES (?, ?, ?)
+    ON CONFLICT (file_path) DO UPDATE SET
+        file_hash = excluded.file_hash, indexed_at = excluded.indexed_at
+"""
+
+UPSERT_FUNCTION = """
+    INSERT INTO functions (
+        file_path, qualified_name, signature, start_line, end_line,
+        fingerprint, docstring_hash, documented_fingerprint, changed_at,
+        indexed_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (file_path, qualified_name) DO UPDATE SET
+        signature = excluded.signature,
+        start_line = excluded.start_line,
+        end_line = excluded.end_line,
+        documented_fingerprint = CASE
+            WHEN docstring_hash IS excluded.docstring_hash
+            THEN documented_fingerprint
+            ELSE excluded.documented_fingerprint END,
+        docstring_hash = excluded.docstring_hash,
+        changed_at = CASE
+            WHEN fingerprint = excluded.fingerprint THEN changed_at
+            ELSE excluded.changed_at END,
+        fingerprint = excluded.fingerprint,
+        indexed_at = excluded.indexed_at
+"""
+
+# Functions no longer in a file were not written by its latest indexing
+DELETE_REMOVED_FUNCTIONS = """
+    DELETE FROM functions WHERE file_path = ? AND indexed_at != ?
+"""
+
+UPDATE_SUMMARY = """
+    UPDATE functions SET summary = ?, summary_fingerprint = ?
+    WHERE file_path = ? AND qualified_name = ?
+"""
+
+FUNCTION_COLUMNS = """
+    file_path, qualified_name, start_line, end_line, fingerprint,
+    docstring_hash IS NOT NULL, changed_at
+"""
+
+SELECT_UNDOCUMENTED = f"""
+    SELECT {FUNCTION_COLUMNS} FROM functions
+    WHERE docstring_hash IS NULL
+    ORDER BY file_path, start_line
+"""
+
+SELECT_UNDOCUMENTED_IN_FILE = f"""
+    SELECT {FUNCTION_COLUMNS} FROM functions
+    WHERE file_path = ? AND docstring_hash IS NULL
+    ORDER BY start_line
+"""
+
+SELECT_STALE = f"""
+    SELECT {FUNCTION_COLUMNS} FROM functions
+    WHERE docstring_hash IS NOT NULL AND fingerprint != documented_fingerprint
+    ORDER BY file_path, start_line
+"""
+
+SELECT_CHANGED_SINCE = f"""
+    SELECT {FUNCTION_COLUMNS} FROM functions
+    WHERE changed_at > ?
+    ORDER BY file_path, start_line
+"""
+
+SELECT_BY_FINGERPRINT = f"""
+    SELECT {FUNCTION_COLUMNS} FROM functions WHERE fingerprint = ?
+"""
+
+SELECT_SUMMARY = """
+    SELECT summary FROM functions
+    WHERE file_path = ? AND qualified_name = ? AND summary_fingerprint = ?
+"""
+
+SELECT_FILE_HASH = "SELECT file_hash FROM files WHERE file_path = ?"
+
+
+@dataclass
+class IndexedFunction:
+    file_path: str
+    qualified_name: str
+    start_line: int
+    end_line: int
+    fingerprint: str
+    documented: bool
+    changed_at: float  # Unix time the function's fingerprint last changed
 
 
 class FunctionalContextDatabase:
-    def __init__(self):
-        self._conn = sqlite3.connect("docgen.db")
-        self._cursor = self._conn.cursor()
-
-        # Create table for generated documentation
-        self._cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS documentation (
-                function_name TEXT PRIMARY KEY,
-                file_path TEXT,
-                start_line INTEGER,
-                end_line INTEGER,
-                docstring TEXT
+    """
+    SQLite index of a project's functions, keyed by file path and qualified
+    name.
+
+    The parse stage indexes each file's functions and the generate stage
+    records each summary. Writes are buffered and written in batches, one
+    transaction per batch, so indexing costs little next to parsing. The
+    database uses write-ahead logging so it can be read while a run writes
+    it. Safe to call from several threads.
+    """
+
+    def __init__(self, path: Path, batch_size: int = WRITE_BATCH_SIZE):
+        self._path = Path(path)
+        self._batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, list]] = []
+        self._pending_rows = 0
+        self._last_stamp = 0.0
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # Transactions are managed explicitly, see _flush
+        self._conn = sqlite3.connect(
+            str(self._path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, a crash can lose the last transactions but not corrupt
+        # the index, and the index can always be rebuilt from the source
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    @classmethod
+    def for_project(cls, project_dir: str) -> "FunctionalContextDatabase":
+        return cls(file_utils.get_cache_dir(project_dir) / INDEX_FILE_NAME)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _create_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._conn.executescript("""
+                DROP TABLE IF EXISTS functions;
+                DROP TABLE IF EXISTS files;
+            """)
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _get_stamp(self) -> float:
+        # Unique per indexed file, so rows left from earlier indexing can be
+        # told apart even when the clock has not moved
+        stamp = max(time.time(), self._last_stamp + 1e-6)
+        self._last_stamp = stamp
+        return stamp
+
+    def index_file(
+        self,
+        file_path,
+        contexts: List[FunctionContextModel],
+        file_hash: Optional[str] = None,
+    ):
+        """
+        Replaces the indexed functions of a file.
+
+        Args:
+            file_path: path of the parsed file
+            contexts (List[FunctionContextModel]): every function in the file
+            file_hash (str): sha256 of the parsed content
+        """
+        file_path = str(file_path)
+        with self._lock:
+            stamp = self._get_stamp()
+            rows = []
+            for context in contexts:
+                fingerprint = hash_utils.get_function_fingerprint(context)
+                docstring_hash = None
+                if context.docstring is not None:
+                    docstring_hash = hash_utils.get_text_hash(context.docstring)
+                rows.append(
+                    (
+                        file_path,
+                        context.qualified_name,
+                        context.signature,
+                        context.start_line,
+                        context.end_line,
+                        fingerprint,
+                        docstring_hash,
+                        fingerprint,
+                        stamp,
+                        stamp,
+                    )
+                )
+            self._pending.append((UPSERT_FILE, [(file_path, file_hash, stamp)]))
+            self._pending.append((UPSERT_FUNCTION, rows))
+            self._pending.append((DELETE_REMOVED_FUNCTIONS, [(file_path, stamp)]))
+            self._add_pending_rows(len(rows) + 1)
+
+    def record_summary(
+        self,
+        file_path,
+        qualified_name: str,
+        fingerprint: str,
+        summary: FunctionSummaryModel,
+    ):
+        """Records the summary generated for a version of a function."""
+        with self._lock:
+            self._pending.append(
+                (
+                    UPDATE_SUMMARY,
+                    [
+                        (
+                            # asdict gives the same dict as to_dict, many
+                            # times faster
+                            json.dumps(asdict(summary)),
+                            fingerprint,
+                            str(file_path),
+                            qualified_name,
+                        )
+                    ],
+                )
             )
+            self._add_pending_rows(1)
+
+    def _add_pending_rows(self, count: int):
+        self._pending_rows += count
+        if self._pending_rows >= self._batch_size:
+            self._flush()
+
+    def flush(self):
+        """Writes buffered changes."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        # sqlite3 caches the compiled statements, so each batch only binds
+        # parameters
+        self._conn.execute("BEGIN")
+        try:
+            for statement, rows in pending:
+                self._conn.executemany(statement, rows)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _query(self, statement: str, parameters=()) -> List[IndexedFunction]:
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(statement, parameters).fetchall()
+        return [
+            IndexedFunction(
+                file_path=row[0],
+                qualified_name=row[1],
+                start_line=row[2],
+                end_line=row[3],
+                fingerprint=row[4],
+                documented=bool(row[5]),
+                changed_at=row[6],
+            )
+            for row in rows
+        ]
+
+    def get_undocumented(self, file_path=None) -> List[IndexedFunction]:
+        """Returns functions without a docstring, in one file or all of them."""
+        if file_path is None:
+            return self._query(SELECT_UNDOCUMENTED)
+        return self._query(SELECT_UNDOCUMENTED_IN_FILE, (str(file_path),))
+
+    def get_stale(self) -> List[IndexedFunction]:
         """
-        )
+        Returns documented functions whose code changed after their docstring
+        last did, so their documentation may no longer match.
+        """
+        return self._query(SELECT_STALE)
+
+    def get_changed_since(self, since: float) -> List[IndexedFunction]:
+        """
+        Returns functions added or changed after a point in time.
+
+        Args:
+            since (float): Unix time
+        """
+        return self._query(SELECT_CHANGED_SINCE, (since,))
+
+    def get_by_fingerprint(self, fingerprint: str) -> List[IndexedFunction]:
+        """Returns functions with this signature and body, in any file."""
+        return self._query(SELECT_BY_FINGERPRINT, (fingerprint,))
+
+    def get_summary(
+        self, file_path, qualified_name: str, fingerprint: str
+    ) -> Optional[FunctionSummaryModel]:
+        """Returns the summary generated for this version of a function."""
+        with self._lock:
+            self._flush()
+            row = self._conn.execute(
+                SELECT_SUMMARY, (str(file_path), qualified_name, fingerprint)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return FunctionSummaryModel.from_dict(json.loads(row[0]))
+
+    def get_file_hash(self, file_path) -> Optional[str]:
+        """Returns the hash of a file when it was last indexed."""
+        with self._lock:
+            self._flush()
+            row = self._conn.execute(SELECT_FILE_HASH, (str(file_path),)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush()
+            finally:
+                self._conn.close()
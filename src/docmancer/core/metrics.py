@@ -0,0 +1,229 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import docmancer.utils.file_utils as file_utils
+
+METRICS_FILE_NAME = "metrics.json"
+METRIC_PREFIX = "docmancer_"
+
+# Upper bounds in seconds, following Prometheus' cumulative bucket convention
+HISTOGRAM_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _get_key(name: str, labels: Dict[str, str]) -> LabelKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRecorder:
+    """
+    Collects counters and latency histograms for one run and writes them as
+    a JSON report or a Prometheus textfile.
+
+    A disabled recorder ignores everything, and its `time` returns a shared
+    no-op context manager, so instrumentation costs a method call when
+    metrics are off. Safe to call from several threads.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[LabelKey, float] = {}
+        self._gauges: Dict[LabelKey, float] = {}
+        self._samples: Dict[LabelKey, List[float]] = {}
+        self._started = datetime.now()
+        self._start = time.perf_counter()
+
+    def add(self, name: str, value: float = 1, **labels):
+        """Increases a counter."""
+        if not self.enabled:
+            return
+        key = _get_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Sets a gauge, e.g. a rate computed at the end of the run."""
+        if not self.enabled:
+            return
+        key = _get_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Adds a duration to a histogram."""
+        if not self.enabled:
+            return
+        key = _get_key(name, labels)
+        with self._lock:
+            self._samples.setdefault(key, []).append(seconds)
+
+    def time(self, name: str, **labels):
+        """Context manager that observes how long its block takes."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._time(name, labels)
+
+    @contextmanager
+    def _time(self, name: str, labels: Dict[str, str]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_get_key(name, labels), 0)
+
+    def get_histogram_sum(self, name: str, **labels) -> float:
+        with self._lock:
+            return sum(self._samples.get(_get_key(name, labels), []))
+
+    def _snapshot(self):
+        with self._lock:
+            return (
+                dict(self._counters),
+                dict(self._gauges),
+                {key: sorted(values) for key, values in self._samples.items()},
+            )
+
+    def get_report(self) -> dict:
+        """
+        Returns every recorded metric. Histograms are summarized by count,
+        sum, min, max, mean and the 50th, 90th and 99th percentiles.
+        """
+        counters, gauges, samples = self._snapshot()
+
+        def get_percentile(values: List[float], fraction: float) -> float:
+            return values[min(len(values) - 1, math.ceil(fraction * len(values)) - 1)]
+
+        report = {
+            "started": self._started.isoformat(timespec="seconds"),
+            "duration_seconds": round(time.perf_counter() - self._start, 6),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(gauges.items())
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": len(values),
+                    "sum": sum(values),
+                    "min": values[0],
+                    "max": values[-1],
+                    "mean": sum(values) / len(values),
+                    "p50": get_percentile(values, 0.5),
+                    "p90": get_percentile(values, 0.9),
+                    "p99": get_percentile(values, 0.99),
+                }
+                for (name, labels), values in sorted(samples.items())
+            ],
+        }
+        return report
+
+    def write_json(self, path):
+        report = self.get_report()
+        file_utils.write_file_atomic(
+            path, json.dumps(report, indent=2).encode("utf8"), sync=False
+        )
+
+    def write_prometheus(self, path):
+        """
+        Writes metrics in the Prometheus text format, atomically so that the
+        node exporter's textfile collector never reads a partial file.
+        """
+        counters, gauges, samples = self._snapshot()
+
+        def get_labels(labels, extra=()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (
+                (key, value.replace("\\", "\\\\").replace('"', '\\"'))
+                for key, value in pairs
+            )
+            return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+        lines = []
+        declared = set()
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in sorted(values.items()):
+                metric = METRIC_PREFIX + name
+                if kind == "counter" and not metric.endswith("_total"):
+                    metric += "_total"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    declared.add(metric)
+                lines.append(f"{metric}{get_labels(labels)} {value}")
+        for (name, labels), values in sorted(samples.items()):
+            metric = METRIC_PREFIX + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            position = 0
+            for bound in HISTOGRAM_BUCKETS:
+                while position < len(values) and values[position] <= bound:
+                    position += 1
+                lines.append(
+                    f"{metric}_bucket{get_labels(labels, [('le', str(bound))])} "
+                    f"{position}"
+                )
+            lines.append(
+                f"{metric}_bucket{get_labels(labels, [('le', '+Inf')])} {len(values)}"
+            )
+            lines.append(f"{metric}_sum{get_labels(labels)} {sum(values)}")
+            lines.append(f"{metric}_count{get_labels(labels)} {len(values)}")
+        run_seconds = time.perf_counter() - self._start
+        lines.append(f"# TYPE {METRIC_PREFIX}run_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}run_seconds {run_seconds}")
+        file_utils.write_file_atomic(
+            path, ("\n".join(lines) + "\n").encode("utf8"), sync=False
+        )
+
+
+NULL_METRICS = MetricsRecorder(enabled=False)
+
+
+def write_reports(
+    metrics: MetricsRecorder,
+    project_dir: str,
+    output: Optional[str] = None,
+    textfile: Optional[str] = None,
+) -> Path:
+    """
+    Writes the JSON report, to the cache directory unless `output` is set,
+    and the Prometheus textfile if `textfile` is set.
+
+    Returns:
+        Path: where the JSON report was written
+    """
+    path = Path(output or file_utils.get_cache_dir(project_dir) / METRICS_FILE_NAME)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    metrics.write_json(path)
+    if textfile:
+        Path(textfile).parent.mkdir(parents=True, exist_ok=True)
+        metrics.write_prometheus(textfile)
+    return path
@@ -0,0 +1,49 @@
+"""
+Choices for command line options and configuration values.
+
+This module only depends on the standard library so that the argument
+parser, and with it `--help`, can be built without loading the
+configuration model. The enums are re-exported by docmancer.config.
+"""
+
+from enum import Enum
+
+
+class LLMType(Enum):
+    LOCAL = "LOCAL"
+    REMOTE_API = "REMOTE_API"
+
+
+class Command(Enum):
+    """Top level action selected on the command line."""
+
+    RUN = "run"  # Generate, review and write documentation
+    ROLLBACK = "rollback"  # Restore files changed by the most recent run
+    GENERATE = "generate"  # Generate documentation into a review file, unattended
+    REVIEW = "review"  # Review a review file and write the accepted documentation
+    APPLY = "apply"  # Write everything in a review file that was not rejected
+    MERGE = "merge"  # Combine the review files of sharded runs and write them
+    WORKER = "worker"  # Generate summaries for the functions in a work queue
+    WATCH = "watch"  # Suggest documentation for functions as files are saved
+
+
+class GenerationSchedule(Enum):
+    """Order in which function summaries are generated."""
+
+    FLAT = "flat"  # File and parse order
+    DEPENDENCY = "dependency"  # Callees first, callers prompted with callee summaries
+    PRIORITY = "priority"  # Most valuable functions first, see generator/priority.py
+
+
+class ReviewMode(Enum):
+    """How generated documentation is shown for approval."""
+
+    SINGLE = "single"  # One function at a time
+    BATCH = "batch"  # A full-screen list per file, see core/batch_review.py
+
+
+class ReplayLatency(Enum):
+    """How long a replayed model response takes, see generator/llm/cassette_agent.py."""
+
+    NONE = "none"  # Respond immediately
+    RECORDED = "recorded"  # Wait as long as the recorded request took
@@ -0,0 +1,190 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# How often blocked workers wake up to check for cancellation, in seconds
+_POLL_INTERVAL = 0.1
+
+
+class Stage:
+    """
+    A named pipeline step that runs `handler` over its input on one or more
+    worker threads.
+
+    The handler is called as `handler(item, emit)` and may call `emit` any
+    number of times to pass results downstream. `emit` blocks while the next
+    queue is full, which is what gives the pipeline backpressure. The optional
+    `on_finish(emit)` hook runs once after all input has been handled.
+
+    Handler errors are recorded in `Pipeline.errors`. With `emit_on_error`,
+    an item whose handler raised before emitting it is passed downstream as
+    it is, for later stages that wait for every item of a group.
+
+    When the pipeline is cancelled it waits for in-progress handlers to
+    return, except for `cancellable` stages whose workers are abandoned.
+    Only mark a stage cancellable if dropping its in-flight work is safe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any, Callable[[Any], None]], None],
+        workers: int = 1,
+        on_finish: Optional[Callable[[Callable[[Any], None]], None]] = None,
+        cancellable: bool = False,
+        emit_on_error: bool = False,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.on_finish = on_finish
+        self.cancellable = cancellable
+        self.emit_on_error = emit_on_error
+
+
+class Pipeline:
+    """
+    Connects stages with bounded queues and runs them concurrently.
+
+    Items held by the pipeline are limited to roughly
+    `queue_size * len(stages)` plus one per worker, regardless of how much
+    input is fed in. With an enabled `metrics` recorder, the time each
+    handler and `on_finish` hook takes is recorded per stage.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 16,
+        metrics: MetricsRecorder = NULL_METRICS,
+    ):
+        self._stages = stages
+        self._metrics = metrics
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._cancelled = threading.Event()
+        self.errors: List[Exception] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stops all stages. Items that are still queued are dropped."""
+        self._cancelled.set()
+
+    def _put(self, q: Optional[queue.Queue], item: Any):
+        if q is None:
+            return
+        while not self._cancelled.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._cancelled.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def run(self, items: Iterable[Any]):
+        """
+        Feeds `items` into the first stage and blocks until every stage has
+        finished or the pipeline was cancelled.
+        """
+        threads = []
+        for position, stage in enumerate(self._stages):
+            in_queue = self._queues[position]
+            out_queue = (
+                self._queues[position + 1] if position + 1 < len(self._stages) else None
+            )
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, in_queue, out_queue, remaining, lock),
+                    name=f"{stage.name}-{worker}",
+                    daemon=True,
+                )
+                threads.append((stage, thread))
+                thread.start()
+
+        for item in items:
+            if self._cancelled.is_set():
+                break
+            self._put(self._queues[0], item)
+        self._put(self._queues[0], _DONE)
+
+        for stage, thread in threads:
+            while thread.is_alive():
+                if stage.cancellable and self._cancelled.is_set():
+                    break
+                thread.join(timeout=_POLL_INTERVAL)
+
+    def _work(
+        self,
+        stage: Stage,
+        in_queue: queue.Queue,
+        out_queue: Optional[queue.Queue],
+        remaining: List[int],
+        lock: threading.Lock,
+    ):
+        blocked = [0.0]  # Time spent waiting on a full downstream queue
+        current = [None, False]  # Item being handled, and whether it was emitted
+
+        def emit(result: Any):
+            if result is current[0]:
+                current[1] = True
+            if not self._metrics.enabled:
+                self._put(out_queue, result)
+                return
+            start = time.perf_counter()
+            self._put(out_queue, result)
+            blocked[0] += time.perf_counter() - start
+
+        while True:
+            item = self._get(in_queue)
+            if item is _DONE:
+                # Let sibling workers see the end of input as well
+                self._put(in_queue, _DONE)
+                break
+            start = time.perf_counter() if self._metrics.enabled else 0.0
+            current[:] = [item, False]
+            try:
+                stage.handler(item, emit)
+            except Exception as e:
+                self.errors.append(e)
+                self._metrics.add("stage_errors", stage=stage.name)
+                if stage.emit_on_error and not current[1]:
+                    emit(item)
+            if self._metrics.enabled:
+                # Backpressure is reported separately from the handler's own work
+                self._metrics.observe(
+                    "stage_item_seconds",
+                    time.perf_counter() - start - blocked[0],
+                    stage=stage.name,
+                )
+                self._metrics.add("stage_blocked_seconds", blocked[0], stage=stage.name)
+                blocked[0] = 0.0
+
+        with lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker:
+            if stage.on_finish and not self._cancelled.is_set():
+                try:
+                    with self._metrics.time("stage_finish_seconds", stage=stage.name):
+                        stage.on_finish(emit)
+                except Exception as e:
+                    self.errors.append(e)
+                    self._metrics.add("stage_errors", stage=stage.name)
+            self._put(out_queue, _DONE)
@@ -1,21 +1,19 @@
 from enum import Enum
 import os
-import io
-import sys
-import time
 import threading
 import tempfile
 import subprocess
+from concurrent.futures import Future
+from contextlib import contextmanager
 from typing import List, Callable, Any, Coroutine
 import platform
 from dataclasses import dataclass
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.rule import Rule
-from rich.spinner import Spinner
-from prompt_toolkit.styles import Style
-from prompt_toolkit.shortcuts import prompt, print_formatted_text
-from prompt_toolkit.formatted_text import HTML
+from rich.table import Table
 from docmancer.models.documentation_model import DocumentationModel
+from docmancer.core.progress import ProgressSnapshot, ProgressTracker, capture_output
 
 
 class UserResponse(Enum):
@@ -37,6 +35,12 @@ EDIT = USER_RESPONSES[UserResponse.EDIT]
 SKIP = USER_RESPONSES[UserResponse.SKIP]
 QUIT = USER_RESPONSES[UserResponse.QUIT]
 
+# The progress view redraws when progress changes, at most this often, and
+# at least once per idle interval so elapsed times and the ETA keep moving
+PROGRESS_MIN_INTERVAL = 0.1
+PROGRESS_IDLE_INTERVAL = 1.0
+PROGRESS_MAX_TASKS = 8
+
 
 @dataclass
 class UserResponseModel:
@@ -47,15 +51,15 @@ class UserResponseModel:
 # Define a style for the prompt (e.g., blue background)
 # 'bg:#0000FF' is hex for blue. You can use standard color names like 'bg:blue'
 # or more specific colors like 'bg:#1e4369' for a darker blue.
-blue_background_style = Style.from_dict(
-    {
-        "prompt": "#FFFFFF bg:#000094",  # White foreground on a slightly darker blue background for the prompt string itself
-        "bottom-toolbar": "#FFFFFF bg:#0000FF",  # Example: if you had a toolbar
-        "completion-menu": "bg:#333333 #FFFFFF",  # Example: styling for auto-completion menu
-        "arg-style": "bold #FFD700",  # Example: style for argument names
-        "input": "#FFFFFF bg:#0000FF",  # White text on blue background for user input
-    }
-)
+# prompt_toolkit is imported when a prompt is shown, as runs without review
+# do not need it
+BLUE_BACKGROUND_STYLE = {
+    "prompt": "#FFFFFF bg:#000094",  # White foreground on a slightly darker blue background for the prompt string itself
+    "bottom-toolbar": "#FFFFFF bg:#0000FF",  # Example: if you had a toolbar
+    "completion-menu": "bg:#333333 #FFFFFF",  # Example: styling for auto-completion menu
+    "arg-style": "bold #FFD700",  # Example: style for argument names
+    "input": "#FFFFFF bg:#0000FF",  # White text on blue background for user input
+}
 
 
 class Presenter:
@@ -81,6 +85,36 @@ class Presenter:
                     print(e)
                 continue
 
+    def review_batch(
+        self, file_path: str, docs: List[DocumentationModel]
+    ) -> List[UserResponseModel]:
+        """
+        Reviews all of a file's docs on one screen.
+
+        Returns:
+            List[UserResponseModel]: a response per doc. Docs left undecided
+                when the reviewer quit get UserResponse.QUIT.
+        """
+        # Imported here since only reviews need prompt_toolkit
+        from docmancer.core.batch_review import (
+            BatchItemStatus,
+            BatchReviewState,
+            review_file_batch,
+        )
+
+        state = review_file_batch(
+            file_path, BatchReviewState(docs), self.edit_text_with_editor
+        )
+        responses = {
+            BatchItemStatus.ACCEPTED: UserResponse.ACCEPT,
+            BatchItemStatus.SKIPPED: UserResponse.SKIP,
+            BatchItemStatus.PENDING: UserResponse.QUIT,
+        }
+        return [
+            UserResponseModel(doc_model=doc, response=responses[status])
+            for doc, status in zip(docs, state.statuses)
+        ]
+
     def edit_text_with_editor(self, initial_text: List[str]) -> str:
         editor = self.get_default_editor()
         with tempfile.NamedTemporaryFile(suffix=".tmp", mode="w+", delete=False) as tf:
@@ -103,6 +137,10 @@ class Presenter:
         """Prints an error message."""
         self._console.print(f"[bold red]Error:[/bold red] {message}", style="red")
 
+    def print_message(self, message: str):
+        """Prints an informational message."""
+        self._console.print(f"[grey69]{message}")
+
     def print_success(self, message: str):
         """Prints a success message."""
         self._console.print(
@@ -113,54 +151,101 @@ class Presenter:
         self, task_description: str, slow_task: Callable[..., Any], *args, **kwargs
     ) -> Any:
         spinner_name = "star"
-        # spinner_name="moon"
-        # spinner_name="earth"
-        result_container = {"result": None, "exception": None}
+        future = Future()
 
         def target_function():
             """
-            The function to run in the separate thread, with stdout redirected.
+            The function to run in the separate thread, with its output captured.
             """
-            # Create a StringIO object to capture stdout
-            old_stdout = sys.stdout
-            redirected_stdout = io.StringIO()
-            sys.stdout = redirected_stdout
-
-            try:
-                result_container["result"] = slow_task(*args, **kwargs)
-            except Exception as e:
-                result_container["exception"] = e
-            finally:
-                # Restore original stdout
-                sys.stdout = old_stdout
-                # Store captured output
-                result_container["captured_output"] = redirected_stdout.getvalue()
-                redirected_stdout.close()  # Close the StringIO object
-
-        # Start the slow_task in a separate thread
-        thread = threading.Thread(target=target_function)
-        thread.start()
-
+            with capture_output() as output:
+                try:
+                    result = slow_task(*args, **kwargs)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            future.captured_output = output.getvalue()
+
+        # Blocks until the task is done. rich animates the spinner from its
+        # own thread, so this thread does not compete with the task for CPU.
+        # The task starts inside the status, which wraps sys.stdout, so the
+        # capture is undone before the status restores the stream.
         with self._console.status(
             f"[bold magenta]{task_description}...[/bold magenta]", spinner=spinner_name
-        ) as status:
-            while thread.is_alive():
-                # Keep the main thread alive and let rich update the spinner
-                pass
+        ):
+            thread = threading.Thread(target=target_function, name="slow-task")
+            thread.start()
+            thread.join()
 
-        # After the thread finishes, retrieve the result or re-raise the exception
-        if result_container["captured_output"]:
-            # Optionally print the captured output *after* the spinner has stopped
+        if future.captured_output:
+            # Printed after the spinner has stopped
             self._console.print(
-                f"\n[dim italic]Captured output from task:\n{result_container['captured_output'].strip()}[/dim italic]"
+                f"\n[dim italic]Captured output from task:\n{future.captured_output.strip()}[/dim italic]"
             )
 
-        # After the thread finishes, retrieve the result or re-raise the exception
-        if result_container["exception"]:
-            self.print_error(f"Task failed: {result_container['exception']}")
-            raise result_container["exception"]
-        else:
-            return result_container["result"]
+        exception = future.exception()
+        if exception:
+            self.print_error(f"Task failed: {exception}")
+            raise exception
+        return future.result()
+
+    @contextmanager
+    def show_progress(self, progress: ProgressTracker):
+        """
+        Shows a live view of `progress` while the block runs. Only shown on a
+        terminal, since the view is redrawn in place.
+        """
+        if not progress.enabled or not self._console.is_terminal:
+            yield
+            return
+        stopped = threading.Event()
+        with Live(
+            self._render_progress(progress.get_snapshot()),
+            console=self._console,
+            auto_refresh=False,
+            transient=True,
+        ) as live:
+
+            def render():
+                while not stopped.is_set():
+                    progress.wait_for_change(PROGRESS_IDLE_INTERVAL)
+                    live.update(
+                        self._render_progress(progress.get_snapshot()), refresh=True
+                    )
+                    # Batches bursts of updates into one redraw
+                    stopped.wait(PROGRESS_MIN_INTERVAL)
+
+            thread = threading.Thread(target=render, name="progress", daemon=True)
+            thread.start()
+            try:
+                yield
+            finally:
+                stopped.set()
+                progress.wake()
+                thread.join()
+
+    def _render_progress(self, snapshot: ProgressSnapshot):
+        eta = "--"
+        if snapshot.eta is not None:
+            minutes, seconds = divmod(int(snapshot.eta), 60)
+            eta = f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+        summary = (
+            f"[bold magenta]Generating[/bold magenta] "
+            f"[green]{snapshot.done} done[/green]"
+            + (f" [red]({snapshot.failed} failed)[/red]" if snapshot.failed else "")
+            + f", [cyan]{len(snapshot.in_flight)} in flight[/cyan], "
+            f"[grey69]{snapshot.queued} queued[/grey69]  "
+            f"{snapshot.tokens_per_second:.1f} tok/s  ETA {eta}"
+        )
+        tasks = Table.grid(padding=(0, 2))
+        for name, seconds in list(zip(snapshot.in_flight, snapshot.in_flight_seconds))[
+            :PROGRESS_MAX_TASKS
+        ]:
+            tasks.add_row(f"[grey69]{seconds:5.1f}s", name)
+        hidden = len(snapshot.in_flight) - PROGRESS_MAX_TASKS
+        if hidden > 0:
+            tasks.add_row("", f"[grey69]and {hidden} more")
+        return Group(summary, tasks)
 
     async def magic_spinner_async(
         self,
@@ -197,7 +282,10 @@ class Presenter:
         """
         Shows a prompt_toolkit prompt with a blue background applied to the input area.
         """
-        answer = prompt(message=message, style=blue_background_style)
+        from prompt_toolkit.shortcuts import prompt
+        from prompt_toolkit.styles import Style
+
+        answer = prompt(message=message, style=Style.from_dict(BLUE_BACKGROUND_STYLE))
         return answer
 
     def interact(self, doc: DocumentationModel):
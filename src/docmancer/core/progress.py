@@ -0,0 +1,182 @@
+import io
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ProgressSnapshot:
+    done: int
+    failed: int
+    queued: int
+    in_flight: List[str]  # Function names, oldest first
+    in_flight_seconds: List[float]
+    tokens_per_second: float
+    elapsed: float
+    eta: Optional[float] = None  # Seconds, once a function has finished
+
+
+class ProgressTracker:
+    """
+    Counts functions waiting for, in and done with generation so the
+    presenter can show a live view of a concurrent run.
+
+    Updates wake anything blocked in `wait_for_change`, so a display only
+    redraws when something happened instead of polling. A disabled tracker
+    ignores everything. Safe to call from several threads.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._changed = threading.Condition()
+        self._version = 0
+        self._total = 0
+        self._done = 0
+        self._failed = 0
+        self._tokens = 0
+        self._in_flight: Dict[int, List] = {}  # Thread id -> [name, start]
+        self._first_start: Optional[float] = None
+
+    def add(self, count: int = 1):
+        """Adds functions that may need generating."""
+        self._update("_total", count)
+
+    def skip(self, count: int = 1):
+        """Removes functions that turned out not to need generating."""
+        self._update("_total", -count)
+
+    def add_tokens(self, count: int):
+        self._update("_tokens", count)
+
+    def start(self, name: str):
+        """Marks the calling thread as generating `name`."""
+        if not self.enabled:
+            return
+        with self._changed:
+            now = time.perf_counter()
+            if self._first_start is None:
+                self._first_start = now
+            self._in_flight[threading.get_ident()] = [name, now]
+            self._notify()
+
+    def finish(self, failed: bool = False):
+        """Marks the function the calling thread was generating as done."""
+        if not self.enabled:
+            return
+        with self._changed:
+            self._in_flight.pop(threading.get_ident(), None)
+            self._done += 1
+            self._failed += int(failed)
+            self._notify()
+
+    def _update(self, attribute: str, value: int):
+        if not self.enabled:
+            return
+        with self._changed:
+            setattr(self, attribute, getattr(self, attribute) + value)
+            self._notify()
+
+    def _notify(self):
+        self._version += 1
+        self._changed.notify_all()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """
+        Blocks until the progress changes or `timeout` seconds pass.
+
+        Returns:
+            bool: whether anything changed
+        """
+        with self._changed:
+            version = self._version
+            return self._changed.wait_for(lambda: self._version != version, timeout)
+
+    def wake(self):
+        """Wakes waiting displays without changing anything, e.g. to stop them."""
+        with self._changed:
+            self._changed.notify_all()
+
+    def get_snapshot(self) -> ProgressSnapshot:
+        with self._changed:
+            now = time.perf_counter()
+            in_flight = sorted(self._in_flight.values(), key=lambda task: task[1])
+            elapsed = now - self._first_start if self._first_start else 0.0
+            remaining = max(0, self._total - self._done)
+            eta = None
+            if self._done and elapsed:
+                eta = remaining * elapsed / self._done
+            return ProgressSnapshot(
+                done=self._done,
+                failed=self._failed,
+                queued=max(0, remaining - len(in_flight)),
+                in_flight=[name for name, _ in in_flight],
+                in_flight_seconds=[now - start for _, start in in_flight],
+                tokens_per_second=self._tokens / elapsed if elapsed else 0.0,
+                elapsed=elapsed,
+                eta=eta,
+            )
+
+
+NULL_PROGRESS = ProgressTracker(enabled=False)
+
+
+class _ThreadOutputRouter(io.TextIOBase):
+    """
+    Stands in for sys.stdout while tasks capture output. Writes from a
+    capturing thread go to that thread's buffer, everything else goes to
+    the real stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers: Dict[int, io.StringIO] = {}
+
+    def write(self, text: str) -> int:
+        buffer = self.buffers.get(threading.get_ident())
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+    @property
+    def encoding(self):
+        return getattr(self.stream, "encoding", "utf-8")
+
+
+_router_lock = threading.Lock()
+_router: Optional[_ThreadOutputRouter] = None
+
+
+@contextmanager
+def capture_output():
+    """
+    Captures what the calling thread prints to sys.stdout in the block.
+
+    Other threads keep printing normally, so several tasks can capture at
+    once without hiding each other's output or restoring the wrong stream.
+
+    Yields:
+        io.StringIO: the captured output, readable after the block
+    """
+    global _router
+    buffer = io.StringIO()
+    with _router_lock:
+        if _router is None:
+            _router = _ThreadOutputRouter(sys.stdout)
+            sys.stdout = _router
+        _router.buffers[threading.get_ident()] = buffer
+    try:
+        yield buffer
+    finally:
+        with _router_lock:
+            del _router.buffers[threading.get_ident()]
+            if not _router.buffers:
+                if sys.stdout is _router:
+                    sys.stdout = _router.stream
+                _router = None
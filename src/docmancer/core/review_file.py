@@ -0,0 +1,500 @@
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional
+from docmancer.config import DocmancerConfig
+from docmancer.core.committer import FileCommitter
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.core.options import ReviewMode
+from docmancer.core.presenter import Presenter, UserResponse
+from docmancer.core.rollback import RollbackJournal
+from docmancer.core.sharding import Shard
+from docmancer.models.documentation_model import DocumentationModel
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.parser.base_parser import BaseParser
+from docmancer.parser.parser_factory import ParserFactory
+from docmancer.utils.file_buffer import FileBuffer
+import docmancer.utils.file_utils as file_utils
+import docmancer.utils.hash_utils as hash_utils
+
+REVIEW_FILE_NAME = "review.jsonl"
+REVIEW_FILE_VERSION = 1
+
+
+class ReviewStatus(Enum):
+    PENDING = "pending"  # Generated, not reviewed yet
+    ACCEPTED = "accepted"  # Accepted in review, not written yet
+    SKIPPED = "skipped"  # Rejected in review, never written
+    APPLIED = "applied"  # Written to the source file
+    STALE = "stale"  # The function changed after generation, never written
+
+
+@dataclass
+class ReviewEntry:
+    fingerprint: str  # Of the function the documentation was generated for
+    doc: DocumentationModel
+    docstring: Optional[str] = None  # The function's docstring when generated
+    status: str = ReviewStatus.PENDING.value
+
+    def to_record(self) -> dict:
+        doc = self.doc.to_dict()
+        doc["file_path"] = str(self.doc.file_path)  # A Path while generating
+        return {
+            "fingerprint": self.fingerprint,
+            "docstring": self.docstring,
+            "status": self.status,
+            "doc": doc,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "ReviewEntry":
+        return cls(
+            fingerprint=record["fingerprint"],
+            doc=DocumentationModel.from_dict(record["doc"]),
+            docstring=record.get("docstring"),
+            status=record.get("status", ReviewStatus.PENDING.value),
+        )
+
+
+@dataclass
+class ApplyResult:
+    applied: List[ReviewEntry] = field(default_factory=list)
+    stale: List[ReviewEntry] = field(default_factory=list)
+    errors: List[Exception] = field(default_factory=list)  # Files not written
+
+
+def get_review_file_path(
+    project_dir: str, review_file: Optional[str], shard: Optional[Shard] = None
+) -> Path:
+    if review_file:
+        return Path(review_file)
+    name = REVIEW_FILE_NAME
+    if shard is not None:
+        name = f"review.shard-{shard.index}-of-{shard.count}.jsonl"
+    return file_utils.get_cache_dir(project_dir) / name
+
+
+class ReviewFileWriter:
+    """
+    Writes generated documentation to a review file as JSON lines, one
+    entry per function, as it is generated. Each line is flushed so a
+    killed run keeps everything written before it. Safe to call from
+    several threads.
+    """
+
+    def __init__(self, path: Path, shard: Optional[Shard] = None):
+        self._path = Path(path)
+        self._shard = shard
+        self._lock = threading.Lock()
+        self._file = None
+        self.count = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def open(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._path, "w", encoding="utf8")
+        header = {"version": REVIEW_FILE_VERSION}
+        if self._shard is not None:
+            header["shard"] = str(self._shard)
+        self._file.write(json.dumps(header) + "\n")
+
+    def write(self, entry: ReviewEntry):
+        line = json.dumps(entry.to_record()) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _read_header(f, path: Path) -> dict:
+    try:
+        header = json.loads(f.readline() or "{}")
+    except ValueError:
+        header = {}
+    if header.get("version") != REVIEW_FILE_VERSION:
+        raise ValueError(
+            f"Unsupported review file version {header.get('version')} in {path}."
+        )
+    return header
+
+
+def read_review_file_header(path: Path) -> dict:
+    """
+    Returns the header of a review file: its version, and for sharded runs
+    the shard that wrote it.
+
+    Raises:
+        FileNotFoundError: If there is no review file.
+        ValueError: If it was written by an incompatible version.
+    """
+    with open(path, "r", encoding="utf8") as f:
+        return _read_header(f, path)
+
+
+def load_review_file(path: Path) -> List[ReviewEntry]:
+    """
+    Reads the entries of a review file.
+
+    Raises:
+        FileNotFoundError: If there is no review file.
+        ValueError: If it was written by an incompatible version.
+    """
+    entries = []
+    with open(path, "r", encoding="utf8") as f:
+        _read_header(f, path)
+        for line in f:
+            try:
+                entries.append(ReviewEntry.from_record(json.loads(line)))
+            except (ValueError, KeyError):
+                # A killed generate run can leave a partially written last line
+                continue
+    return entries
+
+
+def save_review_file(path: Path, entries: List[ReviewEntry]):
+    """Rewrites a review file atomically, e.g. with review decisions."""
+    lines = [json.dumps({"version": REVIEW_FILE_VERSION})]
+    lines += [json.dumps(entry.to_record()) for entry in entries]
+    file_utils.write_file_atomic(
+        path, ("\n".join(lines) + "\n").encode("utf8"), sync=False
+    )
+
+
+def _get_functions(
+    parser: BaseParser, file_path: str
+) -> Optional[Dict[str, FunctionContextModel]]:
+    func_contexts = parser.parse(Path(file_path), ["*"])
+    if func_contexts is None:
+        return None
+    return {
+        func_context[0].qualified_name: func_context[0]
+        for func_context in func_contexts
+    }
+
+
+def _is_current(entry: ReviewEntry, functions: Optional[dict]) -> bool:
+    """
+    Whether the entry's function is unchanged, moving its documentation to
+    the function's current line if it only moved.
+    """
+    context = (functions or {}).get(entry.doc.qualified_name)
+    if context is None:
+        return False
+    if hash_utils.get_function_fingerprint(context) != entry.fingerprint:
+        return False
+    # Documented by someone else since
+    if context.docstring != entry.docstring:
+        return False
+    entry.doc.start_line = context.start_line
+    return True
+
+
+def _group_by_file(entries: List[ReviewEntry]) -> Dict[str, List[ReviewEntry]]:
+    files: Dict[str, List[ReviewEntry]] = {}
+    for entry in entries:
+        files.setdefault(entry.doc.file_path, []).append(entry)
+    return files
+
+
+def mark_stale(entries: List[ReviewEntry], parser: BaseParser) -> List[ReviewEntry]:
+    """
+    Marks pending and accepted entries whose function changed since the
+    documentation was generated as stale, so they are not reviewed.
+
+    Returns:
+        List[ReviewEntry]: the entries that were marked stale
+    """
+    stale = []
+    open_statuses = (ReviewStatus.PENDING.value, ReviewStatus.ACCEPTED.value)
+    for file_path, file_entries in _group_by_file(
+        [entry for entry in entries if entry.status in open_statuses]
+    ).items():
+        functions = _get_functions(parser, file_path)
+        for entry in file_entries:
+            if not _is_current(entry, functions):
+                entry.status = ReviewStatus.STALE.value
+                stale.append(entry)
+    return stale
+
+
+def apply_entries(
+    entries: List[ReviewEntry], parser: BaseParser, committer: FileCommitter
+) -> ApplyResult:
+    """
+    Writes the documentation of `entries` into their files, one write per
+    file, and marks them applied. Entries whose function changed since
+    generation are marked stale and left out.
+
+    Args:
+        entries (List[ReviewEntry]): entries to write
+        parser (BaseParser): parser for the project's language
+        committer (FileCommitter): writes the files
+
+    Returns:
+        ApplyResult: applied and stale entries, and files that failed
+    """
+    result = ApplyResult()
+    for file_path, file_entries in _group_by_file(entries).items():
+        try:
+            file_buffer = FileBuffer.read(file_path)
+        except OSError:
+            file_buffer = None  # Deleted since generation, so its entries are stale
+        functions = _get_functions(parser, file_path) if file_buffer else None
+        current = []
+        for entry in file_entries:
+            if _is_current(entry, functions):
+                current.append(entry)
+            else:
+                entry.status = ReviewStatus.STALE.value
+                result.stale.append(entry)
+        if not current:
+            continue
+        try:
+            committer.write_docs(
+                file_path, [entry.doc for entry in current], file_buffer
+            )
+        except (OSError, ValueError) as e:
+            result.errors.append(e)
+            continue
+        for entry in current:
+            entry.status = ReviewStatus.APPLIED.value
+        result.applied += current
+    return result
+
+
+def _get_parser(settings: DocmancerConfig, presenter: Presenter):
+    parser = ParserFactory().get_parser(language=settings.language)
+    if parser is None:
+        presenter.print_error(f"Language '{settings.language}' is not supported.")
+    return parser
+
+
+def _load(settings: DocmancerConfig, presenter: Presenter):
+    path = get_review_file_path(
+        settings.project_dir, settings.review_file, settings.get_shard()
+    )
+    try:
+        entries = load_review_file(path)
+    except FileNotFoundError:
+        presenter.print_error(
+            f"No review file at {path}. Run `docmancer generate` to write one."
+        )
+        return path, None, None
+    parser = _get_parser(settings, presenter)
+    if parser is None:
+        return path, None, None
+    return path, entries, parser
+
+
+def _apply_and_save(
+    settings: DocmancerConfig,
+    path: Path,
+    entries: List[ReviewEntry],
+    to_apply: List[ReviewEntry],
+    parser: BaseParser,
+    presenter: Presenter,
+) -> int:
+    committer = FileCommitter(RollbackJournal.for_new_run(settings.project_dir))
+    try:
+        result = apply_entries(to_apply, parser, committer)
+    finally:
+        committer.finish()
+        save_review_file(path, entries)
+    for entry in result.stale:
+        presenter.print_message(
+            f"{entry.doc.file_path}: {entry.doc.qualified_name} changed since it "
+            "was generated. Not written."
+        )
+    for e in result.errors:
+        presenter.print_error(str(e))
+    presenter.print_success(
+        f"Wrote {len(result.applied)} functions to "
+        f"{committer.files_committed} files"
+    )
+    return 1 if result.errors else 0
+
+
+def _review_entries(
+    entries: List[ReviewEntry],
+    presenter: Presenter,
+    batch: bool,
+    metrics: MetricsRecorder,
+):
+    """Asks the reviewer about `entries`, one at a time or a file at a time."""
+    batches = _group_by_file(entries) if batch else {None: entries}
+    for file_path, file_entries in batches.items():
+        groups = [file_entries] if batch else [[entry] for entry in file_entries]
+        for group in groups:
+            start = time.perf_counter()
+            if batch:
+                responses = presenter.review_batch(
+                    file_path, [entry.doc for entry in group]
+                )
+            else:
+                responses = [presenter.get_user_approval(group[0].doc)]
+            seconds = (time.perf_counter() - start) / len(group)
+            quit = False
+            for entry, response in zip(group, responses):
+                if response.response == UserResponse.QUIT:
+                    quit = True
+                    continue
+                metrics.observe("review_seconds", seconds)
+                metrics.add("reviews", decision=response.response.name.lower())
+                if response.response == UserResponse.ACCEPT:
+                    entry.status = ReviewStatus.ACCEPTED.value
+                else:
+                    entry.status = ReviewStatus.SKIPPED.value
+            if quit:
+                return
+
+
+def run_review(
+    settings: DocmancerConfig,
+    presenter: Presenter,
+    metrics: MetricsRecorder = NULL_METRICS,
+) -> int:
+    """
+    Runs `review`: shows each pending entry of the review file for approval,
+    then writes the accepted ones. Functions that changed since generation
+    are not shown. Decisions are saved to the review file, so quitting and
+    running `review` again continues where the reviewer stopped.
+
+    Returns:
+        int: process exit code
+    """
+    path, entries, parser = _load(settings, presenter)
+    if entries is None:
+        return 1
+    mark_stale(entries, parser)
+    _review_entries(
+        [entry for entry in entries if entry.status == ReviewStatus.PENDING.value],
+        presenter,
+        settings.review_mode == ReviewMode.BATCH.value,
+        metrics,
+    )
+    presenter.clear_console()
+    accepted = [e for e in entries if e.status == ReviewStatus.ACCEPTED.value]
+    return _apply_and_save(settings, path, entries, accepted, parser, presenter)
+
+
+def run_apply(settings: DocmancerConfig, presenter: Presenter) -> int:
+    """
+    Runs `apply`: writes every entry of the review file that is pending or
+    accepted, skipping functions that changed since generation.
+
+    Returns:
+        int: process exit code
+    """
+    path, entries, parser = _load(settings, presenter)
+    if entries is None:
+        return 1
+    open_statuses = (ReviewStatus.PENDING.value, ReviewStatus.ACCEPTED.value)
+    to_apply = [entry for entry in entries if entry.status in open_statuses]
+    return _apply_and_save(settings, path, entries, to_apply, parser, presenter)
+
+
+def check_shards(headers: Dict[str, dict]) -> List[str]:
+    """
+    Checks that review files written by sharded runs are one complete set
+    of shards.
+
+    Args:
+        headers (Dict[str, dict]): header of each review file by path
+
+    Returns:
+        List[str]: the problems found, empty if the set is complete or no
+            file came from a sharded run
+    """
+    shards: Dict[str, Shard] = {}
+    for path, header in headers.items():
+        if header.get("shard"):
+            shards[path] = Shard.parse(header["shard"])
+    if not shards:
+        return []
+    problems = []
+    unsharded = [path for path in headers if path not in shards]
+    if unsharded:
+        problems.append(f"Not written by a sharded run: {', '.join(unsharded)}")
+    counts = sorted({shard.count for shard in shards.values()})
+    if len(counts) > 1:
+        problems.append(f"Review files come from runs split {counts} ways")
+        return problems
+    paths_by_index: Dict[int, List[str]] = {}
+    for path, shard in shards.items():
+        paths_by_index.setdefault(shard.index, []).append(path)
+    for index, paths in sorted(paths_by_index.items()):
+        if len(paths) > 1:
+            problems.append(f"Shard {index}/{counts[0]} is in {', '.join(paths)}")
+    missing = [
+        f"{index}/{counts[0]}"
+        for index in range(1, counts[0] + 1)
+        if index not in paths_by_index
+    ]
+    if missing:
+        problems.append(f"Missing shards {', '.join(missing)}")
+    return problems
+
+
+def run_merge(settings: DocmancerConfig, presenter: Presenter) -> int:
+    """
+    Runs `merge`: combines the review files of sharded `generate` runs into
+    the project's review file and writes every entry that was not rejected,
+    in one step that `rollback` can undo. Functions that changed since they
+    were generated are left out, as with `apply`.
+
+    Returns:
+        int: process exit code
+    """
+    if not settings.merge_files:
+        presenter.print_error("Pass the review files to merge.")
+        return 1
+    headers = {}
+    entries: List[ReviewEntry] = []
+    seen = set()
+    duplicates = 0
+    try:
+        for merge_file in settings.merge_files:
+            headers[merge_file] = read_review_file_header(Path(merge_file))
+            for entry in load_review_file(Path(merge_file)):
+                key = (str(entry.doc.file_path), entry.doc.qualified_name)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                entries.append(entry)
+    except (OSError, ValueError) as e:
+        presenter.print_error(f"Unable to read review file: {e}")
+        return 1
+    problems = check_shards(headers)
+    for problem in problems:
+        presenter.print_error(problem)
+    if problems:
+        presenter.print_error("Nothing was written.")
+        return 1
+    if duplicates:
+        presenter.print_message(
+            f"{duplicates} functions were in more than one review file. "
+            "The first review file's documentation is used."
+        )
+    parser = _get_parser(settings, presenter)
+    if parser is None:
+        return 1
+    path = get_review_file_path(settings.project_dir, settings.review_file)
+    presenter.print_message(
+        f"Merged {len(entries)} functions from {len(headers)} review files into {path}"
+    )
+    open_statuses = (ReviewStatus.PENDING.value, ReviewStatus.ACCEPTED.value)
+    to_apply = [entry for entry in entries if entry.status in open_statuses]
+    return _apply_and_save(settings, path, entries, to_apply, parser, presenter)
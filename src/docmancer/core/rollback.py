@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import docmancer.utils.file_utils as file_utils
+
+ROLLBACK_DIR_NAME = "rollback"
+ROLLBACK_JOURNAL_NAME = "journal.jsonl"
+ROLLED_BACK_SUFFIX = ".rolled-back"
+
+# Backups and journal records are fsynced together once per batch
+FSYNC_BATCH_SIZE = 32
+
+
+@dataclass
+class RollbackResult:
+    run_id: Optional[str] = None
+    restored: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)  # Changed since the run
+
+
+class RollbackJournal:
+    """
+    Keeps a copy of every file a run overwrites so `docmancer rollback` can
+    restore the originals. Each run writes to its own directory under
+    .docmancer/rollback, which is only created once the first file is saved.
+    """
+
+    def __init__(self, run_dir: Path, fsync_batch_size: int = FSYNC_BATCH_SIZE):
+        self._run_dir = Path(run_dir)
+        self._fsync_batch_size = max(1, fsync_batch_size)
+        self._lock = threading.Lock()
+        self._journal = None
+        self._count = 0
+        self._unsynced: List[Path] = []
+
+    @classmethod
+    def for_new_run(cls, project_dir: str) -> "RollbackJournal":
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return cls(file_utils.get_cache_dir(project_dir) / ROLLBACK_DIR_NAME / run_id)
+
+    def record(self, file_path, original: bytes, new_hash: str):
+        """
+        Saves the original content of a file before it is overwritten.
+
+        Args:
+            file_path: path of the file being committed
+            original (bytes): the file's content before the commit
+            new_hash (str): sha256 of the content being written
+        """
+        with self._lock:
+            if self._journal is None:
+                self._run_dir.mkdir(parents=True, exist_ok=True)
+                self._journal = open(
+                    self._run_dir / ROLLBACK_JOURNAL_NAME, "a", encoding="utf8"
+                )
+            self._count += 1
+            backup_path = self._run_dir / f"{self._count:06d}.orig"
+            with open(backup_path, "wb") as f:
+                f.write(original)
+            record = {
+                "file": str(Path(file_path).absolute()),
+                "backup": backup_path.name,
+                "original_hash": hashlib.sha256(original).hexdigest(),
+                "new_hash": new_hash,
+            }
+            self._journal.write(json.dumps(record) + "\n")
+            self._journal.flush()
+            self._unsynced.append(backup_path)
+            if len(self._unsynced) >= self._fsync_batch_size:
+                self._sync()
+
+    def _sync(self):
+        for backup_path in self._unsynced:
+            fd = os.open(backup_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._unsynced = []
+        os.fsync(self._journal.fileno())
+        file_utils.sync_directory(self._run_dir)
+
+    def close(self):
+        with self._lock:
+            if self._journal is None:
+                return
+            self._sync()
+            self._journal.close()
+            self._journal = None
+
+
+def rollback_latest_run(project_dir: str) -> RollbackResult:
+    """
+    Restores the files changed by the most recent run that has not been
+    rolled back yet. Files that were modified after that run are left alone
+    and reported as skipped.
+
+    Args:
+        project_dir (str): root directory of the documented project
+
+    Returns:
+        RollbackResult: restored and skipped file paths
+    """
+    result = RollbackResult()
+    rollback_dir = file_utils.get_cache_dir(project_dir) / ROLLBACK_DIR_NAME
+    if not rollback_dir.is_dir():
+        return result
+    runs = sorted(
+        run_dir
+        for run_dir in rollback_dir.iterdir()
+        if run_dir.is_dir() and not run_dir.name.endswith(ROLLED_BACK_SUFFIX)
+    )
+    if not runs:
+        return result
+    run_dir = runs[-1]
+    result.run_id = run_dir.name
+
+    with open(run_dir / ROLLBACK_JOURNAL_NAME, "r", encoding="utf8") as f:
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    # Undo in reverse order in case a file was committed more than once
+    for record in reversed(records):
+        file_path = record["file"]
+        try:
+            with open(file_path, "rb") as f:
+                current_hash = hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            current_hash = None
+        if current_hash != record["new_hash"]:
+            result.skipped.append(file_path)
+            continue
+        with open(run_dir / record["backup"], "rb") as f:
+            original = f.read()
+        file_utils.write_file_atomic(file_path, original)
+        result.restored.append(file_path)
+
+    os.replace(run_dir, run_dir.with_name(run_dir.name + ROLLED_BACK_SUFFIX))
+    return result
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Set, Tuple
+import docmancer.utils.file_utils as file_utils
+
+DEFERRED_FILE_NAME = "deferred.json"
+
+
+class RunBudget:
+    """
+    Limits how much new generation work a run dispatches, by wall-clock
+    time since the run started and by number of functions. Work already in
+    progress when the budget runs out is allowed to finish.
+    """
+
+    def __init__(
+        self,
+        time_budget: Optional[float] = None,
+        max_functions: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._time_budget = time_budget  # Seconds, unlimited if None
+        self._max_functions = max_functions  # Unlimited if None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._start = clock()
+        self._exhausted = False
+        self.dispatched = 0
+
+    @property
+    def limited(self) -> bool:
+        return self._time_budget is not None or self._max_functions is not None
+
+    @property
+    def exhausted(self) -> bool:
+        return self._exhausted
+
+    def try_acquire(self) -> bool:
+        """
+        Claims budget for generating one function.
+
+        Returns:
+            bool: False once the time or function budget is used up. A budget
+                stays exhausted for the rest of the run so work is never
+                dispatched out of priority order.
+        """
+        with self._lock:
+            if self._exhausted:
+                return False
+            if (
+                self._max_functions is not None
+                and self.dispatched >= self._max_functions
+            ) or (
+                self._time_budget is not None
+                and self._clock() - self._start >= self._time_budget
+            ):
+                self._exhausted = True
+                return False
+            self.dispatched += 1
+            return True
+
+
+def get_deferred_path(project_dir: str) -> Path:
+    return file_utils.get_cache_dir(project_dir) / DEFERRED_FILE_NAME
+
+
+def load_deferred(project_dir: str) -> Set[Tuple[str, str]]:
+    """
+    Returns (file path, qualified name) of the functions the previous run
+    deferred, or an empty set if it finished everything.
+    """
+    path = get_deferred_path(project_dir)
+    if not path.is_file():
+        return set()
+    try:
+        with open(path, "r", encoding="utf8") as f:
+            report = json.load(f)
+        return {(entry["file"], entry["name"]) for entry in report["functions"]}
+    except (ValueError, KeyError, TypeError):
+        return set()
+
+
+def save_deferred(project_dir: str, deferred: List[Tuple[str, str]]):
+    """
+    Records the functions a run did not get to. The report is removed when
+    nothing was deferred so finished work is not prioritized again.
+
+    Args:
+        project_dir (str): root directory of the documented project
+        deferred (List[Tuple[str, str]]): (file path, qualified name) pairs
+    """
+    path = get_deferred_path(project_dir)
+    if not deferred:
+        path.unlink(missing_ok=True)
+        return
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "functions": [
+            {"file": file_path, "name": name} for file_path, name in sorted(deferred)
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file_utils.write_file_atomic(
+        path, json.dumps(report, indent=2).encode("utf8"), sync=False
+    )
@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from docmancer.models.function_summary import FunctionSummaryModel
+
+JOURNAL_FILE_NAME = "journal.jsonl"
+
+# Records are written to the OS immediately so they survive a killed process.
+# fsync, which protects against power loss, only runs once per batch.
+FSYNC_BATCH_SIZE = 32
+
+
+class JournalEvent(Enum):
+    GENERATED = "generated"
+    REVIEWED = "reviewed"
+    COMMITTED = "committed"
+
+
+@dataclass
+class ReviewDecision:
+    approved: bool
+    formatted_documentation: List[str]
+
+
+@dataclass
+class JournalState:
+    """Work recorded by a previous run, rebuilt by RunJournal.replay."""
+
+    summaries: Dict[Tuple[str, str, str], FunctionSummaryModel] = field(
+        default_factory=dict
+    )
+    reviews: Dict[Tuple[str, str, str], ReviewDecision] = field(default_factory=dict)
+    committed_files: Dict[str, str] = field(default_factory=dict)  # path -> hash
+
+
+class RunJournal:
+    """
+    Append-only JSON lines log of a documentation run.
+
+    Each function's generated summary and review decision is recorded under
+    (file path, qualified name, fingerprint), and each finished file is
+    recorded with the hash it had after commit. A later run started with
+    --resume replays the log to skip work that was already done.
+    """
+
+    def __init__(self, path: Path, fsync_batch_size: int = FSYNC_BATCH_SIZE):
+        self._path = Path(path)
+        self._fsync_batch_size = max(1, fsync_batch_size)
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def open(self, resume: bool = False) -> JournalState:
+        """
+        Opens the journal for writing.
+
+        Args:
+            resume (bool): keep and replay existing records instead of
+                starting a new journal
+
+        Returns:
+            JournalState: recorded work, empty unless resuming
+        """
+        state = self.replay() if resume else JournalState()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._path, "a" if resume else "w", encoding="utf8")
+        return state
+
+    def replay(self) -> JournalState:
+        state = JournalState()
+        if not self._path.is_file():
+            return state
+        with open(self._path, "r", encoding="utf8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    event = JournalEvent(record["event"])
+                except (ValueError, KeyError):
+                    # A crash can leave a partially written last line
+                    continue
+                if event == JournalEvent.COMMITTED:
+                    state.committed_files[record["file"]] = record["hash"]
+                    continue
+                key = (record["file"], record["name"], record["fingerprint"])
+                if event == JournalEvent.GENERATED:
+                    state.summaries[key] = FunctionSummaryModel.from_dict(
+                        record["summary"]
+                    )
+                elif event == JournalEvent.REVIEWED:
+                    state.reviews[key] = ReviewDecision(
+                        approved=record["approved"],
+                        formatted_documentation=record["documentation"],
+                    )
+        return state
+
+    def record_generated(
+        self, key: Tuple[str, str, str], summary: FunctionSummaryModel
+    ):
+        self._append(JournalEvent.GENERATED, key, summary=summary.to_dict())
+
+    def record_reviewed(
+        self, key: Tuple[str, str, str], approved: bool, documentation: List[str]
+    ):
+        self._append(
+            JournalEvent.REVIEWED,
+            key,
+            approved=approved,
+            documentation=documentation,
+        )
+
+    def record_committed(self, file_path: str, file_hash: str):
+        self._write(
+            {
+                "event": JournalEvent.COMMITTED.value,
+                "file": file_path,
+                "hash": file_hash,
+            },
+            sync=True,
+        )
+
+    def _append(self, event: JournalEvent, key: Tuple[str, str, str], **values):
+        file_path, name, fingerprint = key
+        record = {
+            "event": event.value,
+            "file": file_path,
+            "name": name,
+            "fingerprint": fingerprint,
+        }
+        record.update(values)
+        self._write(record)
+
+    def _write(self, record: dict, sync: bool = False):
+        if self._file is None:
+            return
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if sync or self._unsynced >= self._fsync_batch_size:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
@@ -0,0 +1,57 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    One of `count` disjoint parts of a project, numbered from 1, so a run
+    can be split over several machines. Whole files are assigned to a shard
+    by a hash of their path relative to the project, which is the same on
+    every machine and in every run, so shards never write the same file.
+    """
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """
+        Reads a shard written as "i/N", e.g. "3/8".
+
+        Raises:
+            ValueError: If the text is not a shard from 1/N to N/N.
+        """
+        index, separator, count = text.strip().partition("/")
+        try:
+            shard = cls(int(index), int(count))
+        except ValueError:
+            shard = None
+        if not separator or shard is None or not 1 <= shard.index <= shard.count:
+            raise ValueError(
+                f"Invalid shard '{text}'. Use i/N with 1 <= i <= N, e.g. 3/8."
+            )
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def contains(self, file_path, project_dir: str) -> bool:
+        return get_shard_index(file_path, project_dir, self.count) == self.index
+
+
+def get_shard_index(file_path, project_dir: str, count: int) -> int:
+    """
+    Returns the shard, from 1 to `count`, that a file belongs to.
+
+    Args:
+        file_path: path of the file, absolute or relative to the working
+            directory
+        project_dir (str): root of the project the shards split
+        count (int): number of shards
+    """
+    relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(project_dir))
+    digest = hashlib.sha256(Path(relative).as_posix().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+import docmancer.utils.file_utils as file_utils
+
+# About 100 MB of buffered events at ~400 bytes each. Later events are
+# counted but dropped.
+MAX_TRACE_EVENTS = 250_000
+
+# (name, category, start, duration, thread id, args); times in perf_counter seconds
+TraceEvent = Tuple[str, str, float, float, int, dict]
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Buffers timed spans in memory and writes them in the Chrome Trace Event
+    format, which chrome://tracing and https://ui.perfetto.dev open as a
+    per-thread timeline.
+
+    A disabled tracer ignores everything, and its `span` returns a shared
+    no-op context manager. Safe to call from several threads.
+    """
+
+    def __init__(self, enabled: bool = True, max_events: int = MAX_TRACE_EVENTS):
+        self.enabled = enabled
+        self._max_events = max_events
+        self._events: List[TraceEvent] = []
+        self._threads: Dict[int, str] = {}
+        self._start = time.perf_counter()
+        self.dropped = 0
+
+    def span(self, name: str, category: str = "engine", **args):
+        """Context manager that records its block as a span on this thread."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, category, args)
+
+    @contextmanager
+    def _span(self, name: str, category: str, args: dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), category, **args)
+
+    def record(
+        self, name: str, start: float, end: float, category: str = "engine", **args
+    ):
+        """Records a span that was timed with time.perf_counter()."""
+        if not self.enabled:
+            return
+        if len(self._events) >= self._max_events:
+            self.dropped += 1
+            return
+        thread_id = threading.get_ident()
+        if thread_id not in self._threads:
+            self._threads[thread_id] = threading.current_thread().name
+        # list.append is atomic, so threads do not need a lock to add events
+        self._events.append((name, category, start, end - start, thread_id, args))
+
+    def get_trace(self) -> dict:
+        pid = os.getpid()
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            }
+            for thread_id, thread_name in list(self._threads.items())
+        ]
+        for name, category, start, duration, thread_id, args in list(self._events):
+            events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": round((start - self._start) * 1e6, 3),
+                    "dur": round(duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": args,
+                }
+            )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+
+    def write(self, path):
+        """Writes the trace atomically, creating the parent directory if needed."""
+        path = os.fspath(path)
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        file_utils.write_file_atomic(
+            path, json.dumps(self.get_trace()).encode("utf8"), sync=False
+        )
+
+
+NULL_TRACER = Tracer(enabled=False)
@@ -0,0 +1,337 @@
+"""
+`docmancer watch`: suggests documentation for functions as they are edited.
+
+The parser, index and model are loaded once. Each time a file is saved it
+is parsed again, and undocumented functions whose fingerprint changed are
+summarized. Suggestions go to a review file, never to the source file the
+editor has open, and can be looked at with `docmancer review --out` or
+written with `docmancer apply --out`.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from docmancer.config import DocmancerConfig
+from docmancer.core.functional_context_database import FunctionalContextDatabase
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.core.presenter import Presenter
+from docmancer.core.review_file import (
+    ReviewEntry,
+    ReviewStatus,
+    load_review_file,
+    save_review_file,
+)
+from docmancer.formatter.formatter_base import FormatterBase
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.parser.base_parser import BaseParser
+from docmancer.utils.file_buffer import FileBuffer
+from docmancer.utils.file_watcher import FileChanges, FileWatcher
+import docmancer.utils.file_utils as file_utils
+import docmancer.utils.hash_utils as hash_utils
+
+SUGGESTIONS_FILE_NAME = "suggestions.jsonl"
+IDLE_WAIT_SECONDS = 0.5  # How often a stop request is noticed
+
+
+def get_suggestions_file_path(project_dir: str, review_file: Optional[str]) -> Path:
+    if review_file:
+        return Path(review_file)
+    return file_utils.get_cache_dir(project_dir) / SUGGESTIONS_FILE_NAME
+
+
+class WatchSession:
+    """
+    Keeps the functions of the watched files, by fingerprint, and the
+    suggestions made for them.
+
+    File paths are relative to the working directory, as in a run, and only
+    files matching `settings.files` are parsed. A function is summarized
+    when it has no docstring and its fingerprint differs from the one last
+    seen, so saving a file only costs model time for the functions that
+    were edited. Summaries already in the index for a fingerprint are
+    reused, e.g. after an edit is undone.
+    """
+
+    def __init__(
+        self,
+        settings: DocmancerConfig,
+        parser: BaseParser,
+        generator: DocumentationGenerator,
+        formatter: FormatterBase,
+        presenter: Presenter,
+        index: Optional[FunctionalContextDatabase] = None,
+        metrics: MetricsRecorder = NULL_METRICS,
+    ):
+        self._settings = settings
+        self._parser = parser
+        self._generator = generator
+        self._formatter = formatter
+        self._presenter = presenter
+        # A file's functions are only indexed when all of them are parsed
+        self._index = index if "*" in settings.functions else None
+        self._metrics = metrics
+        self._path = get_suggestions_file_path(
+            settings.project_dir, settings.review_file
+        )
+        self._functions: Dict[str, Dict[str, str]] = {}  # file -> name -> fingerprint
+        self._hashes: Dict[str, str] = {}  # Of each file when it was last handled
+        self._entries: Dict[Tuple[str, str], ReviewEntry] = {}
+        if self._path.exists():
+            for entry in load_review_file(self._path):
+                key = (str(entry.doc.file_path), entry.doc.qualified_name)
+                self._entries[key] = entry
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def suggestions(self) -> List[ReviewEntry]:
+        return list(self._entries.values())
+
+    def is_watched(self, file_path) -> bool:
+        """Whether a path relative to the working directory is documented."""
+        return any(
+            file_utils.matches_glob(file_path, pattern)
+            for pattern in self._settings.files
+        ) and not any(
+            file_utils.matches_glob(file_path, pattern)
+            for pattern in self._settings.ignore_files
+        )
+
+    def get_watched_files(self) -> List[Path]:
+        files = set()
+        for pattern in self._settings.files:
+            files.update(file_utils.get_files_by_pattern(pattern))
+        return sorted(f for f in files if f.is_file() and self.is_watched(f))
+
+    def scan(self) -> int:
+        """
+        Parses every watched file to learn its functions, without
+        summarizing any. Returns the number of functions found.
+        """
+        count = 0
+        for file_path in self.get_watched_files():
+            file_buffer = FileBuffer.read(file_path)
+            contexts = self._parse(file_path, file_buffer)
+            if contexts is None:
+                continue
+            self._functions[str(file_path)] = {
+                context.qualified_name: hash_utils.get_function_fingerprint(context)
+                for context in contexts
+            }
+            self._hashes[str(file_path)] = file_buffer.hash
+            self._drop_outdated(file_path, contexts)
+            count += len(contexts)
+        self._save()
+        return count
+
+    def _parse(
+        self, file_path: Path, file_buffer: FileBuffer
+    ) -> Optional[List[FunctionContextModel]]:
+        with self._metrics.time("parse_seconds"):
+            func_contexts = self._parser.parse(file_path, self._settings.functions)
+        if func_contexts is None:
+            self._metrics.add("parse_errors")
+            self._presenter.print_error(f"Unable to parse {file_path}")
+            return None
+        contexts = [func_context[0] for func_context in func_contexts]
+        examples = self._generator.examples
+        if examples is not None:
+            for context in contexts:
+                examples.add(file_path, context)
+        if self._index is not None:
+            self._index.index_file(file_path, contexts, file_buffer.hash)
+        return contexts
+
+    def _drop_outdated(self, file_path, contexts: List[FunctionContextModel]):
+        """
+        Drops suggestions for functions of a file that were removed, were
+        documented, or changed since the suggestion was made.
+        """
+        current = {
+            context.qualified_name: context
+            for context in contexts
+            if context.docstring is None
+        }
+        for key in [key for key in self._entries if key[0] == str(file_path)]:
+            context = current.get(key[1])
+            if context is None or self._entries[key].fingerprint != (
+                hash_utils.get_function_fingerprint(context)
+            ):
+                del self._entries[key]
+
+    def _save(self):
+        save_review_file(self._path, list(self._entries.values()))
+
+    def update_file(
+        self,
+        file_path: Path,
+        changed_at: Optional[float] = None,
+        interrupted: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """
+        Handles a change to a file: parses it again and suggests
+        documentation for its changed undocumented functions.
+
+        Args:
+            file_path (Path): path relative to the working directory
+            changed_at (float): Unix time the change was seen, to measure
+                how long the suggestions took
+            interrupted: called between functions. If it returns True the
+                file is left for the next call, e.g. because it was saved
+                again
+
+        Returns:
+            bool: False if the file was interrupted before all its
+                functions were handled
+        """
+        changed_at = changed_at or time.time()
+        key = str(file_path)
+        if not file_path.is_file():
+            self._forget(file_path)
+            return True
+        file_buffer = FileBuffer.read(file_path)
+        if self._hashes.get(key) == file_buffer.hash:
+            return True  # Saved without changes, or touched
+        contexts = self._parse(file_path, file_buffer)
+        if contexts is None:
+            return True
+        known = self._functions.setdefault(key, {})
+        names = {context.qualified_name for context in contexts}
+        for name in [name for name in known if name not in names]:
+            del known[name]
+        changed = []
+        for context in contexts:
+            fingerprint = hash_utils.get_function_fingerprint(context)
+            if context.docstring is None and known.get(context.qualified_name) != (
+                fingerprint
+            ):
+                changed.append((context, fingerprint))
+            else:
+                known[context.qualified_name] = fingerprint
+        self._drop_outdated(file_path, contexts)
+        self._save()
+        for context, fingerprint in changed:
+            if interrupted is not None and interrupted():
+                return False
+            # Handled even when no summary is made, so a failing function is
+            # not retried until it is edited again
+            known[context.qualified_name] = fingerprint
+            entry = self._suggest(file_path, file_buffer, context, fingerprint)
+            if entry is None:
+                continue
+            self._entries[(key, context.qualified_name)] = entry
+            self._save()
+            latency = time.time() - changed_at
+            self._metrics.observe("watch_latency_seconds", latency)
+            self._presenter.print_message(
+                f"{file_path}: suggested documentation for "
+                f"{context.qualified_name} ({latency:.1f}s after saving)"
+            )
+        self._hashes[key] = file_buffer.hash
+        return True
+
+    def _suggest(
+        self,
+        file_path: Path,
+        file_buffer: FileBuffer,
+        context: FunctionContextModel,
+        fingerprint: str,
+    ) -> Optional[ReviewEntry]:
+        summary = None
+        if self._index is not None:
+            summary = self._index.get_summary(
+                file_path, context.qualified_name, fingerprint
+            )
+        if summary is not None:
+            self._metrics.add("cache_hits", cache="index_summary")
+        else:
+            try:
+                summary = self._generator.generate_summary(context)
+            except Exception as e:
+                self._presenter.print_error(
+                    f"{file_path}: {context.qualified_name}: {e}"
+                )
+                return None
+            if summary is None:
+                return None
+            if self._index is not None:
+                self._index.record_summary(
+                    file_path, context.qualified_name, fingerprint, summary
+                )
+        doc = self._formatter.get_formatted_documentation(
+            func_context=context,
+            func_summary=summary,
+            file_path=file_path,
+            file_buffer=file_buffer,
+        )
+        return ReviewEntry(
+            fingerprint=fingerprint,
+            doc=doc,
+            docstring=context.docstring,
+            status=ReviewStatus.PENDING.value,
+        )
+
+    def _forget(self, file_path: Path):
+        key = str(file_path)
+        self._functions.pop(key, None)
+        self._hashes.pop(key, None)
+        if self._index is not None:
+            self._index.index_file(file_path, [])
+        before = len(self._entries)
+        self._drop_outdated(file_path, [])
+        if len(self._entries) != before:
+            self._save()
+
+    def run(self, watcher: FileWatcher, stop: Optional[threading.Event] = None):
+        """
+        Handles changes reported by a watcher until `stop` is set. Files
+        are handled in the order they were saved. A file saved again while
+        its functions are being summarized is parsed again before the rest
+        of them are summarized.
+        """
+        stop = stop or threading.Event()
+        pending: Dict[Path, float] = {}  # File -> when its change was seen
+        debounce = self._settings.watch_debounce
+        while not stop.is_set():
+            changes = watcher.get_changes(
+                timeout=0 if pending else IDLE_WAIT_SECONDS, debounce=debounce
+            )
+            self._add_pending(pending, changes)
+            if not pending:
+                continue
+            file_path = next(iter(pending))
+            changed_at = pending.pop(file_path)
+
+            def interrupted() -> bool:
+                return stop.is_set() or any(
+                    self._get_relative_path(path) == file_path
+                    for path in watcher.poll().paths
+                )
+
+            if not self.update_file(file_path, changed_at, interrupted):
+                pending.setdefault(file_path, changed_at)
+
+    def _add_pending(self, pending: Dict[Path, float], changes: FileChanges):
+        if not changes:
+            return
+        paths: Set[Path] = set()
+        if changes.rescan:
+            paths.update(self.get_watched_files())
+            paths.update(Path(file_path) for file_path in self._functions)
+        for path in changes.paths:
+            relative = self._get_relative_path(path)
+            if relative is not None and self.is_watched(relative):
+                paths.add(relative)
+        for file_path in sorted(paths):
+            pending.setdefault(file_path, changes.first_seen or time.time())
+
+    def _get_relative_path(self, path: Path) -> Optional[Path]:
+        relative = Path(os.path.relpath(path))
+        if relative.parts and relative.parts[0] == os.pardir:
+            return None
+        return relative
@@ -0,0 +1,509 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.examples import FunctionExample
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+
+# Bumped when the schema changes. A queue only holds one run's jobs, so a
+# queue of another version is dropped, not migrated.
+SCHEMA_VERSION = 1
+
+DEFAULT_LEASE_SECONDS = 300.0  # Renewed by the worker while it generates
+DEFAULT_MAX_ATTEMPTS = 3  # Leases of a job before it is given up
+POLL_SECONDS = 1.0  # Between a worker's checks of an empty queue
+COLLECT_SECONDS = 0.25  # Between the coordinator's checks for results
+# Jobs are written in one transaction per batch, since every transaction
+# on a shared filesystem is a round trip to the file server
+ENQUEUE_BATCH_SIZE = 100
+# Lock waits. Leases and results are small transactions, so a long wait
+# means the file server is slow rather than the queue busy.
+BUSY_TIMEOUT_SECONDS = 60.0
+
+
+class JobStatus(Enum):
+    PENDING = "pending"  # Waiting for a worker
+    LEASED = "leased"  # Being generated by a worker
+    DONE = "done"  # Summary written back
+    FAILED = "failed"  # Given up after the last attempt
+
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS queue (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        run_id TEXT NOT NULL,
+        open INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_token TEXT,
+        leased_by TEXT,
+        lease_expires REAL,
+        summary TEXT,
+        error TEXT,
+        collected INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+START_RUN = """
+    INSERT INTO queue (id, run_id, open) VALUES (1, ?, 1)
+    ON CONFLICT (id) DO UPDATE SET run_id = excluded.run_id, open = 1
+"""
+
+INSERT_JOB = "INSERT INTO jobs (payload, status) VALUES (?, 'pending')"
+
+# A lease that ran out belongs to a worker that crashed or lost the file
+# server. Its job is leased again, or given up after the last attempt.
+FAIL_EXPIRED_LEASES = """
+    UPDATE jobs SET status = 'failed', lease_token = NULL,
+        error = 'The lease of ' || leased_by || ' expired'
+    WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+"""
+
+RETRY_EXPIRED_LEASES = """
+    UPDATE jobs SET status = 'pending', lease_token = NULL
+    WHERE status = 'leased' AND lease_expires < ?
+"""
+
+SELECT_PENDING = """
+    SELECT id, payload, attempts FROM jobs WHERE status = 'pending'
+    ORDER BY id LIMIT 1
+"""
+
+LEASE_JOB = """
+    UPDATE jobs SET status = 'leased', attempts = attempts + 1,
+        lease_token = ?, leased_by = ?, lease_expires = ?
+    WHERE id = ?
+"""
+
+RENEW_LEASE = """
+    UPDATE jobs SET lease_expires = ?
+    WHERE id = ? AND lease_token = ? AND status = 'leased'
+"""
+
+COMPLETE_JOB = """
+    UPDATE jobs SET status = 'done', summary = ?, error = NULL,
+        lease_token = NULL
+    WHERE id = ? AND lease_token = ? AND status = 'leased'
+"""
+
+FAIL_JOB = """
+    UPDATE jobs SET
+        status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+        error = ?, lease_token = NULL
+    WHERE id = ? AND lease_token = ? AND status = 'leased'
+"""
+
+COLLECT_RESULTS = """
+    UPDATE jobs SET collected = 1
+    WHERE collected = 0 AND status IN ('done', 'failed')
+    RETURNING id, status, summary, error, attempts
+"""
+
+COUNT_JOBS = "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+
+
+@dataclass
+class QueueJob:
+    """A function leased to a worker."""
+
+    id: int
+    context: FunctionContextModel
+    examples: Optional[List[FunctionExample]]  # None if the coordinator has none
+    attempts: int  # Leases so far, including this one
+    lease_token: str
+    run_id: str  # Of the run the job belongs to
+
+
+@dataclass
+class QueueResult:
+    """A job the workers finished or gave up on."""
+
+    id: int
+    summary: Optional[FunctionSummaryModel]  # None if the job failed
+    error: Optional[str]
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Queue of functions to summarize in a SQLite database, shared by a
+    coordinator, which enqueues the functions of a run and collects their
+    summaries, and any number of workers, which lease functions one at a
+    time and generate their summaries with their own models.
+
+    The database may be on a filesystem shared by several hosts, such as
+    NFS, so it uses a rollback journal rather than write-ahead logging,
+    which needs shared memory on one host. A leased job is taken back when
+    its lease expires, so a crashed worker's job is leased again, up to
+    `max_attempts` leases in all. Each lease has a token, and a result is
+    only kept if it comes with the job's current token. Hosts should have
+    clocks synchronized to well within the lease time.
+
+    Safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self._path = Path(path)
+        self._lease_seconds = lease_seconds
+        self._max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        # Transactions are managed explicitly, see _transaction
+        self._conn = sqlite3.connect(
+            str(self._path),
+            timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._create_schema()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def lease_seconds(self) -> float:
+        return self._lease_seconds
+
+    def _create_schema(self):
+        with self._transaction():
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS jobs")
+                self._conn.execute("DROP TABLE IF EXISTS queue")
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self._conn.execute(statement)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def start_run(self) -> str:
+        """
+        Empties the queue and opens it for a new run. Results of leases from
+        earlier runs are not kept.
+
+        Returns:
+            str: id of the new run
+        """
+        run_id = uuid.uuid4().hex
+        with self._transaction():
+            self._conn.execute("DELETE FROM jobs")
+            self._conn.execute(START_RUN, (run_id,))
+        return run_id
+
+    def close_run(self):
+        """
+        Closes the run so idle workers exit, and drops the jobs that were
+        not finished.
+        """
+        with self._transaction():
+            self._conn.execute("UPDATE queue SET open = 0")
+            self._conn.execute("DELETE FROM jobs WHERE status IN ('pending', 'leased')")
+
+    def get_run(self) -> Tuple[Optional[str], bool]:
+        """Returns the id of the latest run and whether it is open."""
+        with self._lock:
+            row = self._conn.execute("SELECT run_id, open FROM queue").fetchone()
+        if row is None:
+            return None, False
+        return row[0], bool(row[1])
+
+    def enqueue(
+        self,
+        jobs: List[Tuple[FunctionContextModel, Optional[List[FunctionExample]]]],
+    ) -> List[int]:
+        """
+        Adds functions to summarize, with the style examples to prompt them
+        with, in one transaction. Jobs are leased in the order they were added.
+
+        Returns:
+            List[int]: ids of the jobs, in the order given
+        """
+        ids = []
+        with self._transaction():
+            for context, examples in jobs:
+                payload = {
+                    "context": asdict(context),
+                    "examples": (
+                        None
+                        if examples is None
+                        else [asdict(example) for example in examples]
+                    ),
+                }
+                cursor = self._conn.execute(INSERT_JOB, (json.dumps(payload),))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def _expire_leases(self, now: float):
+        self._conn.execute(FAIL_EXPIRED_LEASES, (now, self._max_attempts))
+        self._conn.execute(RETRY_EXPIRED_LEASES, (now,))
+
+    def lease(self, worker_id: str) -> Optional[QueueJob]:
+        """
+        Leases the oldest pending job for `lease_seconds`, or returns None
+        if there is none or the run is closed.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._transaction():
+            row = self._conn.execute("SELECT run_id, open FROM queue").fetchone()
+            if row is None or not row[1]:
+                return None
+            run_id = row[0]
+            self._expire_leases(now)
+            row = self._conn.execute(SELECT_PENDING).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts = row
+            self._conn.execute(
+                LEASE_JOB, (token, worker_id, now + self._lease_seconds, job_id)
+            )
+        payload = json.loads(payload)
+        examples = payload["examples"]
+        return QueueJob(
+            id=job_id,
+            context=FunctionContextModel(**payload["context"]),
+            examples=(
+                None
+                if examples is None
+                else [FunctionExample(**example) for example in examples]
+            ),
+            attempts=attempts + 1,
+            lease_token=token,
+            run_id=run_id,
+        )
+
+    def renew(self, job: QueueJob) -> bool:
+        """
+        Extends a job's lease by `lease_seconds` from now.
+
+        Returns:
+            bool: False if the lease expired and the job was taken back
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                RENEW_LEASE,
+                (time.time() + self._lease_seconds, job.id, job.lease_token),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job: QueueJob, summary: FunctionSummaryModel) -> bool:
+        """
+        Records a job's summary.
+
+        Returns:
+            bool: False if the lease had expired, in which case the summary
+                is dropped
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                COMPLETE_JOB,
+                (json.dumps(asdict(summary)), job.id, job.lease_token),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job: QueueJob, error: str) -> bool:
+        """
+        Returns a job whose summary could not be generated to the queue, or
+        gives it up if it was leased `max_attempts` times.
+
+        Returns:
+            bool: False if the lease had expired
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                FAIL_JOB, (self._max_attempts, error, job.id, job.lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def collect(self) -> List[QueueResult]:
+        """Returns the jobs finished or given up since the last call."""
+        with self._transaction():
+            self._expire_leases(time.time())
+            rows = self._conn.execute(COLLECT_RESULTS).fetchall()
+        results = []
+        for job_id, status, summary, error, attempts in rows:
+            results.append(
+                QueueResult(
+                    id=job_id,
+                    summary=(
+                        FunctionSummaryModel.from_dict(json.loads(summary))
+                        if status == JobStatus.DONE.value
+                        else None
+                    ),
+                    error=error,
+                    attempts=attempts,
+                )
+            )
+        return results
+
+    def get_counts(self) -> Dict[str, int]:
+        """Returns the number of jobs by status."""
+        with self._lock:
+            return dict(self._conn.execute(COUNT_JOBS).fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """
+    Holds the queue's lock and an immediate transaction, which takes the
+    database's write lock at the start so concurrent leases never pick the
+    same job.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class WorkerStats:
+    completed: int = 0
+    failed: int = 0  # Attempts without a summary, some of them retried
+    lost: int = 0  # Results dropped because the lease had expired
+    seconds: List[float] = field(default_factory=list)  # Per attempt
+
+
+class QueueWorker:
+    """
+    Leases jobs from a WorkQueue and generates their summaries until the
+    run it served is closed. A worker started on a closed queue waits for
+    the next run, so workers can be started before the coordinator.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        generator: DocumentationGenerator,
+        worker_id: Optional[str] = None,
+        poll_seconds: float = POLL_SECONDS,
+        metrics: MetricsRecorder = NULL_METRICS,
+    ):
+        self._queue = queue
+        self._generator = generator
+        self._worker_id = worker_id or get_worker_id()
+        self._poll_seconds = poll_seconds
+        self._metrics = metrics
+        self._stop = threading.Event()
+        self.stats = WorkerStats()
+
+    @property
+    def worker_id(self) -> str:
+        return self._worker_id
+
+    @property
+    def queue(self) -> WorkQueue:
+        return self._queue
+
+    def stop(self):
+        self._stop.set()
+        self._generator.cancel()
+
+    def run(self, on_job: Optional[Callable[[QueueJob, bool], None]] = None):
+        """
+        Serves jobs until the run is closed or `stop` is called.
+
+        Args:
+            on_job: called with each job and whether a summary was generated
+        """
+        served_run = None
+        while not self._stop.is_set():
+            job = self._queue.lease(self._worker_id)
+            if job is None:
+                run_id, is_open = self._queue.get_run()
+                if is_open:
+                    served_run = run_id
+                elif served_run is not None:
+                    return  # The run this worker served is over
+                self._stop.wait(self._poll_seconds)
+                continue
+            served_run = job.run_id
+            succeeded = self._serve(job)
+            if on_job is not None:
+                on_job(job, succeeded)
+
+    def _serve(self, job: QueueJob) -> bool:
+        renewed = threading.Event()
+        renewer = threading.Thread(
+            target=self._renew_lease, args=(job, renewed), daemon=True
+        )
+        renewer.start()
+        start = time.perf_counter()
+        error = None
+        summary = None
+        try:
+            summary = self._generator.generate_summary(
+                job.context, examples=job.examples
+            )
+            if summary is None:
+                error = f"No summary could be read for {job.context.qualified_name}"
+        except Exception as e:
+            error = f"Generation failed: {e}"
+        finally:
+            renewed.set()
+            renewer.join()
+        seconds = time.perf_counter() - start
+        self.stats.seconds.append(seconds)
+        self._metrics.observe("queue_job_seconds", seconds)
+        if summary is None:
+            self._queue.fail(job, error)
+            self.stats.failed += 1
+            self._metrics.add("queue_jobs", result="failed")
+        elif self._queue.complete(job, summary):
+            self.stats.completed += 1
+            self._metrics.add("queue_jobs", result="completed")
+        else:
+            self.stats.lost += 1
+            self._metrics.add("queue_jobs", result="lost")
+        return summary is not None
+
+    def _renew_lease(self, job: QueueJob, done: threading.Event):
+        # Renewed well before it runs out, so one slow round trip to the
+        # file server does not lose it
+        while not done.wait(self._queue.lease_seconds / 3):
+            if not self._queue.renew(job):
+                return
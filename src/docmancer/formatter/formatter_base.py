@@ -1,7 +1,9 @@
 from abc import abstractmethod, ABC
+from typing import Optional
 from docmancer.models.documentation_model import DocumentationModel
 from docmancer.models.function_context import FunctionContextModel
 from docmancer.models.function_summary import FunctionSummaryModel
+from docmancer.utils.file_buffer import FileBuffer
 
 
 class FormatterBase(ABC):
@@ -11,6 +13,7 @@ class FormatterBase(ABC):
         func_context: FunctionContextModel,
         func_summary: FunctionSummaryModel,
         file_path: str,
+        file_buffer: Optional[FileBuffer] = None,
     ) -> DocumentationModel:
         """_summary_
 
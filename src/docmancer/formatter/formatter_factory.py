@@ -1,14 +1,31 @@
+from typing import Optional
 from docmancer.formatter.formatter_base import FormatterBase
-from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
 from docmancer.core.styles import DocstringStyle
 from docmancer.core.languages import Languages
+from docmancer.utils.registry import LazyRegistry
+
+
+def get_formatter_name(language: str, style: str) -> str:
+    return f"{language}.{style}"
+
+
+# Formatter classes by "<language>.<style>", imported on first use
+FORMATTERS = LazyRegistry(
+    "docmancer.formatters",
+    {
+        get_formatter_name(
+            Languages.PYTHON.value, DocstringStyle.PEP.value
+        ): "docmancer.formatter.py_docstring_formatter:PyDocstringFormatter"
+    },
+)
 
 
 class FormatterFactory:
     def __init__(self):
         pass
 
-    def get_formatter(self, style: str, language: str) -> FormatterBase:
-        if language == Languages.PYTHON.value:
-            if style == DocstringStyle.PEP.value:
-                return PyDocstringFormatter()
+    def get_formatter(self, style: str, language: str) -> Optional[FormatterBase]:
+        formatter_class = FORMATTERS.get(get_formatter_name(language, style))
+        if formatter_class is None:
+            return None
+        return formatter_class()
@@ -2,6 +2,8 @@ from docmancer.models.documentation_model import DocumentationModel
 from docmancer.formatter.formatter_base import FormatterBase
 from docmancer.models.function_context import FunctionContextModel
 from docmancer.models.function_summary import FunctionSummaryModel
+from docmancer.utils.file_buffer import FileBuffer
+from typing import Optional
 import docmancer.utils.file_utils as fu
 
 INDENT_SPACES = 4
@@ -14,19 +16,27 @@ class PyDocstringFormatter(FormatterBase):
         func_context: FunctionContextModel,
         func_summary: FunctionSummaryModel,
         file_path: str,
+        file_buffer: Optional[FileBuffer] = None,
     ) -> DocumentationModel:
         """
         Formats a Python docstring for a function.
 
         Args:
             doc_model: Generated documentation response model object
+            file_buffer: Cached content of file_path. The file is read from
+                disk when no buffer is given.
 
         Returns:
             A formatted Python docstring string.
         """
-        function_signature_offset = fu.get_line_text_offset_spaces(
-            file_path, func_context.start_line
-        )
+        if file_buffer is not None:
+            function_signature_offset = file_buffer.get_indentation(
+                func_context.start_line
+            )
+        else:
+            function_signature_offset = fu.get_line_text_offset_spaces(
+                file_path, func_context.start_line
+            )
 
         lines = ['"""', func_summary.summary.strip(), ""]
 
@@ -0,0 +1,141 @@
+from typing import Dict, List, Set, Tuple
+from docmancer.models.function_context import FunctionContextModel
+
+
+class CallGraph:
+    """
+    Intra-project call graph built from parsed function contexts.
+
+    Nodes are the indices of the (file_path, context) pairs the graph was
+    built from. An edge from a caller to a callee exists when the caller's
+    body calls a name that matches a parsed function. Names defined in the
+    caller's own file are preferred over same-named functions elsewhere.
+    """
+
+    def __init__(self, functions: List[Tuple[str, FunctionContextModel]]):
+        self._functions = functions
+        self._callees: Dict[int, Set[int]] = {i: set() for i in range(len(functions))}
+        self._callers: Dict[int, Set[int]] = {i: set() for i in range(len(functions))}
+        self._build()
+
+    def _build(self):
+        by_name: Dict[str, List[int]] = {}
+        for idx, (_, context) in enumerate(self._functions):
+            by_name.setdefault(self.get_name(idx), []).append(idx)
+
+        for idx, (file_path, context) in enumerate(self._functions):
+            for called in context.calls:
+                candidates = by_name.get(called, [])
+                local = [c for c in candidates if self._functions[c][0] == file_path]
+                for callee in local or candidates:
+                    if callee != idx:
+                        self._callees[idx].add(callee)
+                        self._callers[callee].add(idx)
+
+    def get_name(self, idx: int) -> str:
+        return self._functions[idx][1].qualified_name.split(".")[-1]
+
+    def get_callees(self, idx: int) -> List[int]:
+        return sorted(self._callees[idx], key=self._sort_key)
+
+    def get_callers(self, idx: int) -> List[int]:
+        return sorted(self._callers[idx], key=self._sort_key)
+
+    def _sort_key(self, idx: int):
+        file_path, context = self._functions[idx]
+        return (str(file_path), context.qualified_name, context.start_line)
+
+    def get_components(self) -> List[List[int]]:
+        """
+        Returns the strongly connected components of the graph (Tarjan).
+        Functions that are not part of a cycle form a component of their own.
+        """
+        index: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        on_stack: Set[int] = set()
+        stack: List[int] = []
+        components = []
+        counter = 0
+
+        for root in range(len(self._functions)):
+            if root in index:
+                continue
+            work = [(root, iter(self.get_callees(root)))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, callees = work[-1]
+                advanced = False
+                for callee in callees:
+                    if callee not in index:
+                        index[callee] = low[callee] = counter
+                        counter += 1
+                        stack.append(callee)
+                        on_stack.add(callee)
+                        work.append((callee, iter(self.get_callees(callee))))
+                        advanced = True
+                        break
+                    if callee in on_stack:
+                        low[node] = min(low[node], index[callee])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component, key=self._sort_key))
+        return components
+
+    def get_levels(self) -> List[List[int]]:
+        """
+        Groups functions into topological levels, callees before callers.
+
+        Every function in a level only depends on functions from earlier
+        levels, so a level can be generated in parallel. Cycles are broken
+        deterministically by ignoring calls from a function to members of its
+        own cycle that sort after it, so the lowest sorting member goes first.
+
+        Returns:
+            List[List[int]]: Function indices for each level, in order.
+        """
+        rank = {}
+        for component in self.get_components():
+            for position, idx in enumerate(component):
+                rank[idx] = (id(component), position)
+
+        dependencies = {}
+        for idx, callees in self._callees.items():
+            dependencies[idx] = {
+                callee
+                for callee in callees
+                if rank[callee][0] != rank[idx][0] or rank[callee][1] < rank[idx][1]
+            }
+
+        pending = {idx: len(deps) for idx, deps in dependencies.items()}
+        dependents: Dict[int, List[int]] = {idx: [] for idx in pending}
+        for idx, deps in dependencies.items():
+            for callee in deps:
+                dependents[callee].append(idx)
+
+        levels = []
+        ready = sorted((i for i, c in pending.items() if c == 0), key=self._sort_key)
+        while ready:
+            levels.append(ready)
+            released = []
+            for idx in ready:
+                for caller in dependents[idx]:
+                    pending[caller] -= 1
+                    if pending[caller] == 0:
+                        released.append(caller)
+            ready = sorted(released, key=self._sort_key)
+        return levels
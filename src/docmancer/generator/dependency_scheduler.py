@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from docmancer.generator.call_graph import CallGraph
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+
+MAX_CALLEE_SUMMARY_CHARS = 200
+
+
+def get_short_summary(summary: FunctionSummaryModel) -> str:
+    """
+    Returns the first sentence of a generated summary, truncated so that it
+    stays cheap to embed in a caller's prompt.
+    """
+    text = " ".join(summary.summary.split())
+    end = text.find(". ")
+    if end != -1:
+        text = text[: end + 1]
+    if len(text) > MAX_CALLEE_SUMMARY_CHARS:
+        text = text[: MAX_CALLEE_SUMMARY_CHARS - 3].rstrip() + "..."
+    return text
+
+
+class DependencyScheduler:
+    """
+    Generates summaries in call graph order so callers can be prompted with
+    the short summaries of the functions they call. Each topological level is
+    generated in parallel using up to `max_workers` threads.
+    """
+
+    def __init__(self, generator: DocumentationGenerator, max_workers: int = 1):
+        self._generator = generator
+        self._max_workers = max(1, max_workers)
+
+    def generate(
+        self,
+        functions: List[Tuple[str, FunctionContextModel]],
+        errors: List,
+        on_summary: Optional[Callable[[int, FunctionSummaryModel], None]] = None,
+        known_summaries: Optional[Dict[int, FunctionSummaryModel]] = None,
+        should_generate: Optional[Callable[[int], bool]] = None,
+    ) -> Dict[int, FunctionSummaryModel]:
+        """
+        Generates a summary for every function.
+
+        Args:
+            functions (List[Tuple[str, FunctionContextModel]]): (file path, context) pairs
+            errors (List): list that generation exceptions are appended to
+            on_summary (Callable, optional): called with (index, summary) as each
+                function finishes, including failed ones with a None summary
+            known_summaries (Dict[int, FunctionSummaryModel], optional): summaries
+                from an earlier run that are reused instead of generated
+            should_generate (Callable, optional): called with an index right
+                before its summary is generated. Returning False skips the
+                function, which then gets a None summary
+
+        Returns:
+            Dict[int, FunctionSummaryModel]: summaries keyed by index into `functions`
+        """
+        graph = CallGraph(functions)
+        summaries: Dict[int, FunctionSummaryModel] = {}
+
+        def generate_one(idx: int):
+            if known_summaries and idx in known_summaries:
+                return known_summaries[idx]
+            if should_generate is not None and not should_generate(idx):
+                return None
+            callee_summaries = {
+                graph.get_name(callee): get_short_summary(summaries[callee])
+                for callee in graph.get_callees(idx)
+                if summaries.get(callee) is not None
+            }
+            return self._generator.generate_summary(
+                functions[idx][1], callee_summaries=callee_summaries
+            )
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for level in graph.get_levels():
+                futures = {idx: executor.submit(generate_one, idx) for idx in level}
+                for idx, future in futures.items():
+                    try:
+                        summaries[idx] = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                    if on_summary:
+                        on_summary(idx, summaries.get(idx))
+        return summaries
@@ -1,15 +1,83 @@
-import docmancer.utils.json_utils as ju
+import threading
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+from docmancer.utils.token_utils import estimate_tokens
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.core.tracing import NULL_TRACER, Tracer
+from docmancer.core.progress import NULL_PROGRESS, ProgressTracker
 from docmancer.generator.llm.llm_agent_base import LLMAgent
 from docmancer.models.function_context import FunctionContextModel
 from docmancer.models.function_summary import FunctionSummaryModel
 from docmancer.models.parameter_model import ParameterModel
-from docmancer.generator.prompts import Prompt
+from docmancer.generator.examples import ExampleRetriever, FunctionExample
+from docmancer.generator.prompts import JsonFixPrompt, Prompt
+from docmancer.generator.prompt_compactor import CompactionResult, PromptCompactor
+from docmancer.generator.summary_validator import SummaryValidator
+from docmancer.generator.templates import TemplateSummarizer
+from docmancer.generator.model_router import (
+    DEFAULT_AGENT_NAME,
+    Complexity,
+    ModelRouter,
+)
+
+# Bodies are never compacted below this, even if the rest of the prompt is
+# already close to the limit
+MIN_BODY_TOKENS = 256
 
 
 class DocumentationGenerator:
-    def __init__(self, model: LLMAgent, language: str):
-        self._quality = 1
-        self._agent = model
+    def __init__(
+        self,
+        model: LLMAgent,
+        language: str,
+        json_fix_attempts: int = 1,
+        max_prompt_tokens: Optional[int] = None,
+        router: Optional[ModelRouter] = None,
+        templates: Optional[TemplateSummarizer] = None,
+        examples: Optional[ExampleRetriever] = None,
+        metrics: MetricsRecorder = NULL_METRICS,
+        tracer: Tracer = NULL_TRACER,
+        progress: ProgressTracker = NULL_PROGRESS,
+    ):
+        # Without a router every function goes to `model`
+        self._router = router or ModelRouter(
+            {DEFAULT_AGENT_NAME: model}, metrics=metrics
+        )
+        self._templates = templates  # Trivial functions skip the model if set
+        # Similar documented functions are added to prompts if set
+        self._examples = examples
+        self._metrics = metrics
+        self._tracer = tracer
+        self._progress = progress
+        self._json_fix_attempts = json_fix_attempts
+        self._max_prompt_tokens = max_prompt_tokens
+        self._compactor = PromptCompactor()
+        self.compactions: List[Tuple[str, CompactionResult]] = []
+        self._validator = SummaryValidator()
+        self._stats_lock = threading.Lock()
+        self.prompt_tokens = 0  # Estimated prompt tokens sent this run
+
+    @property
+    def repair_stats(self):
+        return self._validator.stats
+
+    @property
+    def router(self) -> ModelRouter:
+        return self._router
+
+    @property
+    def examples(self) -> Optional[ExampleRetriever]:
+        return self._examples
+
+    @property
+    def template_counts(self) -> Dict[str, int]:
+        """Summaries written from templates per rule, i.e. model calls avoided."""
+        return dict(self._templates.counts) if self._templates else {}
+
+    def cancel(self):
+        """Stops outstanding generations, e.g. when the user quits."""
+        self._router.cancel()
 
     def get_default_summary(
         self, context: FunctionContextModel
@@ -22,24 +90,158 @@ class DocumentationGenerator:
             ],  # TODO: add parameters to FunctionContextModel and use here
         )
 
-    def generate_summary(self, context: FunctionContextModel) -> FunctionSummaryModel:
-
-        # TODO: handle quality here
-        # Step 1. create prompt for model
-        prompt = Prompt(context)
+    def generate_summary(
+        self,
+        context: FunctionContextModel,
+        callee_summaries: Optional[Dict[str, str]] = None,
+        examples: Optional[List[FunctionExample]] = None,
+    ) -> FunctionSummaryModel:
+        """
+        Generates a function's summary, or returns None if no summary could be
+        read from the model. Errors sending a prompt are raised.
 
-        # Step 2. Prompt model and get response
+        Args:
+            context (FunctionContextModel): the function to summarize
+            callee_summaries (Optional[Dict[str, str]]): summaries of the
+                functions it calls, by name
+            examples (Optional[List[FunctionExample]]): style examples to use
+                instead of searching `examples`, e.g. ones chosen by the queue
+                coordinator that sent the function
+        """
+        start = time.perf_counter()
+        self._progress.start(context.qualified_name)
+        func_summary_model = None
         try:
+            with self._tracer.span(
+                "generate", category="generator", function=context.qualified_name
+            ):
+                func_summary_model = self._generate_summary(
+                    context, callee_summaries, examples
+                )
+        finally:
+            self._progress.finish(failed=func_summary_model is None)
+            self._metrics.observe("function_seconds", time.perf_counter() - start)
+            if func_summary_model is None:
+                self._metrics.add("generation_failures")
+        return func_summary_model
+
+    def _generate_summary(
+        self,
+        context: FunctionContextModel,
+        callee_summaries: Optional[Dict[str, str]],
+        examples: Optional[List[FunctionExample]] = None,
+    ) -> Optional[FunctionSummaryModel]:
+
+        # Step 0. trivial functions are summarized without the model
+        if self._templates is not None:
+            with self._tracer.span("templates", category="generator"):
+                func_summary_model = self._templates.get_summary(context)
+            if func_summary_model is not None:
+                return func_summary_model
+
+        # Step 1. create prompt for model
+        with self._tracer.span("build prompt", category="generator"):
+            if examples is None:
+                examples = []
+                if self._examples is not None:
+                    examples = self._examples.get_examples(context)
+            prompt = Prompt(
+                context, callee_summaries=callee_summaries, examples=examples
+            )
+            prompt = self._fit_prompt(prompt, context, callee_summaries, examples)
             prompt_msg = prompt.get()
-            response = self._agent.send_message(prompt_msg)
-        except Exception as e:
-            print(f"Generation failed: {e}")
+        if prompt.examples:
+            self._metrics.add("prompt_examples", len(prompt.examples))
 
-        # Step 3. Parse response into Function Summary Model
-        try:
-            func_summary_json = ju.extract_json_from_text(response)
-            func_summary_model = FunctionSummaryModel.from_dict(func_summary_json)
-            return func_summary_model
-        except ValueError:
-            print("ERROR")
-            return None
+        # Step 2. Prompt the model chosen for the function's complexity. If no
+        # summary can be read, the next larger model may be tried.
+        route = self._router.get_route(context)
+        repairs = []
+        reprompted = False
+        while route is not None:
+            response = self._send(route, prompt_msg)
+            func_summary_model, repairs, reprompted = self._read_summary(
+                route, response, context
+            )
+            if func_summary_model is not None:
+                return func_summary_model
+            route = self._router.escalate(route)
+
+        self._validator.record(repairs, succeeded=False, reprompted=reprompted)
+        return None
+
+    def _read_summary(
+        self, route: Complexity, response: str, context: FunctionContextModel
+    ) -> Tuple[Optional[FunctionSummaryModel], List[str], bool]:
+        """
+        Step 3. Parse response into Function Summary Model, repairing it
+        locally or asking the model to fix its JSON before giving up.
+
+        Returns:
+            Tuple[Optional[FunctionSummaryModel], List[str], bool]: the summary
+                or None, the repairs applied, and whether the model was asked
+                to fix its response
+        """
+        with self._tracer.span("parse response", category="generator"):
+            func_summary_model, repairs = self._validator.parse(response, context)
+        if func_summary_model is not None:
+            self._validator.record(repairs, succeeded=True)
+            return func_summary_model, repairs, False
+        for _ in range(self._json_fix_attempts):
+            response = self._send(route, JsonFixPrompt(response).get())
+            with self._tracer.span("parse response", category="generator"):
+                func_summary_model, fix_repairs = self._validator.parse(
+                    response, context
+                )
+            if func_summary_model is not None:
+                self._validator.record(
+                    repairs + fix_repairs, succeeded=True, reprompted=True
+                )
+                return func_summary_model, repairs + fix_repairs, True
+        return None, repairs, self._json_fix_attempts > 0
+
+    def _fit_prompt(
+        self,
+        prompt: Prompt,
+        context: FunctionContextModel,
+        callee_summaries: Optional[Dict[str, str]],
+        examples: List[FunctionExample],
+    ) -> Prompt:
+        """
+        Drops the examples, then compacts the function body, if the prompt
+        exceeds the token limit.
+        """
+        if not self._max_prompt_tokens:
+            return prompt
+        prompt_tokens = estimate_tokens(prompt.get())
+        if prompt_tokens <= self._max_prompt_tokens:
+            return prompt
+        if examples:
+            prompt = Prompt(context, callee_summaries=callee_summaries)
+            prompt_tokens = estimate_tokens(prompt.get())
+            if prompt_tokens <= self._max_prompt_tokens:
+                return prompt
+        other_tokens = prompt_tokens - estimate_tokens(context.body)
+        result = self._compactor.compact(
+            context.body,
+            max(MIN_BODY_TOKENS, self._max_prompt_tokens - other_tokens),
+        )
+        with self._stats_lock:
+            self.compactions.append((context.qualified_name, result))
+        return Prompt(
+            replace(context, body=result.body), callee_summaries=callee_summaries
+        )
+
+    def _send(self, route: Complexity, prompt_msg: str) -> str:
+        prompt_tokens = estimate_tokens(prompt_msg)
+        with self._stats_lock:
+            self.prompt_tokens += prompt_tokens
+        self._metrics.add("prompt_tokens", prompt_tokens, route=route.value)
+        with self._tracer.span(
+            "model request", category="model", route=route.value, tokens=prompt_tokens
+        ):
+            response = self._router.send_message(route, prompt_msg)
+        response_tokens = estimate_tokens(response)
+        self._metrics.add("response_tokens", response_tokens, route=route.value)
+        self._progress.add_tokens(response_tokens)
+        return response
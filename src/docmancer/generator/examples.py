@@ -0,0 +1,212 @@
+import heapq
+import inspect
+import itertools
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.utils.token_utils import estimate_tokens
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Functions scored per query. Candidates are taken from the query's rarest
+# terms, which decide most of a BM25 score, so a query never visits the
+# long posting lists of common words like `get` or `name`.
+MAX_CANDIDATES = 100
+
+DEFAULT_EXAMPLE_COUNT = 2
+DEFAULT_EXAMPLE_TOKENS = 300  # For all of a prompt's examples together
+
+# Docstrings longer than this are cut before they are added to a prompt
+MAX_EXAMPLE_DOCSTRING_CHARS = 600
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+WORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+STRING_PREFIX_PATTERN = re.compile(r"^[rRuUbBfF]*")
+
+# Words that appear in most signatures and say nothing about the function
+STOP_TERMS = frozenset(
+    {"self", "cls", "def", "async", "return", "none", "args", "kwargs", "str"}
+)
+
+
+def get_terms(context: FunctionContextModel) -> List[str]:
+    """
+    Returns the lowercase terms of a function's qualified name, signature
+    and called functions. Identifiers are split into words, so
+    `load_user_config` and `loadUserConfig` share `load`, `user` and `config`,
+    and are also kept whole so exact names match best.
+    """
+    terms = []
+    text = " ".join([context.qualified_name, context.signature, *context.calls])
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        words = [word.lower() for word in WORD_PATTERN.findall(identifier)]
+        terms += [word for word in words if len(word) > 1 and word not in STOP_TERMS]
+        if len(words) > 1:
+            terms.append(identifier.lower())
+    return terms
+
+
+def clean_docstring(docstring: str) -> str:
+    """Returns a docstring literal's text without quotes or indentation."""
+    text = STRING_PREFIX_PATTERN.sub("", docstring.strip())
+    for quote in ('"""', "'''", '"', "'"):
+        if text.startswith(quote) and text.endswith(quote) and len(text) > 1:
+            text = text[len(quote) : -len(quote)]
+            break
+    text = inspect.cleandoc(text)
+    if len(text) > MAX_EXAMPLE_DOCSTRING_CHARS:
+        text = text[:MAX_EXAMPLE_DOCSTRING_CHARS].rsplit("\n", 1)[0] + "\n..."
+    return text
+
+
+@dataclass
+class FunctionExample:
+    qualified_name: str
+    signature: str
+    docstring: str  # Cleaned, see clean_docstring
+
+    def get_text(self) -> str:
+        return f"{self.signature}\n{self.docstring}"
+
+
+class ExampleRetriever:
+    """
+    BM25 index of the project's already documented functions, searched for
+    the functions most similar to the one being documented so their
+    docstrings can be shown to the model as style examples.
+
+    Functions are added as their files are parsed, so the index grows during
+    a run and early functions can only be matched with what was parsed
+    before them. Safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        count: int = DEFAULT_EXAMPLE_COUNT,
+        max_tokens: int = DEFAULT_EXAMPLE_TOKENS,
+    ):
+        self._count = count
+        self._max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._examples: Dict[int, FunctionExample] = {}
+        self._term_counts: Dict[int, Counter] = {}
+        self._lengths: Dict[int, int] = {}  # Terms per function
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> id -> count
+        self._total_terms = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def add(self, file_path, context: FunctionContextModel):
+        """
+        Indexes a function if it has a docstring, replacing an earlier
+        version of it.
+        """
+        key = (str(file_path), context.qualified_name)
+        with self._lock:
+            if key in self._ids:
+                self._remove(self._ids.pop(key))
+            if not context.docstring:
+                return
+            docstring = clean_docstring(context.docstring)
+            if not docstring:
+                return
+            term_counts = Counter(get_terms(context))
+            doc_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = doc_id
+            self._examples[doc_id] = FunctionExample(
+                qualified_name=context.qualified_name,
+                signature=context.signature,
+                docstring=docstring,
+            )
+            self._term_counts[doc_id] = term_counts
+            self._lengths[doc_id] = sum(term_counts.values())
+            self._total_terms += self._lengths[doc_id]
+            for term, count in term_counts.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+
+    def _remove(self, doc_id: int):
+        term_counts = self._term_counts.pop(doc_id)
+        del self._examples[doc_id]
+        self._total_terms -= self._lengths.pop(doc_id)
+        for term in term_counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(
+        self, context: FunctionContextModel, count: int
+    ) -> List[Tuple[float, FunctionExample]]:
+        """
+        Returns up to `count` documented functions most similar to `context`,
+        best first, with their scores. The function itself is never returned.
+        """
+        terms = set(get_terms(context))
+        # A function being documented again is in the index with its docstring
+        own_docstring = clean_docstring(context.docstring or "")
+        with self._lock:
+            total = len(self._examples)
+            if not total or not terms:
+                return []
+            term_postings = sorted(
+                (self._postings[term] for term in terms if term in self._postings),
+                key=len,
+            )
+            candidates = set()
+            for postings in term_postings:
+                if candidates and len(candidates) + len(postings) > MAX_CANDIDATES:
+                    break
+                # The most recently parsed functions, usually the nearest ones
+                candidates.update(itertools.islice(reversed(postings), MAX_CANDIDATES))
+            average_length = self._total_terms / total
+            idfs = [
+                math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for postings in term_postings
+            ]
+            scores: Dict[int, float] = {}
+            for doc_id in candidates:
+                norm = BM25_K1 * (
+                    1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length
+                )
+                score = 0.0
+                for idf, postings in zip(idfs, term_postings):
+                    frequency = postings.get(doc_id)
+                    if frequency:
+                        score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                scores[doc_id] = score
+            best = heapq.nlargest(count + 1, scores.items(), key=lambda item: item[1])
+            results = []
+            for doc_id, score in best:
+                example = self._examples[doc_id]
+                if (
+                    example.qualified_name != context.qualified_name
+                    or example.docstring != own_docstring
+                ):
+                    results.append((score, example))
+            return results[:count]
+
+    def get_examples(self, context: FunctionContextModel) -> List[FunctionExample]:
+        """
+        Returns up to `count` of the most similar documented functions whose
+        combined text fits in `max_tokens`. An example that does not fit is
+        left out and the next one is tried.
+        """
+        examples = []
+        tokens = 0
+        for _, example in self.search(context, self._count):
+            example_tokens = estimate_tokens(example.get_text())
+            if tokens + example_tokens > self._max_tokens:
+                continue
+            examples.append(example)
+            tokens += example_tokens
+        return examples
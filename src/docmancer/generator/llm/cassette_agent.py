@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from docmancer.config import ReplayLatency
+from docmancer.generator.llm.llm_agent_base import LLMAgent
+from docmancer.utils.token_utils import estimate_tokens
+import docmancer.utils.file_utils as file_utils
+
+CASSETTE_VERSION = 1
+
+
+@dataclass
+class CassetteEntry:
+    response: str
+    seconds: float  # How long the recorded request took
+    prompt_tokens: int  # Estimated, see utils/token_utils.py
+    completion_tokens: int
+
+    def to_row(self) -> list:
+        return [
+            self.response,
+            round(self.seconds, 4),
+            self.prompt_tokens,
+            self.completion_tokens,
+        ]
+
+
+class Cassette:
+    """
+    Model responses keyed by agent name and prompt hash. A prompt sent more
+    than once keeps each response, and replay serves them in order. Safe to
+    use from several threads.
+
+    Saved as gzip compressed JSON with entries stored as rows, not objects.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, List[CassetteEntry]]] = None):
+        self._entries: Dict[str, List[CassetteEntry]] = entries or {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(agent_name: str, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:32]
+        return f"{agent_name}:{digest}"
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, agent_name: str, prompt: str, entry: CassetteEntry):
+        with self._lock:
+            self._entries.setdefault(self.get_key(agent_name, prompt), []).append(entry)
+
+    def play(self, agent_name: str, prompt: str) -> Optional[CassetteEntry]:
+        """
+        Returns the next recorded response to `prompt`, repeating the last one
+        once all have been served, or None if it was never recorded.
+        """
+        key = self.get_key(agent_name, prompt)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return entries[min(position, len(entries) - 1)]
+
+    @classmethod
+    def load(cls, path) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(
+                f"Unsupported cassette version {data.get('version')} in {path}."
+            )
+        return cls(
+            {
+                key: [CassetteEntry(*row) for row in rows]
+                for key, rows in data["interactions"].items()
+            }
+        )
+
+    def save(self, path):
+        with self._lock:
+            interactions = {
+                key: [entry.to_row() for entry in entries]
+                for key, entries in sorted(self._entries.items())
+            }
+        content = json.dumps(
+            {"version": CASSETTE_VERSION, "interactions": interactions},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        # mtime=0 keeps the file identical for identical recordings
+        file_utils.write_file_atomic(path, gzip.compress(content, mtime=0), sync=False)
+
+
+class RecordingAgent(LLMAgent):
+    """Passes messages to `agent` and records each response with its timing."""
+
+    def __init__(self, agent: LLMAgent, cassette: Cassette, agent_name: str):
+        self._agent = agent
+        self._cassette = cassette
+        self._agent_name = agent_name
+
+    def cancel(self):
+        self._agent.cancel()
+
+    def send_message(self, message: str) -> str:
+        start = time.perf_counter()
+        response = self._agent.send_message(message)
+        self._cassette.record(
+            self._agent_name,
+            message,
+            CassetteEntry(
+                response=response,
+                seconds=time.perf_counter() - start,
+                prompt_tokens=estimate_tokens(message),
+                completion_tokens=estimate_tokens(response),
+            ),
+        )
+        return response
+
+
+class ReplayAgent(LLMAgent):
+    """
+    Serves responses recorded by RecordingAgent, immediately or after the
+    recorded latency. Requests are serialized when replaying latency, like
+    the single model context they were recorded from.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        agent_name: str,
+        latency: str = ReplayLatency.NONE.value,
+    ):
+        self._cassette = cassette
+        self._agent_name = agent_name
+        self._latency = ReplayLatency(latency)
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.misses = 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def send_message(self, message: str) -> str:
+        if self._cancelled.is_set():
+            raise RuntimeError("Generation cancelled")
+        entry = self._cassette.play(self._agent_name, message)
+        if entry is None:
+            self.misses += 1
+            raise RuntimeError(
+                f"No recorded response for this prompt to agent '{self._agent_name}'."
+            )
+        if self._latency == ReplayLatency.RECORDED:
+            with self._lock:
+                # Returns early if the run is cancelled
+                self._cancelled.wait(entry.seconds)
+        return entry.response
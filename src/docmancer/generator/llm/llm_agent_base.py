@@ -13,3 +13,16 @@ class LLMAgent(ABC):
         Returns:
             str: JSON response containing function summary
         """
+
+    def cancel(self):
+        """
+        Requests that in-progress and future calls to send_message stop as soon
+        as possible. Agents that cannot be interrupted ignore this.
+        """
+
+
+class NoModelAgent(LLMAgent):
+    """Stands in for the model when none is loaded, e.g. with --no-summary."""
+
+    def send_message(self, message: str) -> str:
+        raise RuntimeError("No model is loaded.")
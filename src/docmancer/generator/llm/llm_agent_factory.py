@@ -1,12 +1,46 @@
+from typing import Dict
 from docmancer.config import LLMConfig, LLMType
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.core.tracing import NULL_TRACER, Tracer
 from docmancer.generator.llm.llm_agent_base import LLMAgent
-from docmancer.generator.llm.local_agent import LlamaCppAgent
+from docmancer.generator.model_router import DEFAULT_AGENT_NAME
+from docmancer.utils.registry import LazyRegistry
+
+# Agent constructors by LLMType name, called as (llm_config, metrics, tracer).
+# Modes are validated against LLMType, so agents are not loaded from entry
+# points; the registry only keeps e.g. llama_cpp from loading until needed.
+AGENTS = LazyRegistry(
+    None,
+    {LLMType.LOCAL.name: "docmancer.generator.llm.local_agent:create_agent"},
+)
 
 
 class LLMAgentFactory:
 
-    def get_agent(self, llm_config: LLMConfig) -> LLMAgent:
-        if llm_config.get_mode_enum() == LLMType.LOCAL:
-            return LlamaCppAgent(llm_config.local)
-        else:
-            raise NotImplementedError(f"{llm_config.model_type} is not supported")
+    def get_agent(
+        self,
+        llm_config: LLMConfig,
+        metrics: MetricsRecorder = NULL_METRICS,
+        tracer: Tracer = NULL_TRACER,
+    ) -> LLMAgent:
+        create_agent = AGENTS.get(llm_config.get_mode_enum().name)
+        if create_agent is None:
+            raise NotImplementedError(f"{llm_config.mode} is not supported")
+        return create_agent(llm_config, metrics, tracer)
+
+    def get_agents(
+        self,
+        llm_config: LLMConfig,
+        metrics: MetricsRecorder = NULL_METRICS,
+        tracer: Tracer = NULL_TRACER,
+    ) -> Dict[str, LLMAgent]:
+        """
+        Returns the default agent described by `llm_config` under
+        DEFAULT_AGENT_NAME and each of its named agents.
+        """
+        agents = {DEFAULT_AGENT_NAME: self.get_agent(llm_config, metrics, tracer)}
+        for name, agent_config in llm_config.agents.items():
+            if name == DEFAULT_AGENT_NAME:
+                raise ValueError(f"Agent name '{DEFAULT_AGENT_NAME}' is reserved.")
+            agents[name] = self.get_agent(agent_config, metrics, tracer)
+        return agents
@@ -1,18 +1,67 @@
+import threading
+import time
 from llama_cpp import Llama
 from docmancer.generator.llm.llm_agent_base import LLMAgent
-from docmancer.config import LocalLLMSettings
+from docmancer.config import LLMConfig, LocalLLMSettings
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.core.tracing import NULL_TRACER, Tracer
 
 
 class LlamaCppAgent(LLMAgent):
-    def __init__(self, settings: LocalLLMSettings):
+    def __init__(
+        self,
+        settings: LocalLLMSettings,
+        metrics: MetricsRecorder = NULL_METRICS,
+        tracer: Tracer = NULL_TRACER,
+    ):
+        # n_ctx=0 makes llama.cpp size the KV cache for the model's full
+        # training context, which can be far larger than a prompt ever needs
+        if settings.n_ctx <= 0:
+            raise ValueError(
+                f"n_ctx must be a positive number of tokens, got {settings.n_ctx}."
+            )
+        self._settings = settings
+        self._metrics = metrics
+        self._tracer = tracer
         self._model_path = settings.model_path
-        # TODO: initialize system here with other settings!
+        self._cancelled = threading.Event()
+        self._llm = None
+        # A Llama instance can only run one completion at a time
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _get_llm(self) -> Llama:
+        if self._llm is None:
+            optional = {}
+            if self._settings.n_threads is not None:
+                optional["n_threads"] = self._settings.n_threads
+            if self._settings.main_gpu is not None:
+                optional["main_gpu"] = self._settings.main_gpu
+            with self._metrics.time("model_load_seconds"), self._tracer.span(
+                "model load", category="model"
+            ):
+                self._llm = Llama(
+                    model_path=self._model_path,
+                    chat_format="chatml",
+                    n_ctx=self._settings.n_ctx,
+                    n_batch=self._settings.n_batch,
+                    n_gpu_layers=self._settings.n_gpu_layers,
+                    verbose=False,
+                    **optional,
+                )
+        return self._llm
 
     def send_message(self, message: str) -> str:
+        if self._cancelled.is_set():
+            raise RuntimeError("Generation cancelled")
 
-        llm = Llama(
-            model_path=self._model_path, chat_format="chatml", n_ctx=0, verbose=False
-        )
+        with self._lock:
+            return self._complete(message)
+
+    def _complete(self, message: str) -> str:
+        llm = self._get_llm()
         response = llm.create_chat_completion(
             messages=[
                 {
@@ -36,6 +85,37 @@ class LlamaCppAgent(LLMAgent):
                 },
             },
             temperature=0.7,
+            stream=True,
         )
 
-        return response["choices"][0]["message"]["content"]
+        # Stream the completion so a cancel request stops decoding between tokens.
+        # Each streamed chunk is one token, and the wait for the first one is
+        # prompt evaluation.
+        start = time.perf_counter()
+        first_token = None
+        content = []
+        for chunk in response:
+            if first_token is None:
+                first_token = time.perf_counter()
+            if self._cancelled.is_set():
+                raise RuntimeError("Generation cancelled")
+            content.append(chunk["choices"][0]["delta"].get("content") or "")
+        if first_token is not None:
+            end = time.perf_counter()
+            self._metrics.observe("prompt_eval_seconds", first_token - start)
+            self._metrics.observe("decode_seconds", end - first_token)
+            self._metrics.add("completion_tokens", len(content))
+            self._tracer.record("prompt eval", start, first_token, category="model")
+            self._tracer.record(
+                "decode", first_token, end, category="model", tokens=len(content)
+            )
+        return "".join(content)
+
+
+def create_agent(
+    llm_config: LLMConfig,
+    metrics: MetricsRecorder = NULL_METRICS,
+    tracer: Tracer = NULL_TRACER,
+) -> LlamaCppAgent:
+    """Builds the agent for LLMType.LOCAL, see llm_agent_factory.AGENTS."""
+    return LlamaCppAgent(llm_config.local, metrics=metrics, tracer=tracer)
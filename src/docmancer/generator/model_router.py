@@ -0,0 +1,152 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+from docmancer.config import RoutingSettings
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.generator.llm.llm_agent_base import LLMAgent
+from docmancer.generator.summary_validator import get_signature_parameters
+from docmancer.models.function_context import FunctionContextModel
+
+DEFAULT_AGENT_NAME = "default"
+
+# Keywords that add a path through a function, counted in its body
+BRANCH_PATTERN = re.compile(r"\b(?:if|elif|for|while|except|case|and|or)\b")
+
+LINES_PER_POINT = 10
+BRANCH_WEIGHT = 1.0
+PARAMETER_WEIGHT = 0.5
+CALL_WEIGHT = 0.5
+
+
+class Complexity(Enum):
+    """Routes in increasing order of the model size they call for."""
+
+    TRIVIAL = "trivial"
+    TYPICAL = "typical"
+    COMPLEX = "complex"
+
+
+ROUTE_ORDER = [Complexity.TRIVIAL, Complexity.TYPICAL, Complexity.COMPLEX]
+
+
+def get_complexity_score(context: FunctionContextModel) -> float:
+    """
+    Scores a function by its length, branches, parameters and the number of
+    distinct functions it calls. A short function without branches scores
+    around 1, a long function with many branches 20 or more.
+    """
+    lines = max(1, context.end_line - context.start_line + 1)
+    branches = len(BRANCH_PATTERN.findall(context.body))
+    parameters = len(get_signature_parameters(context.signature))
+    return (
+        lines / LINES_PER_POINT
+        + BRANCH_WEIGHT * branches
+        + PARAMETER_WEIGHT * parameters
+        + CALL_WEIGHT * len(context.calls)
+    )
+
+
+@dataclass
+class RouteStats:
+    functions: int = 0  # Functions routed here, including escalations
+    requests: int = 0  # Messages sent to the route's agent
+    seconds: float = 0.0  # Total time spent waiting for responses
+    escalations: int = 0  # Functions passed on to the next route
+
+    def get_mean_latency(self) -> float:
+        return self.seconds / self.requests if self.requests else 0.0
+
+
+class ModelRouter:
+    """
+    Sends each function to the agent configured for its complexity, so small
+    functions can use a small fast model and complicated ones a larger one.
+    Safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        agents: Dict[str, LLMAgent],
+        settings: Optional[RoutingSettings] = None,
+        metrics: MetricsRecorder = NULL_METRICS,
+    ):
+        self._agents = agents
+        self._metrics = metrics
+        self._settings = settings or RoutingSettings()
+        self._agent_names = {
+            Complexity.TRIVIAL: self._settings.trivial or DEFAULT_AGENT_NAME,
+            Complexity.TYPICAL: self._settings.typical or DEFAULT_AGENT_NAME,
+            Complexity.COMPLEX: self._settings.complex or DEFAULT_AGENT_NAME,
+        }
+        for route, name in self._agent_names.items():
+            if name not in agents:
+                raise ValueError(
+                    f"Route '{route.value}' uses agent '{name}', which is not "
+                    f"configured. Known agents: {', '.join(sorted(agents))}."
+                )
+        self._lock = threading.Lock()
+        self.stats: Dict[Complexity, RouteStats] = {
+            route: RouteStats() for route in ROUTE_ORDER
+        }
+
+    def get_route(self, context: FunctionContextModel) -> Complexity:
+        score = get_complexity_score(context)
+        if score <= self._settings.trivial_max_score:
+            position = 0
+        elif score >= self._settings.complex_min_score:
+            position = 2
+        else:
+            position = 1
+        position = min(2, max(0, position + self._settings.quality - 1))
+        route = ROUTE_ORDER[position]
+        with self._lock:
+            self.stats[route].functions += 1
+        return route
+
+    def escalate(self, route: Complexity) -> Optional[Complexity]:
+        """
+        Returns the next route up that uses a different agent, or None if
+        escalation is disabled or no such route exists.
+        """
+        if not self._settings.escalate:
+            return None
+        name = self._agent_names[route]
+        for next_route in ROUTE_ORDER[ROUTE_ORDER.index(route) + 1 :]:
+            if self._agent_names[next_route] != name:
+                with self._lock:
+                    self.stats[route].escalations += 1
+                    self.stats[next_route].functions += 1
+                return next_route
+        return None
+
+    def send_message(self, route: Complexity, message: str) -> str:
+        name = self._agent_names[route]
+        start = time.perf_counter()
+        try:
+            return self._agents[name].send_message(message)
+        except Exception:
+            self._metrics.add("request_errors", route=route.value, agent=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stats[route].requests += 1
+                self.stats[route].seconds += elapsed
+            self._metrics.observe(
+                "request_seconds", elapsed, route=route.value, agent=name
+            )
+
+    def cancel(self):
+        for agent in self._agents.values():
+            agent.cancel()
+
+    def get_summary(self) -> List[Tuple[Complexity, str, RouteStats]]:
+        """Returns (route, agent name, stats) for routes that were used."""
+        return [
+            (route, self._agent_names[route], self.stats[route])
+            for route in ROUTE_ORDER
+            if self.stats[route].functions
+        ]
@@ -0,0 +1,85 @@
+import math
+from typing import List, Optional, Set, Tuple
+from docmancer.generator.call_graph import CallGraph
+from docmancer.models.function_context import FunctionContextModel
+
+# Score added for each property of a function. Deferred functions were left
+# over by a budgeted run and always go first.
+DEFERRED_WEIGHT = 100.0
+UNDOCUMENTED_WEIGHT = 8.0
+EXPORTED_WEIGHT = 4.0
+PUBLIC_WEIGHT = 2.0
+FAN_IN_WEIGHT = 1.0  # Per doubling of the number of callers
+MAX_SIZE_SCORE = 2.0
+SIZE_LINES_PER_POINT = 20
+
+
+def is_public(context: FunctionContextModel) -> bool:
+    """Returns True for functions without a leading underscore and dunders."""
+    name = context.qualified_name.split(".")[-1]
+    return not name.startswith("_") or (name.startswith("__") and name.endswith("__"))
+
+
+def get_priority(
+    context: FunctionContextModel, fan_in: int = 0, deferred: bool = False
+) -> float:
+    """
+    Scores how valuable it is to document a function first.
+
+    Args:
+        context (FunctionContextModel): the parsed function
+        fan_in (int): number of project functions that call it
+        deferred (bool): True if a previous run ran out of budget before it
+
+    Returns:
+        float: priority, higher is generated earlier
+    """
+    score = 0.0
+    if deferred:
+        score += DEFERRED_WEIGHT
+    if context.docstring is None:
+        score += UNDOCUMENTED_WEIGHT
+    if context.exported:
+        score += EXPORTED_WEIGHT
+    if is_public(context):
+        score += PUBLIC_WEIGHT
+    score += FAN_IN_WEIGHT * math.log2(1 + fan_in)
+    lines = max(0, context.end_line - context.start_line)
+    score += min(MAX_SIZE_SCORE, lines / SIZE_LINES_PER_POINT)
+    return score
+
+
+def get_priority_order(
+    functions: List[Tuple[str, FunctionContextModel]],
+    deferred: Optional[Set[Tuple[str, str]]] = None,
+) -> List[int]:
+    """
+    Orders functions from highest to lowest priority. Equal scores keep file
+    and line order so runs are repeatable.
+
+    Args:
+        functions (List[Tuple[str, FunctionContextModel]]): (file path, context) pairs
+        deferred (Set[Tuple[str, str]], optional): (file path, qualified name)
+            of functions deferred by the previous run
+
+    Returns:
+        List[int]: indices into `functions`
+    """
+    deferred = deferred or set()
+    graph = CallGraph(functions)
+    scores = [
+        get_priority(
+            context,
+            fan_in=len(graph.get_callers(idx)),
+            deferred=(str(file_path), context.qualified_name) in deferred,
+        )
+        for idx, (file_path, context) in enumerate(functions)
+    ]
+    return sorted(
+        range(len(functions)),
+        key=lambda idx: (
+            -scores[idx],
+            str(functions[idx][0]),
+            functions[idx][1].start_line,
+        ),
+    )
@@ -0,0 +1,383 @@
+import io
+import tokenize
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+from docmancer.utils.token_utils import estimate_tokens
+
+# String literals longer than this are cut down to their first characters
+MAX_LITERAL_CHARS = 120
+LITERAL_KEEP_CHARS = 40
+
+# Bracketed data spanning more lines than this keeps only its first lines
+MAX_TABLE_LINES = 8
+TABLE_KEEP_LINES = 3
+
+# Runs of similar statements or elif/case branches longer than this are
+# shortened to their first two entries and their last one
+MAX_REPEATS = 4
+
+# Statements kept by the skeleton step. Everything else becomes "..."
+SKELETON_KEYWORDS = {
+    "async",
+    "await",
+    "break",
+    "case",
+    "class",
+    "continue",
+    "def",
+    "elif",
+    "else",
+    "except",
+    "finally",
+    "for",
+    "if",
+    "match",
+    "raise",
+    "return",
+    "try",
+    "while",
+    "with",
+    "yield",
+}
+
+DATA_TOKEN_TYPES = {tokenize.NUMBER, tokenize.STRING, tokenize.NL, tokenize.COMMENT}
+DATA_NAMES = {"True", "False", "None"}
+
+
+@dataclass
+class CompactionResult:
+    body: str
+    original_tokens: int
+    tokens: int
+    steps: List[str] = field(default_factory=list)  # Steps that were applied
+
+    def get_reduction(self) -> float:
+        """Returns the fraction of tokens removed, 0.0 if nothing changed."""
+        if not self.original_tokens:
+            return 0.0
+        return 1.0 - self.tokens / self.original_tokens
+
+
+class PromptCompactor:
+    """
+    Shrinks function bodies that do not fit in a prompt's token budget.
+
+    Steps run from least to most lossy and compaction stops as soon as the
+    body fits: comments and blank lines are removed, long literals and data
+    tables are elided, repetitive statements and branches are collapsed, and
+    finally only the control flow skeleton with its return and raise
+    statements is kept. As a last resort the body is truncated.
+    """
+
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[str], Optional[str]]]] = [
+            ("comments", strip_comments),
+            ("blank_lines", strip_blank_lines),
+            ("literals", elide_literals),
+            ("repetition", collapse_repetition),
+            ("skeleton", get_skeleton),
+        ]
+
+    def compact(self, body: str, max_tokens: int) -> CompactionResult:
+        """
+        Args:
+            body (str): function body as it appears in the source file
+            max_tokens (int): estimated tokens the body may use
+
+        Returns:
+            CompactionResult: the compacted body and how much it shrank
+        """
+        result = CompactionResult(
+            body=body,
+            original_tokens=estimate_tokens(body),
+            tokens=estimate_tokens(body),
+        )
+        for name, step in self._steps:
+            if result.tokens <= max_tokens:
+                return result
+            # Parser bodies start unindented, so the steps tokenize them
+            # with their other lines dedented to match
+            body, indent = _dedent(result.body)
+            compacted = step(body)
+            if compacted is None or compacted == body:
+                continue
+            compacted = _indent(compacted, indent)
+            result.body = compacted
+            result.tokens = estimate_tokens(compacted)
+            result.steps.append(name)
+        if result.tokens > max_tokens:
+            result.body = truncate(result.body, max_tokens)
+            result.tokens = estimate_tokens(result.body)
+            result.steps.append("truncate")
+        return result
+
+
+def _get_tokens(text: str) -> Optional[List[tokenize.TokenInfo]]:
+    try:
+        return list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return None
+
+
+def _dedent(body: str) -> Tuple[str, int]:
+    """Removes the common indentation of every line after the first."""
+    lines = body.split("\n")
+    rest = [line for line in lines[1:] if line.strip()]
+    indent = min((_get_indentation(line) for line in rest), default=0)
+    return "\n".join([lines[0]] + [line[indent:] for line in lines[1:]]), indent
+
+
+def _indent(body: str, indent: int) -> str:
+    lines = body.split("\n")
+    rest = [" " * indent + line if line else line for line in lines[1:]]
+    return "\n".join([lines[0]] + rest)
+
+
+def _get_indentation(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _replace_spans(text: str, spans: List[Tuple[int, int, int, int, str]]) -> str:
+    """
+    Replaces (start row, start col, end row, end col, replacement) spans, with
+    1-based rows as reported by tokenize. Spans must not overlap.
+    """
+    lines = text.split("\n")
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    for start_row, start_col, end_row, end_col, replacement in sorted(
+        spans, reverse=True
+    ):
+        start = offsets[start_row - 1] + start_col
+        end = offsets[end_row - 1] + end_col
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+def _get_logical_lines(
+    tokens: List[tokenize.TokenInfo],
+) -> List[Tuple[int, int, tokenize.TokenInfo, List[tokenize.TokenInfo]]]:
+    """
+    Groups tokens into statements. Returns (first row, last row, first token,
+    tokens) per statement, with 0-based rows.
+    """
+    statements = []
+    current: List[tokenize.TokenInfo] = []
+    skipped = (tokenize.INDENT, tokenize.DEDENT, tokenize.NL, tokenize.COMMENT)
+    for token in tokens:
+        if token.type == tokenize.ENDMARKER:
+            break
+        if not current and token.type in skipped:
+            continue
+        current.append(token)
+        if token.type == tokenize.NEWLINE:
+            statements.append(
+                (current[0].start[0] - 1, token.start[0] - 1, current[0], current)
+            )
+            current = []
+    if current:
+        statements.append(
+            (current[0].start[0] - 1, current[-1].end[0] - 1, current[0], current)
+        )
+    return statements
+
+
+def strip_comments(body: str) -> Optional[str]:
+    tokens = _get_tokens(body)
+    if tokens is None:
+        return None
+    spans = [
+        (*token.start, *token.end, "")
+        for token in tokens
+        if token.type == tokenize.COMMENT
+    ]
+    if not spans:
+        return body
+    lines = _replace_spans(body, spans).split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def strip_blank_lines(body: str) -> Optional[str]:
+    return "\n".join(line for line in body.split("\n") if line.strip())
+
+
+def elide_literals(body: str) -> Optional[str]:
+    tokens = _get_tokens(body)
+    if tokens is None:
+        return None
+    lines = body.split("\n")
+    spans = []
+
+    # Data tables: bracketed spans of many lines holding only literals
+    open_brackets = []
+    for idx, token in enumerate(tokens):
+        if token.type != tokenize.OP:
+            continue
+        if token.string in "([{":
+            open_brackets.append(idx)
+        elif token.string in ")]}" and open_brackets:
+            start_idx = open_brackets.pop()
+            start_row, end_row = tokens[start_idx].start[0], token.start[0]
+            if end_row - start_row <= MAX_TABLE_LINES:
+                continue
+            inner = tokens[start_idx + 1 : idx]
+            if all(
+                t.type in DATA_TOKEN_TYPES
+                or (t.type == tokenize.OP and t.string in ",:-+()[]{}")
+                or (t.type == tokenize.NAME and t.string in DATA_NAMES)
+                for t in inner
+            ):
+                # Rows are 1-based: keep the opening line and the first rows
+                keep_through = start_row + TABLE_KEEP_LINES
+                elided = end_row - keep_through - 1
+                indent = " " * _get_indentation(lines[start_row])
+                spans.append(
+                    (
+                        keep_through + 1,
+                        0,
+                        end_row,
+                        0,
+                        f"{indent}...  # {elided} lines of data elided\n",
+                    )
+                )
+    spans = [
+        span
+        for span in spans
+        if not any(
+            other is not span and other[0] <= span[0] and span[2] <= other[2]
+            for other in spans
+        )
+    ]
+    tables = [(span[0], span[2]) for span in spans]
+
+    # Long string literals outside of elided tables
+    for token in tokens:
+        if token.type != tokenize.STRING or len(token.string) <= MAX_LITERAL_CHARS:
+            continue
+        if any(first <= token.start[0] <= last for first, last in tables):
+            continue
+        quote_start = min(
+            position
+            for position in (token.string.find('"'), token.string.find("'"))
+            if position != -1
+        )
+        quote = token.string[quote_start]
+        if token.string[quote_start : quote_start + 3] == quote * 3:
+            quote = quote * 3
+        prefix = token.string[:quote_start]
+        kept = token.string[len(prefix) + len(quote) :][:LITERAL_KEEP_CHARS]
+        kept = kept.split("\n")[0].rstrip("\\")
+        spans.append((*token.start, *token.end, f"{prefix}{quote}{kept}...{quote}"))
+    if not spans:
+        return body
+    return _replace_spans(body, spans)
+
+
+def _get_shape(statement_tokens: List[tokenize.TokenInfo]) -> tuple:
+    return tuple(
+        token.type if token.type in (tokenize.NUMBER, tokenize.STRING) else token.string
+        for token in statement_tokens
+        if token.type not in (tokenize.NL, tokenize.COMMENT, tokenize.NEWLINE)
+    )
+
+
+def collapse_repetition(body: str) -> Optional[str]:
+    """
+    Shortens long runs of similar one-line statements (same tokens apart
+    from literal values) and long elif/case chains.
+    """
+    tokens = _get_tokens(body)
+    if tokens is None:
+        return None
+    lines = body.split("\n")
+    statements = _get_logical_lines(tokens)
+    removed = {}  # First removed row -> (last removed row, comment)
+
+    def collapse(run: List[Tuple[int, int]], what: str):
+        # Keep the first two entries and the last one of each run
+        if len(run) <= MAX_REPEATS:
+            return
+        first, last = run[2][0], run[-2][1]
+        indent = " " * _get_indentation(lines[run[0][0]])
+        removed[first] = (last, f"{indent}# ... {len(run) - 3} similar {what} elided")
+
+    # Similar statements at the same indentation
+    run: List[Tuple[int, int]] = []
+    previous = None
+    for first, last, token, statement_tokens in statements:
+        key = (token.start[1], _get_shape(statement_tokens))
+        if first == last and key == previous:
+            run.append((first, last))
+            continue
+        collapse(run, "statements")
+        run = [(first, last)] if first == last else []
+        previous = key if first == last else None
+    collapse(run, "statements")
+
+    # elif/case chains: each branch runs until the next line at its indentation
+    branch_starts = [
+        (first, token.start[1])
+        for first, _, token, _ in statements
+        if token.string in ("elif", "case")
+    ]
+    chain: List[Tuple[int, int]] = []
+    for idx, (row, column) in enumerate(branch_starts):
+        end = row + 1
+        while end < len(lines) and (
+            not lines[end].strip() or _get_indentation(lines[end]) > column
+        ):
+            end += 1
+        if chain and chain[-1][1] + 1 == row:
+            chain.append((row, end - 1))
+        else:
+            collapse(chain, "branches")
+            chain = [(row, end - 1)]
+    collapse(chain, "branches")
+
+    if not removed:
+        return body
+    compacted = []
+    row = 0
+    while row < len(lines):
+        if row in removed:
+            last, comment = removed[row]
+            compacted.append(comment)
+            row = last + 1
+            continue
+        compacted.append(lines[row])
+        row += 1
+    return "\n".join(compacted)
+
+
+def get_skeleton(body: str) -> Optional[str]:
+    """
+    Keeps compound statement headers and return, raise, yield, break and
+    continue statements. Other statements are replaced with "...".
+    """
+    tokens = _get_tokens(body)
+    if tokens is None:
+        return None
+    lines = body.split("\n")
+    skeleton = []
+    for first, last, token, _ in _get_logical_lines(tokens):
+        if token.string in SKELETON_KEYWORDS or token.string.startswith("@"):
+            skeleton.extend(lines[first : last + 1])
+            continue
+        placeholder = " " * token.start[1] + "..."
+        if not skeleton or skeleton[-1] != placeholder:
+            skeleton.append(placeholder)
+    return "\n".join(skeleton)
+
+
+def truncate(body: str, max_tokens: int) -> str:
+    lines = body.split("\n")
+    kept = []
+    for line in lines:
+        if estimate_tokens("\n".join(kept + [line])) > max_tokens:
+            break
+        kept.append(line)
+    omitted = len(lines) - len(kept)
+    if omitted:
+        kept.append(f"# ... {omitted} more lines truncated")
+    return "\n".join(kept)
@@ -1,32 +1,68 @@
+from docmancer.generator.examples import FunctionExample
 from docmancer.models.function_context import FunctionContextModel
 from docmancer.models.function_summary import FunctionSummaryModel
 from docmancer.models.parameter_model import ParameterModel
-from typing import List
+from typing import Dict, List, Optional
 import json
 
+# Only the start of a broken response is sent back; the JSON is near the top
+MAX_FIX_RESPONSE_CHARS = 2000
+
+
+def get_expected_json_format() -> str:
+    model = FunctionSummaryModel(
+        summary="A summary of what the function does based on its definition.",
+        parameters=[
+            ParameterModel(
+                name="parameter", type="type", desc="description of parameter"
+            )
+        ],
+        return_description="A description of the return value if there is one",
+    )
+    return model.to_json(indent=2)
+
 
 class Prompt:
-    def __init__(self, function_context: FunctionContextModel):
+    def __init__(
+        self,
+        function_context: FunctionContextModel,
+        callee_summaries: Optional[Dict[str, str]] = None,
+        examples: Optional[List[FunctionExample]] = None,
+    ):
+        self._callee_summaries = callee_summaries or {}
+        self._examples = examples or []
         self._prompt_cls = self.create_prompt(function_context)
 
     def get(self) -> str:
         return self._prompt_cls
 
+    @property
+    def examples(self) -> List[FunctionExample]:
+        return self._examples
+
     def get_leading_comments_string(self, comments: List[str]) -> str:
         return ("\n").join(comments)
 
-    def get_expected_json_format(self):
+    def get_callee_summaries_string(self) -> str:
+        if not self._callee_summaries:
+            return ""
+        lines = [
+            f"\n- {name}: {summary}"
+            for name, summary in sorted(self._callee_summaries.items())
+        ]
+        return "\n\nCalled Functions (already documented):" + "".join(lines)
 
-        model = FunctionSummaryModel(
-            summary="A summary of what the function does based on its definition.",
-            parameters=[
-                ParameterModel(
-                    name="parameter", type="type", desc="description of parameter"
-                )
-            ],
-            return_description="A description of the return value if there is one",
+    def get_examples_string(self) -> str:
+        if not self._examples:
+            return ""
+        sections = [f"\n\n{example.get_text()}" for example in self._examples]
+        return (
+            "\n\nDocumented Functions in This Project (match their wording and level of detail):"
+            + "\n---".join(sections)
         )
-        return model.to_json(indent=2)
+
+    def get_expected_json_format(self):
+        return get_expected_json_format()
 
     def create_prompt(self, context: FunctionContextModel):
         return (
@@ -37,6 +73,8 @@ class Prompt:
             f"\n---"
             f"{context.body}"
             f"\n---"
+            f"{self.get_callee_summaries_string()}"
+            f"{self.get_examples_string()}"
             f"\n\nYour task:"
             f"\n- Summarize what the function does, optionally adding any remarks or example usage if they would be useful to developers calling the function such as rasied exceptions."
             f"\n- Describe what each parameter means in the context of the function if there are any. Ignore parameters if there are none."
@@ -45,3 +83,26 @@ class Prompt:
             f"\n- Do not write an introduction or summary. Respond with only valid JSON and make sure it follows this format:"
             f"\n{self.get_expected_json_format()}"
         )
+
+
+class JsonFixPrompt:
+    """
+    Short follow-up request asking the model to correct a response that could
+    not be parsed, instead of sending the full function prompt again.
+    """
+
+    def __init__(self, invalid_response: str):
+        self._prompt = self.create_prompt(invalid_response or "")
+
+    def get(self) -> str:
+        return self._prompt
+
+    def create_prompt(self, invalid_response: str) -> str:
+        return (
+            f"This response should have been valid JSON but could not be parsed:"
+            f"\n---"
+            f"\n{invalid_response[:MAX_FIX_RESPONSE_CHARS]}"
+            f"\n---"
+            f"\n\nRespond with only the corrected JSON, in this format:"
+            f"\n{get_expected_json_format()}"
+        )
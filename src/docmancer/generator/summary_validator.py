@@ -0,0 +1,154 @@
+import ast
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import docmancer.utils.json_utils as ju
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+from docmancer.models.parameter_model import ParameterModel
+
+# Implicit first parameters that are never documented
+IMPLICIT_PARAMETERS = ("self", "cls")
+
+
+@dataclass
+class RepairStats:
+    """How model responses were turned into summaries during a run."""
+
+    valid: int = 0  # Parsed without changes
+    repaired: int = 0  # Fixed locally
+    reprompted: int = 0  # Sent back to the model with a fix-this-JSON request
+    reprompt_fixed: int = 0
+    failed: int = 0  # No summary could be recovered
+    repairs: Dict[str, int] = field(default_factory=dict)  # Count per defect
+
+
+def get_signature_parameters(signature: str) -> List[Tuple[str, str]]:
+    """
+    Returns (name, annotation) pairs for the parameters of a function
+    signature such as "def f(a, b: int = 1, *args)". The annotation is empty
+    if there is none. Returns an empty list if the signature cannot be read.
+    """
+    try:
+        tree = ast.parse(signature.strip().rstrip(":") + ": pass")
+    except SyntaxError:
+        return []
+    function = tree.body[0]
+    arguments = function.args
+    parameters = (
+        arguments.posonlyargs
+        + arguments.args
+        + ([arguments.vararg] if arguments.vararg else [])
+        + arguments.kwonlyargs
+        + ([arguments.kwarg] if arguments.kwarg else [])
+    )
+    return [
+        (
+            parameter.arg,
+            ast.unparse(parameter.annotation) if parameter.annotation else "",
+        )
+        for parameter in parameters
+        if parameter.arg not in IMPLICIT_PARAMETERS
+    ]
+
+
+class SummaryValidator:
+    """
+    Turns raw model responses into FunctionSummaryModels.
+
+    Malformed JSON is repaired locally where possible and missing fields are
+    filled in from the function's signature, so a response only has to be
+    re-requested when nothing usable can be recovered from it. Safe to call
+    from several threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = RepairStats()
+
+    def parse(
+        self, response: Optional[str], context: FunctionContextModel
+    ) -> Tuple[Optional[FunctionSummaryModel], List[str]]:
+        """
+        Parses a response without recording statistics.
+
+        Returns:
+            Tuple[Optional[FunctionSummaryModel], List[str]]: the summary or
+                None, and the repairs it needed
+        """
+        data, repairs = ju.repair_json(response)
+        if data is None:
+            return None, repairs
+        summary = data.get("summary")
+        if not isinstance(summary, str) or not summary.strip():
+            return None, repairs + ["missing_summary"]
+
+        return_description = data.get("return_description")
+        if not isinstance(return_description, str):
+            return_description = ""
+            repairs.append("missing_return_description")
+
+        signature_parameters = get_signature_parameters(context.signature)
+        parameters = self._get_parameters(data.get("parameters"), repairs)
+        if parameters is None:
+            parameters = [
+                ParameterModel(name=name, type=annotation, desc="")
+                for name, annotation in signature_parameters
+            ]
+            repairs.append("missing_parameters")
+        elif "truncated" in repairs:
+            # Parameters cut off with the rest of the response
+            described = {parameter.name for parameter in parameters}
+            parameters += [
+                ParameterModel(name=name, type=annotation, desc="")
+                for name, annotation in signature_parameters
+                if name not in described
+            ]
+
+        return (
+            FunctionSummaryModel(
+                summary=summary,
+                return_description=return_description,
+                parameters=parameters,
+            ),
+            repairs,
+        )
+
+    def _get_parameters(
+        self, values, repairs: List[str]
+    ) -> Optional[List[ParameterModel]]:
+        if not isinstance(values, list):
+            return None
+        parameters = []
+        for value in values:
+            if isinstance(value, str):
+                value = {"name": value}
+            if not isinstance(value, dict) or not isinstance(value.get("name"), str):
+                if "invalid_parameter" not in repairs:
+                    repairs.append("invalid_parameter")
+                continue
+            fields = {}
+            for key in ("type", "desc"):
+                fields[key] = value.get(key)
+                if not isinstance(fields[key], str):
+                    fields[key] = "" if fields[key] is None else str(fields[key])
+                    if "missing_parameter_field" not in repairs:
+                        repairs.append("missing_parameter_field")
+            parameters.append(ParameterModel(name=value["name"], **fields))
+        return parameters
+
+    def record(self, repairs: List[str], succeeded: bool, reprompted: bool = False):
+        """Adds the outcome of one summary to the run's statistics."""
+        with self._lock:
+            if reprompted:
+                self.stats.reprompted += 1
+                if succeeded:
+                    self.stats.reprompt_fixed += 1
+            elif succeeded and repairs:
+                self.stats.repaired += 1
+            elif succeeded:
+                self.stats.valid += 1
+            if not succeeded:
+                self.stats.failed += 1
+            for repair in repairs:
+                self.stats.repairs[repair] = self.stats.repairs.get(repair, 0) + 1
@@ -0,0 +1,260 @@
+import ast
+import threading
+from typing import Callable, Dict, List, Optional
+from docmancer.generator.summary_validator import get_signature_parameters
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+from docmancer.models.parameter_model import ParameterModel
+
+# Expressions longer than this are not quoted in a template summary
+MAX_EXPRESSION_CHARS = 60
+
+# Longer bodies are never trivial, so they are not parsed at all
+MAX_TEMPLATE_LINES = 6
+
+STRING_METHODS = ("__repr__", "__str__")
+
+
+def _get_function_node(context: FunctionContextModel) -> Optional[ast.FunctionDef]:
+    """Rebuilds a function definition from its signature and body text."""
+    lines = context.body.split("\n")
+    rest = [line for line in lines[1:] if line.strip()]
+    indent = min((len(line) - len(line.lstrip()) for line in rest), default=0)
+    body = [lines[0]] + [line[indent:] for line in lines[1:]]
+    source = context.signature + ":\n" + "\n".join("    " + line for line in body)
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    if not tree.body or not isinstance(tree.body[0], ast.FunctionDef):
+        return None
+    return tree.body[0]
+
+
+def _get_statements(function: ast.FunctionDef) -> List[ast.stmt]:
+    """Returns the function's statements, not counting a docstring."""
+    statements = function.body
+    if (
+        statements
+        and isinstance(statements[0], ast.Expr)
+        and isinstance(statements[0].value, ast.Constant)
+        and isinstance(statements[0].value.value, str)
+    ):
+        statements = statements[1:]
+    return statements
+
+
+def _get_self_attribute(node: ast.AST) -> Optional[str]:
+    if (
+        isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Name)
+        and node.value.id in ("self", "cls")
+    ):
+        return node.attr
+    return None
+
+
+def _get_name(context: FunctionContextModel) -> str:
+    return context.qualified_name.split(".")[-1]
+
+
+def _is_dunder(context: FunctionContextModel) -> bool:
+    """
+    Special methods such as `__init__` mean more than their one statement,
+    e.g. `__init__` storing a parameter does not set an existing value.
+    """
+    name = _get_name(context)
+    return name.startswith("__") and name.endswith("__")
+
+
+def _get_words(name: str) -> str:
+    return name.strip("_").replace("_", " ")
+
+
+def _get_parameters(context: FunctionContextModel, desc: str) -> List[ParameterModel]:
+    return [
+        ParameterModel(name=name, type=annotation, desc=desc.format(name=name))
+        for name, annotation in get_signature_parameters(context.signature)
+    ]
+
+
+def getter_rule(context, function) -> Optional[FunctionSummaryModel]:
+    """`return self.attribute` with no other parameters."""
+    if _is_dunder(context):
+        return None
+    statements = _get_statements(function)
+    if len(statements) != 1 or not isinstance(statements[0], ast.Return):
+        return None
+    attribute = _get_self_attribute(statements[0].value)
+    if attribute is None or get_signature_parameters(context.signature):
+        return None
+    return FunctionSummaryModel(
+        summary=f"Returns the {_get_words(attribute)}.",
+        return_description=f"The value of `self.{attribute}`.",
+    )
+
+
+def setter_rule(context, function) -> Optional[FunctionSummaryModel]:
+    """`self.attribute = parameter` for the function's only parameter."""
+    if _is_dunder(context):
+        return None
+    statements = _get_statements(function)
+    parameters = get_signature_parameters(context.signature)
+    if len(statements) != 1 or len(parameters) != 1:
+        return None
+    statement = statements[0]
+    if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+        target = statement.targets[0]
+    elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+        target = statement.target
+    else:
+        return None
+    attribute = _get_self_attribute(target)
+    value = statement.value
+    if (
+        attribute is None
+        or not isinstance(value, ast.Name)
+        or value.id != parameters[0][0]
+    ):
+        return None
+    return FunctionSummaryModel(
+        summary=f"Sets the {_get_words(attribute)}.",
+        return_description="",
+        parameters=_get_parameters(context, f"New value for `self.{attribute}`."),
+    )
+
+
+def property_rule(context, function) -> Optional[FunctionSummaryModel]:
+    """A @property that returns a single short expression."""
+    if "property" not in context.decorators:
+        return None
+    statements = _get_statements(function)
+    if len(statements) != 1 or not isinstance(statements[0], ast.Return):
+        return None
+    if statements[0].value is None:
+        return None
+    expression = ast.unparse(statements[0].value)
+    if len(expression) > MAX_EXPRESSION_CHARS:
+        return None
+    return FunctionSummaryModel(
+        summary=f"Returns `{expression}`.",
+        return_description=f"The value of `{expression}`.",
+    )
+
+
+def repr_rule(context, function) -> Optional[FunctionSummaryModel]:
+    """`__repr__` and `__str__` that return a single expression."""
+    name = _get_name(context)
+    statements = _get_statements(function)
+    if name not in STRING_METHODS or len(statements) != 1:
+        return None
+    if not isinstance(statements[0], ast.Return):
+        return None
+    kind = "developer facing" if name == "__repr__" else "readable"
+    return FunctionSummaryModel(
+        summary=f"Returns a {kind} string representation of the object.",
+        return_description="The string representation.",
+    )
+
+
+def _is_simple_callee(node: ast.AST) -> bool:
+    """True for `name`, `a.b.c` and `super().name` style callees."""
+    if len(ast.unparse(node)) > MAX_EXPRESSION_CHARS:
+        return False
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    if isinstance(node, ast.Call):
+        return isinstance(node.func, ast.Name) and node.func.id == "super"
+    return isinstance(node, ast.Name)
+
+
+def passthrough_rule(context, function) -> Optional[FunctionSummaryModel]:
+    """`return other(...)` called with exactly the function's own parameters."""
+    if _is_dunder(context):
+        return None
+    statements = _get_statements(function)
+    if len(statements) != 1:
+        return None
+    statement = statements[0]
+    if isinstance(statement, ast.Return):
+        call = statement.value
+    elif isinstance(statement, ast.Expr):
+        call = statement.value
+    else:
+        return None
+    if not isinstance(call, ast.Call) or not _is_simple_callee(call.func):
+        return None
+    parameters = [name for name, _ in get_signature_parameters(context.signature)]
+    passed = []
+    for argument in call.args:
+        if isinstance(argument, ast.Starred):
+            argument = argument.value
+        if not isinstance(argument, ast.Name):
+            return None
+        passed.append(argument.id)
+    for keyword in call.keywords:
+        if not isinstance(keyword.value, ast.Name):
+            return None
+        passed.append(keyword.value.id)
+    if sorted(passed) != sorted(parameters):
+        return None
+    callee = ast.unparse(call.func)
+    returns = isinstance(statement, ast.Return)
+    summary = f"Calls `{callee}`"
+    if parameters:
+        summary += " with the same arguments"
+    return FunctionSummaryModel(
+        summary=summary + (" and returns its result." if returns else "."),
+        return_description=f"The result of `{callee}`." if returns else "",
+        parameters=_get_parameters(context, "Passed to `" + callee + "`."),
+    )
+
+
+TEMPLATE_RULES: Dict[
+    str,
+    Callable[[FunctionContextModel, ast.FunctionDef], Optional[FunctionSummaryModel]],
+] = {
+    "getter": getter_rule,
+    "setter": setter_rule,
+    "property": property_rule,
+    "repr": repr_rule,
+    "passthrough": passthrough_rule,
+}
+
+
+class TemplateSummarizer:
+    """
+    Writes summaries for trivial functions from rules instead of asking a
+    model: getters, setters, one line properties, __repr__/__str__ and
+    wrappers that pass their arguments straight through. Safe to call from
+    several threads.
+    """
+
+    def __init__(self, rules: Optional[List[str]] = None):
+        rules = list(TEMPLATE_RULES) if rules is None else rules
+        unknown = [rule for rule in rules if rule not in TEMPLATE_RULES]
+        if unknown:
+            raise ValueError(
+                f"Unknown template rules: {', '.join(unknown)}. "
+                f"Must be any of: {', '.join(TEMPLATE_RULES)}."
+            )
+        self._rules = [(rule, TEMPLATE_RULES[rule]) for rule in rules]
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}  # Summaries written per rule
+
+    def get_summary(
+        self, context: FunctionContextModel
+    ) -> Optional[FunctionSummaryModel]:
+        """Returns a template summary, or None if no enabled rule applies."""
+        if not self._rules or context.body.count("\n") >= MAX_TEMPLATE_LINES:
+            return None
+        function = _get_function_node(context)
+        if function is None:
+            return None
+        for name, rule in self._rules:
+            summary = rule(context, function)
+            if summary is not None:
+                with self._lock:
+                    self.counts[name] = self.counts.get(name, 0) + 1
+                return summary
+        return None
@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import List
+from dataclasses_json import dataclass_json
+
+
+@dataclass_json
+@dataclass
+class FunctionCoverageModel:
+    qualified_name: str  # Full function name. e.g., module.Class.method
+    start_line: int
+    documented: bool  # True if the function already has a docstring
+
+
+@dataclass_json
+@dataclass
+class FileCoverageModel:
+    file_path: str
+    functions: List[FunctionCoverageModel] = field(default_factory=list)
+
+    def get_documented_count(self) -> int:
+        return sum(1 for function in self.functions if function.documented)
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 
 @dataclass
@@ -10,3 +10,7 @@ class FunctionContextModel:
     comments: List[str]
     start_line: int
     end_line: int
+    calls: List[str] = field(default_factory=list)  # Names of called functions
+    docstring: Optional[str] = None  # Existing docstring, if the function has one
+    exported: bool = False  # Listed in the module's __all__
+    decorators: List[str] = field(default_factory=list)  # Without the "@"
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+from docmancer.models.documentation_model import DocumentationModel
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+
+
+@dataclass
+class WorkItemModel:
+    file_path: Path
+    context: FunctionContextModel
+    file_total: int  # Number of functions parsed from file_path
+    fingerprint: str = ""  # Hash of the function's signature and body
+    summary: Optional[FunctionSummaryModel] = None
+    doc: Optional[DocumentationModel] = None
+    approved: bool = False  # Set once the doc is accepted for commit
+
+    def get_key(self) -> Tuple[str, str, str]:
+        """Identifies this version of the function across runs."""
+        return (str(self.file_path), self.context.qualified_name, self.fingerprint)
@@ -1,11 +1,18 @@
+from typing import Optional
 from docmancer.parser.base_parser import BaseParser
-from docmancer.parser.python_parser import PythonParser
+from docmancer.utils.registry import LazyRegistry
+
+# Parser classes by language, imported on first use
+PARSERS = LazyRegistry(
+    "docmancer.parsers",
+    {"python": "docmancer.parser.python_parser:PythonParser"},
+)
 
 
 class ParserFactory:
 
-    def get_parser(self, language: str) -> BaseParser:
-        if language == "python":
-            return PythonParser()
-        else:
+    def get_parser(self, language: str) -> Optional[BaseParser]:
+        parser_class = PARSERS.get(language) if language else None
+        if parser_class is None:
             return None
+        return parser_class()
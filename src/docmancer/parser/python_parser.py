@@ -1,30 +1,36 @@
 import tree_sitter_python as tspython
-import tree_sitter_cpp as tscpp
 from tree_sitter import Language, Parser
 from docmancer.parser.base_parser import BaseParser
 from docmancer.models.function_context import FunctionContextModel
 import docmancer.utils.file_utils as fu
-from typing import List
+from typing import List, Optional
 import os
 from pathlib import Path
 import fnmatch
+import threading
 
 
 class PythonParser(BaseParser):
     def __init__(self):
         self._language = Language(tspython.language())
-        self._parser = Parser(self._language)
+        self._local = threading.local()
+        # Compiling a query is far slower than running it, so do it once
+        self._function_query = self._language.query("""
+            (
+            function_definition
+                name: (identifier) @func.name
+            )
+            """)
 
-    def get_function_nodes(self, tree, source_code: bytes):
-        query_str = """
-        (
-        function_definition
-            name: (identifier) @func.name
-        )
-        """
-        query = self._language.query(query_str)
+    @property
+    def _parser(self) -> Parser:
+        # tree-sitter parsers are not thread safe, so each thread gets its own
+        if not hasattr(self._local, "parser"):
+            self._local.parser = Parser(self._language)
+        return self._local.parser
 
-        captures = query.captures(tree.root_node)
+    def get_function_nodes(self, tree, source_code: bytes):
+        captures = self._function_query.captures(tree.root_node)
         return captures
 
     def get_function_names(self, captures, source_code: bytes) -> dict:
@@ -70,26 +76,148 @@ class PythonParser(BaseParser):
         functions[module_name] = function_nodes
 
         # Parse each function root node and create function contexts
+        exported_names = self.get_exported_names(tree, code)
         function_contexts = []
         for name, function_nodes in functions.items():
-            for node in function_nodes:
-                function_contexts.append(
-                    self.extract_function_contexts(node, code, name)
+            # In file order, as a set's order changes from run to run
+            for node in sorted(function_nodes, key=lambda node: node.start_byte):
+                contexts = self.extract_function_contexts(
+                    node, code, name, exported_names
                 )
+                function_contexts.append(contexts)
 
         return function_contexts
 
     def get_node_text(self, node, source_code) -> str:
         return source_code[node.start_byte : node.end_byte].decode("utf-8")
 
-    def extract_function_contexts(self, root_node, source_code: str, module_name):
+    def get_exported_names(self, tree, source_code: bytes) -> set:
+        """
+        Returns the names listed in a module level `__all__` assignment.
+        Only literal lists and tuples of strings are understood.
+        """
+        names = set()
+        for statement in tree.root_node.named_children:
+            if statement.type != "expression_statement" or not statement.named_children:
+                continue
+            assignment = statement.named_children[0]
+            if assignment.type not in ("assignment", "augmented_assignment"):
+                continue
+            target = assignment.child_by_field_name("left")
+            value = assignment.child_by_field_name("right")
+            if (
+                target is None
+                or value is None
+                or self.get_node_text(target, source_code=source_code) != "__all__"
+                or value.type not in ("list", "tuple")
+            ):
+                continue
+            for element in value.named_children:
+                if element.type == "string":
+                    text = self.get_node_text(element, source_code=source_code)
+                    names.add(text.strip("\"'"))
+        return names
+
+    def get_decorators(self, function_node, source_code) -> List[str]:
+        """Returns the decorators applied to a function, without the "@"."""
+        parent = function_node.parent
+        if parent is None or parent.type != "decorated_definition":
+            return []
+        return [
+            self.get_node_text(child, source_code=source_code).lstrip("@").strip()
+            for child in parent.children
+            if child.type == "decorator"
+        ]
+
+    def get_docstring(self, block_node, source_code) -> Optional[str]:
+        """
+        Returns the docstring of a function body, or None if the first
+        statement of the body is not a string literal.
+        """
+        for child in block_node.named_children:
+            if child.type == "comment":
+                continue
+            if child.type == "expression_statement" and child.named_child_count:
+                expression = child.named_children[0]
+                if expression.type in ("string", "concatenated_string"):
+                    return self.get_node_text(expression, source_code=source_code)
+            return None
+        return None
+
+    def get_called_names(self, block_node, source_code) -> List[str]:
+        """
+        Returns the sorted, unique names of functions called within a block.
+        Calls made from nested function or class definitions are not included.
+
+        Args:
+            block_node: tree-sitter node of the function body
+            source_code (bytes): content of the parsed file
+        """
+        names = set()
+        node_stack = [block_node]
+        while node_stack:
+            node = node_stack.pop()
+            if node.type in ("function_definition", "class_definition"):
+                continue
+            if node.type == "call":
+                callee = node.child_by_field_name("function")
+                if callee is not None and callee.type == "attribute":
+                    callee = callee.child_by_field_name("attribute")
+                if callee is not None and callee.type == "identifier":
+                    names.add(self.get_node_text(callee, source_code=source_code))
+            node_stack.extend(node.children)
+        return sorted(names)
+
+    def get_scope(self, node, source_code) -> List[str]:
+        """
+        Returns the names of the classes and functions a node is defined in,
+        outermost first, so methods of different classes and functions nested
+        in different functions get different qualified names.
+        """
+        scope = []
+        parent = node.parent
+        while parent is not None:
+            if parent.type in ("class_definition", "function_definition"):
+                name_node = parent.child_by_field_name("name")
+                scope.insert(0, self.get_node_text(name_node, source_code=source_code))
+            parent = parent.parent
+        return scope
+
+    def is_in_function(self, node) -> bool:
+        """Whether a node is nested in a function definition."""
+        parent = node.parent
+        while parent is not None:
+            if parent.type == "function_definition":
+                return True
+            parent = parent.parent
+        return False
+
+    def extract_function_contexts(
+        self,
+        root_node,
+        source_code: str,
+        module_name,
+        exported_names: Optional[set] = None,
+    ):
+        """
+        Returns the contexts of a function and the functions nested in it.
+        A function is exported if it is at module level, or a method of a
+        module level class, and that name is in `exported_names`.
+        """
         lines = source_code.splitlines()
 
         contexts = []
-        node_stack = [(root_node, [])]  # Each item: (node, scope_stack)
+        # Each item: (node, scope_stack, whether the scope includes a function)
+        node_stack = [
+            (
+                root_node,
+                self.get_scope(root_node, source_code),
+                self.is_in_function(root_node),
+            )
+        ]
 
         while node_stack:
-            node, scope = node_stack.pop()
+            node, scope, in_function = node_stack.pop()
 
             if node.type == "function_definition":
                 name_node = node.child_by_field_name("name")
@@ -122,13 +250,17 @@ class PythonParser(BaseParser):
                     comments="\n".join(comment_lines),
                     start_line=node.start_point[0] + 1,
                     end_line=node.end_point[0] + 1,
+                    calls=self.get_called_names(block_node, source_code),
+                    docstring=self.get_docstring(block_node, source_code),
+                    decorators=self.get_decorators(node, source_code),
+                    exported=not in_function and new_scope[0] in (exported_names or ()),
                 )
                 contexts.append(context)
 
                 # Add block contents to stack with updated scope
                 for child in reversed(node.children):
                     if child.type == "block":
-                        node_stack.append((child, new_scope))
+                        node_stack.append((child, new_scope, True))
 
             elif node.type == "class_definition":
                 name_node = node.child_by_field_name("name")
@@ -136,11 +268,11 @@ class PythonParser(BaseParser):
                 new_scope = scope + [class_name]
                 for child in reversed(node.children):
                     if child.type == "block":
-                        node_stack.append((child, new_scope))
+                        node_stack.append((child, new_scope, in_function))
 
             else:
                 # Add children to stack (depth-first traversal)
                 for child in reversed(node.children):
-                    node_stack.append((child, scope))
+                    node_stack.append((child, scope, in_function))
 
         return contexts
@@ -0,0 +1,128 @@
+import hashlib
+import io
+import threading
+import tokenize
+from typing import Dict, List, Optional, Tuple
+
+
+class FileBuffer:
+    """
+    In-memory copy of a source file, read once per run.
+
+    Lines keep their line endings. Indentation is computed once for every
+    line, on the first lookup.
+    """
+
+    def __init__(
+        self,
+        lines: List[str],
+        content_hash: str = "",
+        encoding: str = "utf-8",
+        newline: str = "\n",
+    ):
+        self.lines = lines
+        self.hash = content_hash  # sha256 of the bytes that were read
+        self.encoding = encoding  # Source encoding, including a BOM if present
+        self.newline = newline  # Line ending style of the file on disk
+        self._indentation: Optional[List[int]] = None
+
+    @classmethod
+    def read(cls, file_path) -> "FileBuffer":
+        with open(file_path, "rb") as f:
+            content = f.read()
+        try:
+            # Honors a UTF-8 BOM or a PEP 263 coding cookie
+            encoding, _ = tokenize.detect_encoding(io.BytesIO(content).readline)
+        except SyntaxError:
+            encoding = "utf-8"
+        text = content.decode(encoding)
+        newline = "\n"
+        for candidate in ("\r\n", "\n", "\r"):
+            if candidate in text:
+                newline = candidate
+                break
+        # Match text mode reads, which translate \r\n and \r to \n
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        parts = text.split("\n")
+        lines = [part + "\n" for part in parts[:-1]]
+        if parts[-1]:
+            lines.append(parts[-1])
+        return cls(
+            lines=lines,
+            content_hash=hashlib.sha256(content).hexdigest(),
+            encoding=encoding,
+            newline=newline,
+        )
+
+    def encode(self, lines: List[str]) -> bytes:
+        """Encodes lines using this file's encoding and line ending style."""
+        text = "".join(lines)
+        if self.newline != "\n":
+            text = text.replace("\n", self.newline)
+        return text.encode(self.encoding)
+
+    def get_indentation(self, line: int) -> int:
+        """
+        Returns the number of spaces before text begins on a 1-based line
+        number or -1 if the line does not exist.
+        """
+        if self._indentation is None:
+            self._indentation = [
+                len(text) - len(text.lstrip(" ")) for text in self.lines
+            ]
+        if 1 <= line <= len(self._indentation):
+            return self._indentation[line - 1]
+        return -1
+
+    def with_insertions(self, insertions: List[Tuple[int, List[str]]]) -> List[str]:
+        """
+        Returns the file's lines with blocks of lines inserted, in one pass.
+
+        Args:
+            insertions (List[Tuple[int, List[str]]]): (line, lines) pairs where
+                each block is inserted after the given 1-based line number
+
+        Returns:
+            List[str]: new file content as lines
+        """
+        merged = []
+        position = 0
+        for line, block in sorted(insertions, key=lambda insertion: insertion[0]):
+            merged.extend(self.lines[position:line])
+            merged.extend(block)
+            position = max(position, line)
+        merged.extend(self.lines[position:])
+        return merged
+
+
+class FileBufferCache:
+    """
+    Thread safe cache of FileBuffers shared by the stages of one run.
+    Buffers should be evicted once their file has been written.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, FileBuffer] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0  # Reads from disk
+
+    def get(self, file_path) -> FileBuffer:
+        key = str(file_path)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is not None:
+                self.hits += 1
+        if buffer is None:
+            buffer = FileBuffer.read(file_path)
+            with self._lock:
+                self.misses += 1
+                buffer = self._buffers.setdefault(key, buffer)
+        return buffer
+
+    def evict(self, file_path):
+        with self._lock:
+            self._buffers.pop(str(file_path), None)
+
+    def __len__(self) -> int:
+        return len(self._buffers)
@@ -1,6 +1,11 @@
 import os
+import re
+import shutil
+import tempfile
 from pathlib import Path
-from typing import List
+from typing import Dict, List
+
+CACHE_DIR_NAME = ".docmancer"
 
 
 def get_all_files_in_dir(dir_path):
@@ -21,6 +26,19 @@ def get_all_files_in_dir(dir_path):
     return files
 
 
+def get_cache_dir(project_dir: str) -> Path:
+    """
+    Returns the directory Docmancer uses for run state inside a project,
+    creating it if needed.
+
+    Args:
+        project_dir (str): root directory of the documented project
+    """
+    cache_dir = Path(project_dir or ".") / CACHE_DIR_NAME
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
 def get_files_by_pattern(pattern: str) -> List[Path]:
     """
     Return a list of Path objects matching the given glob pattern.
@@ -73,3 +91,93 @@ def read_file_to_bytes(file_path):
     with open(file_path, "rb") as file:
         file_content = file.read()
         return file_content
+
+
+def write_file_atomic(file_path, content: bytes, sync: bool = True):
+    """
+    Replaces a file's content so that readers and crashes only ever see the
+    old or the new version. Content goes to a temporary file in the same
+    directory, which is then renamed over the original. File permissions
+    are preserved.
+
+    Args:
+        file_path: path to file
+        content (bytes): new content of the file
+        sync (bool): fsync the new content before renaming. The directory
+            entry is not synced; see sync_directory.
+    """
+    file_path = Path(file_path)
+    fd, temp_path = tempfile.mkstemp(
+        dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        if file_path.exists():
+            shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def sync_directory(dir_path):
+    """
+    Flushes a directory's entries to disk so completed renames survive a
+    power loss. Does nothing on platforms that cannot open directories.
+    """
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _glob_to_regex(pattern: str) -> re.Pattern:
+    parts = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            parts.append("[^/]")
+            index += 1
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+def matches_glob(file_path, pattern: str) -> bool:
+    """
+    Whether a relative path matches a glob pattern the way Path.glob would
+    find it: `*` and `?` stay within one directory and `**` matches any
+    number of directories, including none.
+
+    Args:
+        file_path: path relative to the directory the pattern is for
+        pattern (str): glob pattern, e.g. "src/**/*.py"
+    """
+    regex = _GLOB_CACHE.get(pattern)
+    if regex is None:
+        regex = _GLOB_CACHE[pattern] = _glob_to_regex(pattern)
+    return regex.match(os.fspath(file_path).replace(os.sep, "/")) is not None
+
+
+_GLOB_CACHE: Dict[str, re.Pattern] = {}
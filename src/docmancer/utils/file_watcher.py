@@ -0,0 +1,326 @@
+"""
+Watches a project directory for saved files.
+
+On Linux the kernel's inotify is used through libc, so saves are seen as
+soon as the editor closes the file and an idle watch costs nothing. Other
+platforms, and Linux without inotify, fall back to comparing file stats a
+few times a second.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from docmancer.utils.file_utils import CACHE_DIR_NAME, matches_glob
+
+# Not worth reacting to: version control, Docmancer's own state, bytecode and
+# the files editors write next to the one being edited
+DEFAULT_IGNORE = [
+    ".git/**",
+    f"{CACHE_DIR_NAME}/**",
+    "**/__pycache__/**",
+    "**/.*.swp",
+    "**/.*.swx",
+    "**/*~",
+    "**/.#*",
+    "**/#*#",
+]
+DEFAULT_DEBOUNCE_SECONDS = 0.3
+# A file saved continuously is still reported this often
+MAX_DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 0.25
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+# IN_MODIFY is left out: editors write a file in several calls, and the
+# close after the last one is the save
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class FileChanges:
+    paths: Set[Path] = field(default_factory=set)  # Created, saved or deleted
+    # Events were lost, e.g. the kernel's queue overflowed, so every file
+    # should be checked
+    rescan: bool = False
+    first_seen: Optional[float] = None  # Unix time of the earliest change
+
+    def __bool__(self) -> bool:
+        return bool(self.paths) or self.rescan
+
+    def update(self, other: "FileChanges"):
+        self.paths.update(other.paths)
+        self.rescan = self.rescan or other.rescan
+        if other.first_seen is not None:
+            if self.first_seen is None or other.first_seen < self.first_seen:
+                self.first_seen = other.first_seen
+
+
+class FileWatcher(ABC):
+    """
+    Reports files changed under a directory, skipping paths that match an
+    ignore pattern. Patterns are globs relative to the directory.
+    """
+
+    def __init__(self, root, ignore: Optional[List[str]] = None):
+        self._root = Path(root).absolute()
+        self._ignore = DEFAULT_IGNORE + list(ignore or [])
+        self._pending = FileChanges()
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def is_ignored(self, path, is_dir: bool = False) -> bool:
+        try:
+            relative = Path(path).relative_to(self._root).as_posix()
+        except ValueError:
+            return True
+        if is_dir:
+            relative += "/"  # So "build/**" skips the directory itself
+        return any(matches_glob(relative, pattern) for pattern in self._ignore)
+
+    @abstractmethod
+    def _read(self, timeout: float) -> FileChanges:
+        """Waits up to `timeout` seconds for changes and returns them."""
+        pass
+
+    def poll(self) -> FileChanges:
+        """
+        Returns changes seen so far without waiting. They are still returned
+        by the next get_changes.
+        """
+        self._pending.update(self._read(0))
+        return self._pending
+
+    def get_changes(
+        self, timeout: float, debounce: float = DEFAULT_DEBOUNCE_SECONDS
+    ) -> FileChanges:
+        """
+        Waits up to `timeout` seconds for a change, then until nothing has
+        changed for `debounce` seconds, so a save that writes several files
+        or writes one several times is reported once.
+        """
+        changes, self._pending = self._pending, FileChanges()
+        if not changes:
+            changes.update(self._read(timeout))
+        if not changes:
+            return changes
+        deadline = time.monotonic() + MAX_DEBOUNCE_SECONDS
+        while time.monotonic() < deadline:
+            more = self._read(debounce)
+            if not more:
+                break
+            changes.update(more)
+        return changes
+
+    def close(self):
+        pass
+
+
+class PollingWatcher(FileWatcher):
+    """Finds changes by comparing the modification times of all files."""
+
+    def __init__(
+        self,
+        root,
+        ignore: Optional[List[str]] = None,
+        interval: float = POLL_INTERVAL_SECONDS,
+    ):
+        super().__init__(root, ignore)
+        self._interval = interval
+        self._stats = self._scan()
+        self._last_scan = time.monotonic()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        stats = {}
+        for directory, dir_names, file_names in os.walk(self._root):
+            dir_names[:] = [
+                name
+                for name in dir_names
+                if not self.is_ignored(Path(directory, name), is_dir=True)
+            ]
+            for name in file_names:
+                path = Path(directory, name)
+                if self.is_ignored(path):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue  # Deleted while scanning
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def _read(self, timeout: float) -> FileChanges:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._last_scan + self._interval - time.monotonic()
+            if wait > 0:
+                if time.monotonic() + wait > deadline:
+                    return FileChanges()
+                time.sleep(wait)
+            stats = self._scan()
+            self._last_scan = time.monotonic()
+            changed = {
+                path
+                for path in stats.keys() | self._stats.keys()
+                if stats.get(path) != self._stats.get(path)
+            }
+            self._stats = stats
+            if changed:
+                return FileChanges(paths=changed, first_seen=time.time())
+            if time.monotonic() >= deadline:
+                return FileChanges()
+
+
+class InotifyWatcher(FileWatcher):
+    """
+    Finds changes with Linux inotify. Each directory is watched separately,
+    and directories created later are watched as they appear.
+    """
+
+    def __init__(self, root, ignore: Optional[List[str]] = None):
+        super().__init__(root, ignore)
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available")
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._dirs: Dict[int, Path] = {}
+        self._add_tree(self._root)
+
+    def _add_watch(self, directory: Path) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(
+                    error,
+                    "Too many directories to watch, raise "
+                    "fs.inotify.max_user_watches or add --ignore-files patterns",
+                )
+            return False  # Removed before it could be watched
+        self._dirs[wd] = directory
+        return True
+
+    def _add_tree(self, directory: Path) -> List[Path]:
+        """Watches a directory and the ones below it, returning their files."""
+        files = []
+        if not self._add_watch(directory):
+            return files
+        for parent, dir_names, file_names in os.walk(directory):
+            kept = []
+            for name in dir_names:
+                path = Path(parent, name)
+                if not self.is_ignored(path, is_dir=True) and self._add_watch(path):
+                    kept.append(name)
+            dir_names[:] = kept
+            files.extend(Path(parent, name) for name in file_names)
+        return files
+
+    def _read(self, timeout: float) -> FileChanges:
+        changes = FileChanges()
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return changes
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return changes
+        changes.first_seen = time.time()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changes.rescan = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self._dirs.pop(wd, None)  # The kernel dropped the watch
+                continue
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.is_ignored(
+                    path, is_dir=True
+                ):
+                    # Files may have been written before the watch was added
+                    new_files = self._add_tree(path)
+                    changes.paths.update(f for f in new_files if not self.is_ignored(f))
+                elif mask & IN_MOVED_FROM:
+                    changes.rescan = True  # Its files now have other paths
+                continue
+            if mask & IN_CREATE:
+                continue  # Reported when the file is closed
+            if not self.is_ignored(path):
+                changes.paths.add(path)
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def is_inotify_available() -> bool:
+    return _load_libc() is not None
+
+
+def get_file_watcher(root, ignore: Optional[List[str]] = None) -> FileWatcher:
+    """Returns an inotify watcher where available, otherwise a polling one."""
+    if is_inotify_available():
+        try:
+            return InotifyWatcher(root, ignore)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                raise
+    return PollingWatcher(root, ignore)
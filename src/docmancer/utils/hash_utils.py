@@ -0,0 +1,46 @@
+import hashlib
+from docmancer.models.function_context import FunctionContextModel
+
+
+def get_function_fingerprint(context: FunctionContextModel) -> str:
+    """
+    Returns a short hash of a function's signature and body. The fingerprint
+    changes whenever the function's source changes, but not when the function
+    only moves to a different line.
+
+    Args:
+        context (FunctionContextModel): parsed function
+
+    Returns:
+        str: hex digest identifying this version of the function
+    """
+    digest = hashlib.sha256()
+    digest.update(context.signature.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(context.body.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def get_file_hash(file_path) -> str:
+    """
+    Returns the sha256 hex digest of a file's content.
+
+    Args:
+        file_path: path to file
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_text_hash(text: str) -> str:
+    """
+    Returns a short hash of a string, e.g. to tell whether a docstring
+    changed without storing it.
+
+    Args:
+        text (str): text to hash
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
@@ -1,5 +1,6 @@
 import re
 import json
+from typing import List, Optional, Tuple
 
 # def extract_json_from_text(text: str):
 #     """
@@ -36,3 +37,156 @@ def extract_json_from_text(text: str):
                 except json.JSONDecodeError:
                     return None
     return None
+
+
+_CODE_FENCE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def repair_json(text: str) -> Tuple[Optional[dict], List[str]]:
+    """
+    Parses the first JSON object in a model response, repairing common defects:
+    code fences, single quoted strings, Python literals, trailing commas,
+    raw newlines in strings and output that was cut off mid-object.
+
+    Args:
+        text (str): model response
+
+    Returns:
+        Tuple[Optional[dict], List[str]]: the parsed object or None, and the
+            names of the repairs that were needed, empty if the text was valid
+    """
+    if not text:
+        return None, []
+    parsed = extract_json_from_text(text)
+    if isinstance(parsed, dict):
+        return parsed, []
+
+    repairs = []
+    fenced = _CODE_FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+        repairs.append("code_fence")
+    start = text.find("{")
+    if start == -1:
+        return None, repairs
+
+    candidates, scan_repairs = _rewrite_json(text[start:])
+    repairs.extend(scan_repairs)
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed, repairs
+    return None, repairs
+
+
+def _rewrite_json(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Rewrites JSON-like text from its opening brace as strict JSON. Returns
+    candidate strings to try in order and the repairs that were applied.
+    When the text is truncated, later candidates drop the incomplete tail at
+    earlier commas.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cut_points: List[Tuple[int, Tuple[str, ...]]] = []
+    repairs: List[str] = []
+
+    def note(repair: str):
+        if repair not in repairs:
+            repairs.append(repair)
+
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            quote = c
+            chars = []
+            j = i + 1
+            closed = False
+            while j < n:
+                d = text[j]
+                if d == "\\" and j + 1 < n:
+                    escaped = text[j + 1]
+                    chars.append("'" if escaped == "'" else d + escaped)
+                    j += 2
+                    continue
+                if d == quote:
+                    closed = True
+                    break
+                if d == '"':
+                    chars.append('\\"')
+                elif d == "\n":
+                    chars.append("\\n")
+                    note("control_character")
+                elif d == "\t":
+                    chars.append("\\t")
+                    note("control_character")
+                else:
+                    chars.append(d)
+                j += 1
+            if quote == "'":
+                note("single_quotes")
+            if not closed:
+                note("truncated")
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+            continue
+        if c in "{[":
+            stack.append("}" if c == "{" else "]")
+            out.append(c)
+        elif c in "}]":
+            if _drop_trailing_comma(out):
+                note("trailing_comma")
+            if stack and stack[-1] == c:
+                stack.pop()
+                out.append(c)
+                if not stack:
+                    break  # Ignore anything after the object
+        elif c == ",":
+            cut_points.append((len(out), tuple(stack)))
+            out.append(c)
+        elif c.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            if word in _PYTHON_LITERALS:
+                word = _PYTHON_LITERALS[word]
+                note("python_literal")
+            out.append(word)
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    if not stack:
+        return ["".join(out)], repairs
+
+    note("truncated")
+    candidates = [_close_json(out, stack)]
+    for position, open_brackets in reversed(cut_points):
+        candidates.append(_close_json(out[:position], list(open_brackets)))
+    return candidates, repairs
+
+
+def _drop_trailing_comma(out: List[str]) -> bool:
+    idx = len(out) - 1
+    while idx >= 0 and out[idx].isspace():
+        idx -= 1
+    if idx >= 0 and out[idx] == ",":
+        del out[idx]
+        return True
+    return False
+
+
+def _close_json(out: List[str], stack: List[str]) -> str:
+    text = "".join(out).rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    return text + "".join(reversed(stack))
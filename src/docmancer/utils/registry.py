@@ -0,0 +1,89 @@
+import importlib
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def load_object(target: str) -> Any:
+    """
+    Imports the object named by a "package.module:attribute" string.
+
+    Raises:
+        ValueError: If the target is not in that form.
+    """
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Expected 'module:attribute', got '{target}'.")
+    obj = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+class LazyRegistry:
+    """
+    Maps names to backends that are only imported when they are first used,
+    so a command imports the parser, formatter or model it needs and no
+    others.
+
+    Built-in entries are "module:attribute" strings. Installed packages can
+    add entries through the `group` entry point group, for example in
+    pyproject.toml:
+
+        [project.entry-points."docmancer.parsers"]
+        rust = "docmancer_rust.parser:RustParser"
+
+    Entry points are only scanned when a name is not built in, so built-in
+    backends never pay for package metadata discovery. A registry without a
+    group only has its built-in and registered entries. Safe to call from
+    several threads.
+    """
+
+    def __init__(self, group: Optional[str], entries: Dict[str, str]):
+        self.group = group
+        self._entries: Dict[str, Any] = dict(entries)
+        self._loaded: Dict[str, Any] = {}
+        self._scanned = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Any):
+        """Adds or replaces an entry with a "module:attribute" string or object."""
+        with self._lock:
+            self._entries[name] = target
+            self._loaded.pop(name, None)
+
+    def get_names(self) -> List[str]:
+        self._scan_entry_points()
+        with self._lock:
+            return sorted(self._entries)
+
+    def get(self, name: str) -> Optional[Any]:
+        """Returns the backend registered as `name`, or None if there is none."""
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            known = name in self._entries
+        if not known:
+            self._scan_entry_points()
+        with self._lock:
+            target = self._entries.get(name)
+        if target is None:
+            return None
+        if isinstance(target, str):
+            target = load_object(target)
+        elif hasattr(target, "load") and hasattr(target, "group"):
+            target = target.load()  # importlib.metadata.EntryPoint
+        with self._lock:
+            self._loaded[name] = target
+        return target
+
+    def _scan_entry_points(self):
+        if self._scanned or self.group is None:
+            return
+        from importlib.metadata import entry_points
+
+        found = entry_points(group=self.group)
+        with self._lock:
+            for entry_point in found:
+                # Built-in and explicitly registered entries take precedence
+                self._entries.setdefault(entry_point.name, entry_point)
+            self._scanned = True
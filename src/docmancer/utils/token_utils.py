@@ -0,0 +1,18 @@
+import math
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Returns a rough token count for text without loading a tokenizer.
+
+    Args:
+        text (str): prompt or response text
+
+    Returns:
+        int: estimated number of tokens, assuming ~4 characters per token
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
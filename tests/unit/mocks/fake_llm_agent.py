@@ -0,0 +1,41 @@
+import json
+import time
+from typing import Callable, List, Optional
+from docmancer.generator.llm.llm_agent_base import LLMAgent
+
+DEFAULT_RESPONSE = {
+    "summary": "Performs the operation described by its name.",
+    "return_description": "The result of the operation.",
+    "parameters": [],
+}
+
+
+class FakeLLMAgent(LLMAgent):
+    """
+    Deterministic LLMAgent for tests. Returns a fixed JSON summary after an
+    optional delay instead of running a model. Raw `responses`, if given,
+    are returned first, one per message.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        response: Optional[dict] = None,
+        on_message: Optional[Callable[[str], None]] = None,
+        responses: Optional[List[str]] = None,
+    ):
+        self._latency = latency
+        self._response = response or DEFAULT_RESPONSE
+        self._on_message = on_message
+        self._responses = list(responses or [])
+        self.messages = []
+
+    def send_message(self, message: str) -> str:
+        self.messages.append(message)
+        if self._latency:
+            time.sleep(self._latency)
+        if self._on_message:
+            self._on_message(message)
+        if self._responses:
+            return self._responses.pop(0)
+        return json.dumps(self._response)
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from docmancer.config import DocmancerConfig
+from docmancer.core.engine import DocumentationBuilderEngine
+from docmancer.core.metrics import NULL_METRICS, MetricsRecorder
+from docmancer.core.presenter import Presenter
+from docmancer.core.progress import NULL_PROGRESS, ProgressTracker
+from docmancer.core.tracing import NULL_TRACER, Tracer
+from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.llm.llm_agent_base import LLMAgent
+from docmancer.parser.python_parser import PythonParser
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+
+SAMPLE_PROJECT = (
+    Path(__file__).resolve().parents[2] / "test_projects" / "sample_project_1"
+)
+
+# Methods and nested functions that share a name and a body
+SAME_NAMES = """\
+class A:
+    def close(self):
+        return 1
+
+
+class B:
+    def close(self):
+        return 1
+
+
+def first():
+    def helper():
+        return 1
+
+    return helper()
+
+
+def second():
+    def helper():
+        return 1
+
+    return helper()
+"""
+
+
+def get_config(project_dir, **values) -> DocmancerConfig:
+    """Settings for documenting the Python files under a project's src."""
+    return DocmancerConfig.from_dict(
+        {
+            **DocmancerConfig().to_dict(),
+            "project_dir": str(project_dir),
+            "files": ["src/**/*.py"],
+            "language": "python",
+            "style": "PEP",
+            **values,
+        }
+    )
+
+
+def get_engine(
+    agent: LLMAgent = None,
+    presenter: Presenter = None,
+    metrics: MetricsRecorder = NULL_METRICS,
+    tracer: Tracer = NULL_TRACER,
+    progress: ProgressTracker = NULL_PROGRESS,
+) -> DocumentationBuilderEngine:
+    """An engine for Python sources, with a FakeLLMAgent unless `agent` is given."""
+    return DocumentationBuilderEngine(
+        generator=DocumentationGenerator(
+            model=agent or FakeLLMAgent(),
+            language="python",
+            metrics=metrics,
+            tracer=tracer,
+            progress=progress,
+        ),
+        parser=PythonParser(),
+        presenter=presenter or Presenter(),
+        formatter=PyDocstringFormatter(),
+        metrics=metrics,
+        tracer=tracer,
+        progress=progress,
+    )
+
+
+def read_sources(project_dir) -> dict:
+    """Returns the content of each Python file under a project's src."""
+    return {
+        str(path.relative_to(project_dir)): path.read_text()
+        for path in sorted((Path(project_dir) / "src").rglob("*.py"))
+    }
+
+
+class SampleProjectTestCase(unittest.TestCase):
+    """
+    Runs each test in a temporary directory that copies of the sample
+    project are made in, restoring the working directory afterwards.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.mkdtemp()
+        self._cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def copy_project(self, name: str = "project") -> Path:
+        """
+        Copies the sample project and changes into the copy, since file
+        patterns are relative to the working directory.
+        """
+        project_dir = Path(self._tmp) / name
+        shutil.copytree(SAMPLE_PROJECT, project_dir)
+        os.chdir(project_dir)
+        return project_dir
@@ -0,0 +1,160 @@
+import unittest
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+from docmancer.core.batch_review import (
+    BatchItemStatus,
+    BatchReviewState,
+    format_edit_buffer,
+    parse_edit_buffer,
+    review_file_batch,
+)
+from docmancer.core.metrics import MetricsRecorder
+from docmancer.core.presenter import Presenter, UserResponse, UserResponseModel
+from docmancer.models.documentation_model import DocumentationModel
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+
+def get_docs(count):
+    return [
+        DocumentationModel(
+            start_line=index,
+            qualified_name=f"module.Class.method_{index}",
+            signature=f"def method_{index}(self):",
+            formatted_documentation=['"""\n', f"Method {index}.\n", '"""\n'],
+        )
+        for index in range(count)
+    ]
+
+
+class SkipFirstPresenter(Presenter):
+    """Skips the first function of each file and accepts the rest."""
+
+    def __init__(self):
+        super().__init__()
+        self.files = []
+
+    def review_batch(self, file_path, docs):
+        self.files.append(file_path)
+        return [
+            UserResponseModel(
+                doc_model=doc,
+                response=UserResponse.SKIP if index == 0 else UserResponse.ACCEPT,
+            )
+            for index, doc in enumerate(docs)
+        ]
+
+
+class TestBatchReview(unittest.TestCase):
+
+    def test_single_editor_session_is_split_per_function(self):
+        docs = get_docs(3)
+        lines = format_edit_buffer(docs)
+        lines[lines.index("Method 1.\n")] = "Edited method.\n"
+        marker = lines.index("Method 2.\n") - 2
+        del lines[marker : marker + 4]  # The last function's whole section
+
+        state = BatchReviewState(docs)
+        state.apply_edits(parse_edit_buffer(lines, len(docs)))
+
+        assert docs[1].formatted_documentation == ['"""\n', "Edited method.\n", '"""\n']
+        assert state.edited == [False, True, False]
+        assert docs[2].formatted_documentation[1] == "Method 2.\n"
+
+    def test_keyboard_review(self):
+        state = BatchReviewState(get_docs(5))
+
+        with create_pipe_input() as pipe_input:
+            # Accept, skip, accept method_4 by pattern, done
+            pipe_input.send_text("as/*_4\r\r")
+            review_file_batch(
+                "module.py",
+                state,
+                edit_lines=lambda lines: lines,
+                input=pipe_input,
+                output=DummyOutput(),
+            )
+
+        assert state.statuses == [
+            BatchItemStatus.ACCEPTED,
+            BatchItemStatus.SKIPPED,
+            BatchItemStatus.SKIPPED,
+            BatchItemStatus.SKIPPED,
+            BatchItemStatus.ACCEPTED,
+        ]
+        assert not state.quit
+
+    def test_quitting_leaves_undecided_functions_pending(self):
+        state = BatchReviewState(get_docs(3))
+
+        with create_pipe_input() as pipe_input:
+            pipe_input.send_text("aq")
+            review_file_batch(
+                "module.py",
+                state,
+                edit_lines=lambda lines: lines,
+                input=pipe_input,
+                output=DummyOutput(),
+            )
+
+        assert state.quit
+        assert state.get_counts()[BatchItemStatus.PENDING] == 2
+
+    def test_list_scrolls_to_the_selected_function(self):
+        state = BatchReviewState(get_docs(100))
+        visible = []
+
+        def record_visible(app):
+            info = app.layout.current_window.render_info
+            if info is not None:
+                visible.append(
+                    (state.cursor, info.first_visible_line(), info.last_visible_line())
+                )
+
+        with create_pipe_input() as pipe_input:
+            pipe_input.send_text("j" * 60 + "q")
+            review_file_batch(
+                "module.py",
+                state,
+                edit_lines=lambda lines: lines,
+                input=pipe_input,
+                output=DummyOutput(),
+                after_render=record_visible,
+            )
+
+        cursor, first, last = visible[-1]
+        assert cursor == 60
+        assert last - first < 60  # More functions than the output's height
+        assert first <= cursor <= last
+
+
+class TestBatchReviewRun(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+
+    def test_each_file_is_reviewed_once_and_reviewer_time_is_recorded(self):
+        config = get_config(
+            self.project_dir,
+            template_rules=[],
+            review_mode="batch",
+            review_lookahead=0,
+        )
+        presenter = SkipFirstPresenter()
+        metrics = MetricsRecorder()
+        get_engine(presenter=presenter, metrics=metrics).run(config)
+
+        review_seconds = next(
+            series
+            for series in metrics.get_report()["histograms"]
+            if series["name"] == "review_seconds"
+        )
+        assert len(presenter.files) == 2
+        assert review_seconds["count"] == 8
+        assert metrics.get_counter("reviews", decision="skip") == 2
+        written = (self.project_dir / "src" / "test_source_1.py").read_text()
+        assert written.count('"""') == 2 * 4  # 5 functions, the first skipped
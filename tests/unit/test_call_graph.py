@@ -0,0 +1,51 @@
+import unittest
+from docmancer.generator.call_graph import CallGraph
+from docmancer.models.function_context import FunctionContextModel
+
+
+def make_context(name: str, calls, start_line: int = 1) -> FunctionContextModel:
+    return FunctionContextModel(
+        qualified_name=f"module.{name}",
+        signature=f"def {name}()",
+        body="pass",
+        comments=[],
+        start_line=start_line,
+        end_line=start_line + 1,
+        calls=calls,
+    )
+
+
+class TestCallGraph(unittest.TestCase):
+
+    def test_get_levels_orders_callees_before_callers(self):
+        graph = CallGraph(
+            [
+                ("a.py", make_context("top", ["helper", "print"])),
+                ("a.py", make_context("helper", ["leaf"])),
+                ("a.py", make_context("leaf", [])),
+            ]
+        )
+
+        assert graph.get_levels() == [[2], [1], [0]]
+
+    def test_get_levels_breaks_cycles_deterministically(self):
+        graph = CallGraph(
+            [
+                ("a.py", make_context("ping", ["pong"])),
+                ("a.py", make_context("pong", ["ping"])),
+                ("a.py", make_context("caller", ["ping"])),
+            ]
+        )
+
+        assert graph.get_levels() == [[0], [2, 1]]
+
+    def test_same_file_callee_is_preferred(self):
+        graph = CallGraph(
+            [
+                ("a.py", make_context("run", ["helper"])),
+                ("a.py", make_context("helper", [])),
+                ("b.py", make_context("helper", [])),
+            ]
+        )
+
+        assert graph.get_callees(0) == [1]
@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from docmancer.config import ReplayLatency
+from docmancer.generator.llm.cassette_agent import (
+    Cassette,
+    CassetteEntry,
+    RecordingAgent,
+    ReplayAgent,
+)
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+    read_sources,
+)
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.mkdtemp()
+        self.path = Path(self._tmp) / "run.cassette"
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def test_recorded_responses_replay_in_order_after_saving(self):
+        cassette = Cassette()
+        agent = RecordingAgent(
+            FakeLLMAgent(responses=["first", "second"]), cassette, "default"
+        )
+        agent.send_message("prompt")
+        agent.send_message("prompt")
+        cassette.save(self.path)
+
+        replay = ReplayAgent(Cassette.load(self.path), "default")
+
+        assert replay.send_message("prompt") == "first"
+        assert replay.send_message("prompt") == "second"
+        assert replay.send_message("prompt") == "second"
+
+    def test_unrecorded_prompt_or_agent(self):
+        cassette = Cassette()
+        cassette.record("default", "prompt", CassetteEntry("ok", 0.0, 1, 1))
+
+        with self.assertRaises(RuntimeError):
+            ReplayAgent(cassette, "default").send_message("other prompt")
+        with self.assertRaises(RuntimeError):
+            ReplayAgent(cassette, "large").send_message("prompt")
+
+    def test_recorded_latency(self):
+        cassette = Cassette()
+        cassette.record("default", "prompt", CassetteEntry("ok", 0.05, 1, 1))
+        replay = ReplayAgent(cassette, "default", ReplayLatency.RECORDED.value)
+
+        start = time.perf_counter()
+        replay.send_message("prompt")
+
+        assert time.perf_counter() - start >= 0.05
+
+    def test_identical_recordings_save_identical_files(self):
+        contents = []
+        for _ in range(2):
+            cassette = Cassette()
+            cassette.record("default", "prompt", CassetteEntry("ok", 0.5, 1, 1))
+            cassette.save(self.path)
+            contents.append(self.path.read_bytes())
+
+        assert contents[0] == contents[1]
+
+
+class TestReplayRun(SampleProjectTestCase):
+
+    def run_engine(self, name, agent):
+        project_dir = self.copy_project(name)
+        config = get_config(project_dir, force_all=True, template_rules=[])
+        get_engine(agent).run(config)
+        return read_sources(project_dir)
+
+    def test_replayed_run_writes_the_recorded_documentation(self):
+        cassette = Cassette()
+        recorded = self.run_engine(
+            "recorded", RecordingAgent(FakeLLMAgent(), cassette, "default")
+        )
+        replay = ReplayAgent(cassette, "default")
+
+        replayed = self.run_engine("replayed", replay)
+
+        assert replayed == recorded
+        assert replay.misses == 0
+        assert len(cassette) == 8
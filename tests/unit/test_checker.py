@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import xml.etree.ElementTree as ET
+from docmancer.core import checker
+from docmancer.core.check_report import get_coverage, to_junit, to_sarif
+from docmancer.core.checker import CoverageChecker
+
+SOURCE = '''def documented():
+    """Does nothing."""
+    return None
+
+
+def undocumented():
+    return None
+
+
+class Shape:
+    def area(self):
+        # Comments before the docstring are allowed
+        """Returns zero."""
+        return 0
+'''
+
+
+class TestCoverageChecker(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._cwd = os.getcwd()
+        os.chdir(self._tmp.name)  # File patterns are relative to the project
+        self.path = "module.py"
+        with open(self.path, "w", encoding="utf8") as f:
+            f.write(SOURCE)
+        self.cache_path = os.path.join(".docmancer", "cache.json")
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def check(self):
+        return CoverageChecker(
+            "python", ["*"], cache_path=self.cache_path, workers=1
+        ).check([self.path])
+
+    def test_reports_undocumented_functions(self):
+        files = self.check()
+
+        functions = {f.qualified_name: f.documented for f in files[0].functions}
+        assert functions == {
+            "module.documented": True,
+            "module.undocumented": False,
+            "module.Shape.area": True,
+        }
+        assert round(get_coverage(files), 1) == 66.7
+
+    def test_unchanged_files_are_read_from_cache(self):
+        first = self.check()
+
+        with patch.object(checker, "_check_file") as check_file:
+            second = self.check()
+
+        check_file.assert_not_called()
+        assert second == first
+
+    def test_changed_files_are_parsed_again(self):
+        self.check()
+        with open(self.path, "a", encoding="utf8") as f:
+            f.write("\n\ndef added():\n    return 1\n")
+
+        files = self.check()
+
+        assert "module.added" in [f.qualified_name for f in files[0].functions]
+
+    def test_sarif_and_junit_list_undocumented_functions(self):
+        files = self.check()
+
+        sarif = json.loads(to_sarif(files, 0.0))
+        results = sarif["runs"][0]["results"]
+        assert len(results) == 1
+        assert results[0]["ruleId"] == "DOC001"
+
+        junit = ET.fromstring(to_junit(files, 0.0))
+        assert junit.get("tests") == "3"
+        assert junit.get("failures") == "1"
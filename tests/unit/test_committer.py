@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from docmancer.core.committer import FileCommitter
+from docmancer.core.rollback import RollbackJournal, rollback_latest_run
+from docmancer.utils.file_buffer import FileBuffer
+
+ORIGINAL = "﻿def f():\r\n    return 1\r\n".encode("utf-8")
+
+
+class TestFileCommitter(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.project_dir = self._tmp.name
+        self.path = os.path.join(self.project_dir, "module.py")
+        with open(self.path, "wb") as f:
+            f.write(ORIGINAL)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def commit_docstring(self, committer: FileCommitter, buffer: FileBuffer):
+        lines = buffer.with_insertions([(1, ['    """Returns one."""\n'])])
+        committer.write(self.path, lines, buffer)
+        committer.finish()
+
+    def test_write_preserves_encoding_and_newlines(self):
+        committer = FileCommitter()
+
+        self.commit_docstring(committer, FileBuffer.read(self.path))
+
+        with open(self.path, "rb") as f:
+            assert f.read() == (
+                '﻿def f():\r\n    """Returns one."""\r\n    return 1\r\n'
+            ).encode("utf-8")
+        assert committer.files_committed == 1
+
+    def test_write_refuses_file_changed_since_read(self):
+        buffer = FileBuffer.read(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b"x = 1\r\n")
+
+        with self.assertRaises(ValueError):
+            self.commit_docstring(FileCommitter(), buffer)
+
+    def test_rollback_restores_original(self):
+        committer = FileCommitter(RollbackJournal.for_new_run(self.project_dir))
+        self.commit_docstring(committer, FileBuffer.read(self.path))
+
+        result = rollback_latest_run(self.project_dir)
+
+        assert result.restored == [os.path.abspath(self.path)]
+        with open(self.path, "rb") as f:
+            assert f.read() == ORIGINAL
+        assert rollback_latest_run(self.project_dir).run_id is None
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+from docmancer.core.presenter import Presenter, UserResponse, UserResponseModel
+from docmancer.core.run_journal import RunJournal
+from docmancer.generator.llm.llm_agent_base import NoModelAgent
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+FAILING_FUNCTION = "test_source_1.login"
+
+
+class FailingPresenter(Presenter):
+    """Accepts every function except one, whose review raises."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = []
+
+    def get_user_approval(self, doc):
+        if doc.qualified_name == FAILING_FUNCTION:
+            raise OSError("terminal closed")
+        return UserResponseModel(doc_model=doc, response=UserResponse.ACCEPT)
+
+    def review_batch(self, file_path, docs):
+        if any(doc.qualified_name == FAILING_FUNCTION for doc in docs):
+            raise OSError("terminal closed")
+        return [
+            UserResponseModel(doc_model=doc, response=UserResponse.ACCEPT)
+            for doc in docs
+        ]
+
+    def print_error(self, message):
+        self.errors.append(message)
+
+
+class TestReviewErrors(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+
+    def run_engine(self, **values):
+        presenter = FailingPresenter()
+        config = get_config(self.project_dir, template_rules=[], **values)
+        get_engine(presenter=presenter).run(config)
+        return presenter
+
+    def test_failed_review_keeps_the_files_other_docs(self):
+        presenter = self.run_engine()
+
+        assert presenter.errors == ["Error: terminal closed"]
+        written = (self.project_dir / "src" / "test_source_1.py").read_text()
+        assert written.count('"""') == 2 * 4  # 5 functions, login not written
+        assert 'def login(user, p):\n    """' not in written
+
+    def test_failed_batch_review_still_writes_other_files(self):
+        presenter = self.run_engine(review_mode="batch")
+
+        assert presenter.errors == ["Error: terminal closed"]
+        written = (self.project_dir / "src" / "test_source_1.py").read_text()
+        assert '"""' not in written
+        other = self.project_dir / "src" / "test_module" / "test_source_2.py"
+        assert '"""' in other.read_text()
+
+
+class TestGenerationErrors(SampleProjectTestCase):
+
+    def test_failed_journal_write_keeps_the_files_other_docs(self):
+        project_dir = self.copy_project()
+        presenter = FailingPresenter()
+        record_generated = RunJournal.record_generated
+
+        def fail_for_login(journal, key, summary):
+            if key[1] == FAILING_FUNCTION:
+                raise OSError("disk full")
+            record_generated(journal, key, summary)
+
+        config = get_config(project_dir, template_rules=[], force_all=True)
+        with patch.object(RunJournal, "record_generated", fail_for_login):
+            get_engine(presenter=presenter).run(config)
+
+        assert presenter.errors == ["Error: disk full"]
+        written = (project_dir / "src" / "test_source_1.py").read_text()
+        assert written.count('"""') == 2 * 5
+
+    def test_model_errors_are_reported(self):
+        project_dir = self.copy_project()
+        presenter = FailingPresenter()
+        config = get_config(project_dir, template_rules=[], force_all=True)
+
+        get_engine(agent=NoModelAgent(), presenter=presenter).run(config)
+
+        assert presenter.errors
+        assert set(presenter.errors) == {"Error: No model is loaded."}
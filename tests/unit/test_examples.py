@@ -0,0 +1,126 @@
+import unittest
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.examples import ExampleRetriever, clean_docstring, get_terms
+from docmancer.generator.prompts import Prompt
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.utils.token_utils import estimate_tokens
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+
+
+def get_context(name, signature=None, docstring=None, calls=None):
+    return FunctionContextModel(
+        qualified_name=name,
+        signature=signature or f"def {name.rsplit('.', 1)[-1]}(self):",
+        body="    return None",
+        comments=[],
+        start_line=1,
+        end_line=2,
+        calls=calls or [],
+        docstring=docstring,
+    )
+
+
+class TestExampleRetriever(unittest.TestCase):
+
+    def setUp(self):
+        self.retriever = ExampleRetriever(count=2, max_tokens=1000)
+        for name, signature, docstring in [
+            ("config.load_user_config", "def load_user_config(path):", "Loads it."),
+            ("config.save_user_config", "def save_user_config(config):", "Saves."),
+            ("http.Client.send_request", "def send_request(self, url):", "Sends."),
+            ("http.Client.close", "def close(self):", "Closes."),
+        ]:
+            self.retriever.add(
+                "a.py", get_context(name, signature, f'"""\n    {docstring}\n    """')
+            )
+
+    def test_identifiers_are_split_into_words(self):
+        terms = get_terms(get_context("m.loadUserConfig", "def loadUserConfig(self):"))
+
+        assert {"load", "user", "config", "loaduserconfig"} <= set(terms)
+        assert "self" not in terms
+
+    def test_most_similar_functions_come_first(self):
+        query = get_context("m.Loader.loadUserConfig", "def loadUserConfig(self):")
+
+        examples = self.retriever.get_examples(query)
+
+        assert [e.qualified_name for e in examples] == [
+            "config.load_user_config",
+            "config.save_user_config",
+        ]
+        assert examples[0].docstring == "Loads it."
+
+    def test_function_is_not_its_own_example(self):
+        query = get_context(
+            "config.load_user_config",
+            "def load_user_config(path):",
+            '"""Loads it."""',
+        )
+
+        names = [e.qualified_name for e in self.retriever.get_examples(query)]
+
+        assert "config.load_user_config" not in names
+
+    def test_readded_function_replaces_earlier_version(self):
+        self.retriever.add("a.py", get_context("http.Client.close"))
+
+        query = get_context("m.close", "def close(self):")
+
+        assert self.retriever.get_examples(query) == []
+        assert len(self.retriever) == 3
+
+    def test_examples_fit_the_token_budget(self):
+        retriever = ExampleRetriever(count=3, max_tokens=12)
+        retriever.add(
+            "a.py", get_context("a.parse_file", docstring='"""' + "x" * 200 + '"""')
+        )
+        retriever.add("a.py", get_context("a.parse_text", docstring='"""Parses."""'))
+
+        examples = retriever.get_examples(get_context("b.parse_file"))
+
+        assert [e.qualified_name for e in examples] == ["a.parse_text"]
+        assert sum(estimate_tokens(e.get_text()) for e in examples) <= 12
+
+    def test_clean_docstring(self):
+        assert clean_docstring('r"""\n    Line one.\n\n    Line two.\n    """') == (
+            "Line one.\n\nLine two."
+        )
+
+
+class TestGeneratorExamples(unittest.TestCase):
+
+    def test_examples_are_added_to_the_prompt(self):
+        agent = FakeLLMAgent()
+        retriever = ExampleRetriever()
+        retriever.add(
+            "a.py",
+            get_context("a.load_config", docstring='"""Reads the settings file."""'),
+        )
+        generator = DocumentationGenerator(
+            model=agent, language="python", examples=retriever
+        )
+
+        generator.generate_summary(get_context("b.load_config_file"))
+
+        assert "Reads the settings file." in agent.messages[0]
+
+    def test_examples_are_dropped_before_the_body_is_compacted(self):
+        agent = FakeLLMAgent()
+        retriever = ExampleRetriever(max_tokens=10000)
+        retriever.add(
+            "a.py",
+            get_context("a.load_config", docstring='"""' + "Reads. " * 300 + '"""'),
+        )
+        query = get_context("b.load_config_file")
+        generator = DocumentationGenerator(
+            model=agent,
+            language="python",
+            examples=retriever,
+            max_prompt_tokens=estimate_tokens(Prompt(query).get()) + 10,
+        )
+
+        generator.generate_summary(query)
+
+        assert "Reads." not in agent.messages[0]
+        assert generator.compactions == []
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from docmancer.utils.file_buffer import FileBuffer, FileBufferCache
+
+
+class TestFileBuffer(unittest.TestCase):
+
+    def test_read_normalizes_newlines_and_keeps_last_line(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "module.py")
+            with open(path, "wb") as f:
+                f.write(b"def f():\r\n    pass\r\nx = 1")
+
+            buffer = FileBuffer.read(path)
+
+        assert buffer.lines == ["def f():\n", "    pass\n", "x = 1"]
+        assert buffer.get_indentation(2) == 4
+        assert buffer.get_indentation(4) == -1
+
+    def test_with_insertions_merges_in_line_order(self):
+        buffer = FileBuffer(["def a():\n", "    pass\n", "def b():\n", "    pass\n"])
+
+        lines = buffer.with_insertions([(3, ["    '''b'''\n"]), (1, ["    '''a'''\n"])])
+
+        assert lines == [
+            "def a():\n",
+            "    '''a'''\n",
+            "    pass\n",
+            "def b():\n",
+            "    '''b'''\n",
+            "    pass\n",
+        ]
+
+    def test_cache_reads_each_file_once_until_evicted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "module.py")
+            with open(path, "w") as f:
+                f.write("x = 1\n")
+            cache = FileBufferCache()
+
+            first = cache.get(path)
+            assert cache.get(path) is first
+
+            cache.evict(path)
+            assert cache.get(path) is not first
@@ -0,0 +1,167 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from docmancer.core.functional_context_database import (
+    INDEX_FILE_NAME,
+    FunctionalContextDatabase,
+)
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+from docmancer.parser.python_parser import PythonParser
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+
+def get_context(name, body="return 1", docstring=None, start_line=1):
+    return FunctionContextModel(
+        qualified_name=name,
+        signature=f"def {name.rsplit('.', 1)[-1]}(self):",
+        body=body,
+        comments=[],
+        start_line=start_line,
+        end_line=start_line + 1,
+        docstring=docstring,
+    )
+
+
+class TestFunctionalContextDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.mkdtemp()
+        self.index = FunctionalContextDatabase(
+            Path(self._tmp) / INDEX_FILE_NAME, batch_size=2
+        )
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def names(self, functions):
+        return [(f.file_path, f.qualified_name) for f in functions]
+
+    def parse(self, name, source):
+        path = Path(self._tmp) / name
+        path.write_text(source)
+        return [context[0] for context in PythonParser().parse(path, ["*"])]
+
+    def test_same_named_methods_do_not_collide(self):
+        source = "class A:\n    def get(self):\n        return 1\n\n\n"
+        self.index.index_file(
+            "m.py", self.parse("m.py", source + source.replace("A", "B"))
+        )
+        self.index.index_file("n.py", self.parse("n.py", source))
+
+        assert self.names(self.index.get_undocumented()) == [
+            ("m.py", "m.A.get"),
+            ("m.py", "m.B.get"),
+            ("n.py", "n.A.get"),
+        ]
+        assert self.names(self.index.get_undocumented("n.py")) == [("n.py", "n.A.get")]
+
+    def test_same_named_nested_functions_do_not_collide(self):
+        source = (
+            "def {0}():\n    def helper():\n        return 1\n\n"
+            "    return helper()\n\n\n"
+        )
+        self.index.index_file(
+            "m.py", self.parse("m.py", source.format("first") + source.format("second"))
+        )
+
+        assert self.names(self.index.get_undocumented()) == [
+            ("m.py", "m.first"),
+            ("m.py", "m.first.helper"),
+            ("m.py", "m.second"),
+            ("m.py", "m.second.helper"),
+        ]
+
+    def test_reindexing_a_file_tracks_changes(self):
+        self.index.index_file(
+            "a.py",
+            [
+                get_context("kept", docstring="Kept."),
+                get_context("edited", docstring="Edited."),
+                get_context("removed"),
+            ],
+            file_hash="1",
+        )
+        self.index.flush()
+        since = time.time()
+
+        self.index.index_file(
+            "a.py",
+            [
+                get_context("kept", docstring="Kept.", start_line=5),
+                get_context("edited", "return 2", "Edited.", start_line=2),
+                get_context("added", start_line=3),
+            ],
+            file_hash="2",
+        )
+
+        assert self.names(self.index.get_changed_since(since)) == [
+            ("a.py", "edited"),
+            ("a.py", "added"),
+        ]
+        assert self.names(self.index.get_stale()) == [("a.py", "edited")]
+        assert self.names(self.index.get_undocumented()) == [("a.py", "added")]
+        assert self.index.get_file_hash("a.py") == "2"
+
+    def test_documenting_a_changed_function_is_no_longer_stale(self):
+        self.index.index_file("a.py", [get_context("f", docstring="Old.")])
+        self.index.index_file("a.py", [get_context("f", "return 2", "Old.")])
+        assert self.index.get_stale()
+
+        self.index.index_file("a.py", [get_context("f", "return 2", "New.")])
+
+        assert self.index.get_stale() == []
+
+    def test_summaries_are_kept_per_fingerprint(self):
+        context = get_context("f")
+        self.index.index_file("a.py", [context])
+        summary = FunctionSummaryModel(summary="Returns 1.", return_description="1")
+
+        self.index.record_summary("a.py", "f", "abc", summary)
+
+        assert self.index.get_summary("a.py", "f", "abc") == summary
+        assert self.index.get_summary("a.py", "f", "def") is None
+
+    def test_index_of_another_version_is_rebuilt(self):
+        self.index.index_file("a.py", [get_context("f")])
+        self.index.close()
+        path = Path(self._tmp) / INDEX_FILE_NAME
+        reopened = FunctionalContextDatabase(path)
+        reopened._conn.execute("PRAGMA user_version = 0")
+        reopened.close()
+
+        self.index = FunctionalContextDatabase(path)
+
+        assert self.index.get_undocumented() == []
+
+
+class TestEngineIndex(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+
+    def test_run_indexes_parsed_functions_and_summaries(self):
+        config = get_config(self.project_dir, force_all=True, template_rules=[])
+        get_engine().run(config)
+
+        index = FunctionalContextDatabase.for_project(str(self.project_dir))
+        try:
+            functions = index.get_undocumented()
+            summaries = [
+                index.get_summary(f.file_path, f.qualified_name, f.fingerprint)
+                for f in functions
+            ]
+        finally:
+            index.close()
+        assert (self.project_dir / ".docmancer" / INDEX_FILE_NAME).is_file()
+        assert len(functions) == 8
+        assert None not in summaries
+        assert not (self.project_dir / "docgen.db").exists()
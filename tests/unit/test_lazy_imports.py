@@ -0,0 +1,103 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from docmancer.utils.registry import LazyRegistry
+
+ROOT = Path(__file__).resolve().parents[2]
+SAMPLE_PROJECT = ROOT / "tests" / "test_projects" / "sample_project_1"
+
+# Modules only needed to generate or review documentation
+GENERATION_MODULES = ["llama_cpp", "httpx", "rich", "prompt_toolkit"]
+
+
+def get_imported_modules(args, cwd) -> set:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT / "src"),
+        "DOCMANCER_MODEL_PATH": "model.gguf",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "docmancer", *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return {
+        line.split("|")[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+class TestLazyRegistry(unittest.TestCase):
+
+    def test_entries_are_imported_on_first_use(self):
+        registry = LazyRegistry(None, {"dumps": "json:dumps"})
+
+        assert registry.get_names() == ["dumps"]
+        assert registry.get("dumps")({}) == "{}"
+        assert registry.get("yaml") is None
+
+    def test_registered_entries_replace_built_in_ones(self):
+        registry = LazyRegistry(None, {"dumps": "json:dumps"})
+        registry.get("dumps")
+
+        registry.register("dumps", repr)
+
+        assert registry.get("dumps") is repr
+
+    def test_malformed_target(self):
+        registry = LazyRegistry(None, {"dumps": "json.dumps"})
+
+        with self.assertRaises(ValueError):
+            registry.get("dumps")
+
+
+class TestStartupImports(unittest.TestCase):
+
+    def test_help_imports_no_backends(self):
+        modules = get_imported_modules(["--help"], ROOT)
+
+        for module in GENERATION_MODULES + ["tree_sitter", "yaml", "dataclasses_json"]:
+            assert module not in modules, module
+
+    def test_check_imports_no_generation_modules(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            project_dir = Path(tmp) / "project"
+            shutil.copytree(SAMPLE_PROJECT, project_dir)
+
+            modules = get_imported_modules(
+                ["--check", "--files", "src/**/*.py"], project_dir
+            )
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        assert "tree_sitter" in modules
+        for module in GENERATION_MODULES:
+            assert module not in modules, module
+
+    def test_no_summary_loads_no_model(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            project_dir = Path(tmp) / "project"
+            shutil.copytree(SAMPLE_PROJECT, project_dir)
+
+            modules = get_imported_modules(
+                ["--config", ".docmancer.yaml", "--no-summary", "--force-all"],
+                project_dir,
+            )
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        assert "docmancer.core.engine" in modules
+        # rich is still imported, to print progress and results
+        model_modules = ["llama_cpp", "httpx", "docmancer.generator.llm.cassette_agent"]
+        for module in model_modules + ["prompt_toolkit"]:
+            assert module not in modules, module
@@ -0,0 +1,95 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from docmancer.core.metrics import METRICS_FILE_NAME, MetricsRecorder
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+
+def get_series(report, kind, name, **labels):
+    return next(
+        series
+        for series in report[kind]
+        if series["name"] == name and series["labels"] == labels
+    )
+
+
+class TestMetricsRecorder(unittest.TestCase):
+
+    def test_histogram_summary(self):
+        metrics = MetricsRecorder()
+        for value in range(1, 101):
+            metrics.observe("latency_seconds", value / 100, stage="parse")
+
+        histogram = get_series(
+            metrics.get_report(), "histograms", "latency_seconds", stage="parse"
+        )
+
+        assert histogram["count"] == 100
+        assert histogram["p50"] == 0.5
+        assert histogram["p99"] == 0.99
+        assert histogram["max"] == 1.0
+
+    def test_disabled_recorder_ignores_everything(self):
+        metrics = MetricsRecorder(enabled=False)
+        metrics.add("errors")
+        with metrics.time("parse_seconds"):
+            pass
+
+        report = metrics.get_report()
+
+        assert report["counters"] == [] and report["histograms"] == []
+
+    def test_prometheus_textfile(self):
+        metrics = MetricsRecorder()
+        metrics.add("cache_hits", 3, cache="file_buffer")
+        metrics.observe("commit_seconds", 0.02)
+        metrics.observe("commit_seconds", 7)
+        path = Path(tempfile.mkdtemp()) / "docmancer.prom"
+
+        metrics.write_prometheus(path)
+
+        lines = path.read_text().splitlines()
+        shutil.rmtree(path.parent)
+        assert "# TYPE docmancer_cache_hits_total counter" in lines
+        assert 'docmancer_cache_hits_total{cache="file_buffer"} 3' in lines
+        assert 'docmancer_commit_seconds_bucket{le="0.05"} 1' in lines
+        assert 'docmancer_commit_seconds_bucket{le="+Inf"} 2' in lines
+        assert "docmancer_commit_seconds_count 2" in lines
+
+
+class TestRunMetrics(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+
+    def test_run_writes_report(self):
+        config = get_config(
+            self.project_dir,
+            force_all=True,
+            metrics_textfile=str(self.project_dir / "metrics.prom"),
+        )
+        metrics = MetricsRecorder(enabled=config.is_metrics_enabled())
+        engine = get_engine(metrics=metrics)
+
+        engine.run(config)
+
+        with open(self.project_dir / ".docmancer" / METRICS_FILE_NAME) as f:
+            report = json.load(f)
+        functions = get_series(report, "counters", "functions_parsed")["value"]
+        assert functions == 8
+        assert get_series(report, "histograms", "function_seconds")["count"] == 8
+        assert get_series(
+            report, "histograms", "request_seconds", route="typical", agent="default"
+        )
+        for stage in ("parse", "generate", "format", "review", "commit"):
+            assert get_series(report, "histograms", "stage_item_seconds", stage=stage)
+        assert get_series(report, "counters", "errors")["value"] == 0
+        assert get_series(report, "counters", "prompt_tokens", route="typical")
+        assert (self.project_dir / "metrics.prom").exists()
@@ -0,0 +1,94 @@
+import unittest
+from docmancer.config import RoutingSettings
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.model_router import (
+    DEFAULT_AGENT_NAME,
+    Complexity,
+    ModelRouter,
+)
+from docmancer.models.function_context import FunctionContextModel
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+
+TRIVIAL = FunctionContextModel(
+    qualified_name="module.get_name",
+    signature="def get_name(self)",
+    body="return self._name",
+    comments="",
+    start_line=1,
+    end_line=2,
+)
+
+COMPLEX = FunctionContextModel(
+    qualified_name="module.route",
+    signature="def route(request, handlers, retries, timeout)",
+    body="\n".join(
+        f"    if request.kind == {i} and handlers:\n        return handle_{i}(request)"
+        for i in range(10)
+    ),
+    comments="",
+    start_line=1,
+    end_line=40,
+    calls=[f"handle_{i}" for i in range(10)],
+)
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.agents = {
+            DEFAULT_AGENT_NAME: FakeLLMAgent(),
+            "small": FakeLLMAgent(),
+            "large": FakeLLMAgent(),
+        }
+
+    def make_generator(self, **settings):
+        router = ModelRouter(
+            self.agents,
+            RoutingSettings(trivial="small", complex="large", **settings),
+        )
+        return DocumentationGenerator(
+            model=self.agents[DEFAULT_AGENT_NAME], language="python", router=router
+        )
+
+    def test_functions_go_to_the_agent_for_their_complexity(self):
+        generator = self.make_generator()
+
+        generator.generate_summary(TRIVIAL)
+        generator.generate_summary(COMPLEX)
+
+        assert len(self.agents["small"].messages) == 1
+        assert len(self.agents["large"].messages) == 1
+        assert self.agents[DEFAULT_AGENT_NAME].messages == []
+        summary = {route: stats for route, _, stats in generator.router.get_summary()}
+        assert summary[Complexity.TRIVIAL].requests == 1
+        assert summary[Complexity.COMPLEX].functions == 1
+
+    def test_quality_shifts_routes(self):
+        router = ModelRouter(self.agents, RoutingSettings(quality=2))
+
+        assert router.get_route(TRIVIAL) == Complexity.TYPICAL
+        assert router.get_route(COMPLEX) == Complexity.COMPLEX
+
+    def test_escalates_when_no_summary_can_be_read(self):
+        self.agents["small"] = FakeLLMAgent(responses=["no", "still no"])
+        generator = self.make_generator(escalate=True)
+
+        summary = generator.generate_summary(TRIVIAL)
+
+        assert summary is not None
+        assert len(self.agents["small"].messages) == 2  # Prompt and JSON fix
+        assert len(self.agents[DEFAULT_AGENT_NAME].messages) == 1
+        assert generator.router.stats[Complexity.TRIVIAL].escalations == 1
+        assert generator.repair_stats.failed == 0
+
+    def test_without_escalation_failure_is_final(self):
+        self.agents["small"] = FakeLLMAgent(responses=["no", "still no"])
+        generator = self.make_generator()
+
+        assert generator.generate_summary(TRIVIAL) is None
+        assert self.agents[DEFAULT_AGENT_NAME].messages == []
+        assert generator.repair_stats.failed == 1
+
+    def test_unknown_agent_name(self):
+        with self.assertRaises(ValueError):
+            ModelRouter(self.agents, RoutingSettings(complex="huge"))
@@ -0,0 +1,124 @@
+import threading
+import time
+import unittest
+from docmancer.core.pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_run_passes_items_through_all_stages(self):
+        results = []
+        lock = threading.Lock()
+
+        def double(item, emit):
+            emit(item * 2)
+
+        def collect(item, emit):
+            with lock:
+                results.append(item)
+
+        pipeline = Pipeline(
+            [Stage("double", double, workers=3), Stage("collect", collect)],
+            queue_size=2,
+        )
+        pipeline.run(range(50))
+
+        assert sorted(results) == [i * 2 for i in range(50)]
+        assert pipeline.errors == []
+
+    def test_run_applies_backpressure(self):
+        produced = [0]
+        consumed = [0]
+        max_in_flight = [0]
+
+        def source():
+            for i in range(40):
+                produced[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], produced[0] - consumed[0])
+                yield i
+
+        def forward(item, emit):
+            emit(item)
+
+        def slow_sink(item, emit):
+            time.sleep(0.002)
+            consumed[0] += 1
+
+        pipeline = Pipeline(
+            [Stage("forward", forward), Stage("sink", slow_sink)], queue_size=2
+        )
+        pipeline.run(source())
+
+        assert consumed[0] == 40
+        # two queues of two items, one item per worker, plus the one being produced
+        assert max_in_flight[0] <= 7
+
+    def test_on_finish_runs_after_all_input(self):
+        buffered = []
+        results = []
+
+        def buffer(item, emit):
+            buffered.append(item)
+
+        def flush(emit):
+            for item in sorted(buffered, reverse=True):
+                emit(item)
+
+        pipeline = Pipeline(
+            [
+                Stage("buffer", buffer, on_finish=flush),
+                Stage("collect", lambda item, emit: results.append(item)),
+            ]
+        )
+        pipeline.run([1, 2, 3])
+
+        assert results == [3, 2, 1]
+
+    def test_cancel_stops_pipeline(self):
+        handled = []
+
+        def handle(item, emit):
+            handled.append(item)
+            if item == 3:
+                pipeline.cancel()
+
+        pipeline = Pipeline([Stage("handle", handle)], queue_size=1)
+        pipeline.run(range(1000))
+
+        assert pipeline.cancelled
+        assert len(handled) < 10
+
+    def test_cancel_does_not_wait_for_cancellable_stage(self):
+        release = threading.Event()
+
+        def slow(item, emit):
+            if item == 0:
+                pipeline.cancel()
+            release.wait(5)
+
+        pipeline = Pipeline([Stage("slow", slow, cancellable=True)])
+        start = time.perf_counter()
+        pipeline.run(range(3))
+        elapsed = time.perf_counter() - start
+        release.set()
+
+        assert elapsed < 1
+
+    def test_failed_item_is_emitted_with_emit_on_error(self):
+        results = []
+
+        def fail_on_odd(item, emit):
+            if item % 2:
+                raise ValueError(item)
+            emit(item)
+
+        pipeline = Pipeline(
+            [
+                Stage("fail", fail_on_odd, emit_on_error=True),
+                Stage("collect", lambda item, emit: results.append(item)),
+            ]
+        )
+        pipeline.run(range(4))
+
+        assert results == [0, 1, 2, 3]
+        assert [str(e) for e in pipeline.errors] == ["1", "3"]
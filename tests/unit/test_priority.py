@@ -0,0 +1,152 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from docmancer.core.run_budget import RunBudget, get_deferred_path, load_deferred
+from docmancer.generator.priority import get_priority_order
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.parser.python_parser import PythonParser
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+
+def make_context(name, calls=None, exported=False, docstring=None, lines=2):
+    return FunctionContextModel(
+        qualified_name=f"module.{name}",
+        signature=f"def {name}()",
+        body="pass",
+        comments="",
+        start_line=1,
+        end_line=1 + lines,
+        calls=calls or [],
+        docstring=docstring,
+        exported=exported,
+    )
+
+
+class TestPriorityOrder(unittest.TestCase):
+
+    def order(self, contexts, deferred=None):
+        functions = [("module.py", context) for context in contexts]
+        return [
+            contexts[idx].qualified_name.split(".")[-1]
+            for idx in get_priority_order(functions, deferred=deferred)
+        ]
+
+    def test_public_exported_and_called_functions_go_first(self):
+        contexts = [
+            make_context("_helper"),
+            make_context("documented", docstring='"""Doc."""'),
+            make_context("public"),
+            make_context("api", exported=True),
+            make_context("caller_a", calls=["shared"]),
+            make_context("caller_b", calls=["shared"]),
+            make_context("shared"),
+        ]
+
+        order = self.order(contexts)
+
+        assert order[:2] == ["api", "shared"]
+        assert order.index("public") < order.index("_helper")
+        assert order[-1] == "documented"
+
+    def test_deferred_functions_go_first(self):
+        contexts = [make_context("api", exported=True), make_context("_helper")]
+
+        order = self.order(contexts, deferred={("module.py", "module._helper")})
+
+        assert order == ["_helper", "api"]
+
+
+class TestExported(unittest.TestCase):
+
+    def test_only_module_level_names_in_all_are_exported(self):
+        source = (
+            '__all__ = ["run", "Api"]\n\n'
+            "def run():\n    def helper():\n        pass\n\n"
+            "class Api:\n    def get(self):\n        pass\n\n"
+            "class Other:\n    def run(self):\n        pass\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "m.py"
+            path.write_text(source)
+            contexts = PythonParser().parse(path, ["*"])
+
+        exported = {
+            context.qualified_name: context.exported
+            for func_contexts in contexts
+            for context in func_contexts
+        }
+        assert exported == {
+            "m.run": True,
+            "m.run.helper": False,
+            "m.Api.get": True,
+            "m.Other.run": False,
+        }
+
+
+class TestRunBudget(unittest.TestCase):
+
+    def test_max_functions(self):
+        budget = RunBudget(max_functions=2)
+
+        assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+        assert budget.exhausted
+
+    def test_time_budget_stays_exhausted(self):
+        now = [0.0]
+        budget = RunBudget(time_budget=10, clock=lambda: now[0])
+
+        assert budget.try_acquire()
+        now[0] = 10.0
+        assert not budget.try_acquire()
+        now[0] = 0.0
+        assert not budget.try_acquire()
+
+    def test_unlimited(self):
+        budget = RunBudget()
+
+        assert not budget.limited
+        assert all(budget.try_acquire() for _ in range(100))
+
+
+class TestBudgetedRun(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+
+    def run_engine(self, max_functions=None):
+        generated = []
+        config = get_config(
+            self.project_dir, force_all=True, max_functions=max_functions
+        )
+        agent = FakeLLMAgent(
+            on_message=lambda message: generated.append(
+                message.split("Qualified Name: ")[1].split("\n")[0]
+            )
+        )
+        get_engine(agent).run(config)
+        return generated
+
+    def test_deferred_functions_are_reported_and_generated_first_next_run(self):
+        first = self.run_engine(max_functions=2)
+
+        assert len(first) == 2
+        deferred = load_deferred(str(self.project_dir))
+        assert len(deferred) == 6
+        with open(get_deferred_path(str(self.project_dir))) as f:
+            assert len(json.load(f)["functions"]) == 6
+
+        second = self.run_engine(max_functions=1)
+
+        assert second[0] in {name for _, name in deferred}
+        assert len(load_deferred(str(self.project_dir))) == 7
+
+        self.run_engine()
+
+        assert not get_deferred_path(str(self.project_dir)).exists()
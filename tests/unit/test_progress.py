@@ -0,0 +1,102 @@
+import io
+import sys
+import threading
+import time
+import unittest
+from rich.console import Console
+from docmancer.core.presenter import Presenter
+from docmancer.core.progress import ProgressTracker, capture_output
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+
+class TestProgressTracker(unittest.TestCase):
+
+    def test_snapshot_counts(self):
+        progress = ProgressTracker()
+        progress.add(4)
+        progress.skip()
+        progress.start("a")
+        progress.finish(failed=True)
+        progress.start("b")
+
+        snapshot = progress.get_snapshot()
+
+        assert snapshot.done == 1 and snapshot.failed == 1
+        assert snapshot.in_flight == ["b"]
+        assert snapshot.queued == 1
+        assert snapshot.eta is not None
+
+    def test_waiting_display_wakes_on_change(self):
+        progress = ProgressTracker()
+        timer = threading.Timer(0.05, progress.add)
+        timer.start()
+
+        assert progress.wait_for_change(timeout=5)
+        assert not progress.wait_for_change(timeout=0.01)
+        timer.join()
+
+
+class TestCaptureOutput(unittest.TestCase):
+
+    def test_threads_capture_their_own_output(self):
+        stdout = sys.stdout
+        outputs = {}
+
+        def task(name):
+            with capture_output() as output:
+                print(name)
+                time.sleep(0.05)
+            outputs[name] = output.getvalue()
+
+        threads = [threading.Thread(target=task, args=(n,)) for n in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert outputs == {"a": "a\n", "b": "b\n"}
+        assert sys.stdout is stdout
+
+
+class TestPresenterProgress(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.presenter = Presenter()
+        self.output = io.StringIO()
+        self.presenter._console = Console(file=self.output, force_terminal=True)
+
+    def test_slow_task_waits_without_spinning(self):
+        start = time.process_time()
+
+        result = self.presenter.decorate_slow_task_synchronous(
+            "Loading", lambda: print("loaded") or time.sleep(0.3) or 42
+        )
+
+        assert result == 42
+        assert time.process_time() - start < 0.15
+        assert "loaded" in self.output.getvalue()
+
+    def test_slow_task_errors_are_raised(self):
+        def fail():
+            raise RuntimeError("model missing")
+
+        with self.assertRaises(RuntimeError):
+            self.presenter.decorate_slow_task_synchronous("Loading", fail)
+
+    def test_progress_view_shows_concurrent_generation(self):
+        project_dir = self.copy_project()
+        config = get_config(
+            project_dir, force_all=True, template_rules=[], generation_workers=4
+        )
+        progress = ProgressTracker()
+        get_engine(presenter=self.presenter, progress=progress).run(config)
+
+        snapshot = progress.get_snapshot()
+        assert snapshot.done == 8
+        assert snapshot.queued == 0 and snapshot.in_flight == []
+        assert "Generating" in self.output.getvalue()
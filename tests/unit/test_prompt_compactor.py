@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+from pathlib import Path
+from docmancer.config import LLMConfig, LocalLLMSettings
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.prompt_compactor import PromptCompactor
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.parser.python_parser import PythonParser
+from docmancer.utils.token_utils import estimate_tokens
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+
+
+def make_body() -> str:
+    lines = ["TABLE = ["]
+    lines += [f"        ({i}, 'name_{i}', {i * 1.5})," for i in range(200)]
+    lines += ["    ]", "", "    # Pick the handler"]
+    lines += ["    if kind == 0:", "        total = 0  # start"]
+    for i in range(1, 100):
+        lines += [f"    elif kind == {i}:", f"        total = TABLE[{i}][2]"]
+    lines += ["    else:", "        raise ValueError(kind)"]
+    lines += [f"    cache['k{i}'] = {i}" for i in range(100)]
+    lines += ["    return total"]
+    return "\n".join(lines)
+
+
+class TestPromptCompactor(unittest.TestCase):
+
+    def test_body_within_budget_is_unchanged(self):
+        result = PromptCompactor().compact("return 1", max_tokens=100)
+
+        assert result.body == "return 1"
+        assert result.steps == []
+        assert result.get_reduction() == 0.0
+
+    def test_stops_after_first_step_that_fits(self):
+        body = "total = 1  # " + "x" * 400 + "\n    return total"
+
+        result = PromptCompactor().compact(body, max_tokens=20)
+
+        assert result.steps == ["comments"]
+        assert result.body == "total = 1\n    return total"
+
+    def test_keeps_structure_of_large_body(self):
+        body = make_body()
+
+        result = PromptCompactor().compact(body, max_tokens=300)
+
+        assert result.tokens <= 300
+        assert result.get_reduction() > 0.9
+        assert "truncate" not in result.steps
+        assert "# Pick the handler" not in result.body
+        assert "lines of data elided" in result.body
+        assert "similar branches elided" in result.body
+        assert "similar statements elided" in result.body
+        assert "raise ValueError(kind)" in result.body
+        assert result.body.endswith("return total")
+
+    def test_skeleton_keeps_control_flow(self):
+        body = "\n".join(
+            [f"value_{i} = compute({i}, other_{i})" for i in range(50)]
+            + ["    for item in items:", "        if item:", "            return item"]
+        )
+
+        result = PromptCompactor().compact(body, max_tokens=30)
+
+        assert result.steps[-1] == "skeleton"
+        assert result.body == (
+            "...\n    for item in items:\n        if item:\n            return item"
+        )
+
+    def test_compacts_parsed_method_body(self):
+        source = (
+            "class Handler:\n"
+            "    def handle(self, op):\n"
+            "        if op:  # " + "x" * 400 + "\n"
+            "            y = 1\n"
+            "        z = 2\n"
+            "        return z\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "m.py"
+            path.write_text(source)
+            context = PythonParser().parse(path, ["*"])[0][0]
+
+        result = PromptCompactor().compact(context.body, max_tokens=20)
+
+        assert result.steps == ["comments"]
+        assert result.body == (
+            "if op:\n            y = 1\n        z = 2\n        return z"
+        )
+
+
+class TestPromptBudget(unittest.TestCase):
+
+    def test_oversized_prompt_is_compacted_to_fit(self):
+        agent = FakeLLMAgent()
+        generator = DocumentationGenerator(
+            model=agent, language="python", max_prompt_tokens=1000
+        )
+        context = FunctionContextModel(
+            qualified_name="module.dispatch",
+            signature="def dispatch(kind)",
+            body=make_body(),
+            comments="",
+            start_line=1,
+            end_line=500,
+        )
+
+        generator.generate_summary(context)
+
+        assert estimate_tokens(agent.messages[0]) <= 1000
+        assert generator.compactions[0][0] == "module.dispatch"
+
+    def test_max_prompt_tokens_leaves_room_for_response(self):
+        config = LLMConfig(
+            mode="LOCAL",
+            max_tokens_per_response=512,
+            local=LocalLLMSettings(model_path="model.gguf", n_ctx=4096),
+        )
+
+        assert config.get_max_prompt_tokens() == 3584
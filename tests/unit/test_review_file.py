@@ -0,0 +1,111 @@
+from docmancer.core.presenter import Presenter, UserResponse, UserResponseModel
+from docmancer.core.review_file import (
+    ReviewStatus,
+    load_review_file,
+    run_apply,
+    run_review,
+)
+from tests.unit.mocks.sample_project import (
+    SAME_NAMES,
+    SAMPLE_PROJECT,
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+    read_sources,
+)
+
+
+class FirstOnlyPresenter(Presenter):
+    """Accepts the first function shown, skips the next and quits."""
+
+    def __init__(self):
+        super().__init__()
+        self.shown = []
+
+    def get_user_approval(self, doc):
+        self.shown.append(doc.qualified_name)
+        if len(self.shown) == 1:
+            return UserResponseModel(doc_model=doc, response=UserResponse.ACCEPT)
+        if len(self.shown) == 2:
+            return UserResponseModel(doc_model=doc, response=UserResponse.SKIP)
+        return UserResponseModel(doc_model=None, response=UserResponse.QUIT)
+
+    def clear_console(self):
+        pass
+
+
+class TestReviewFile(SampleProjectTestCase):
+
+    def get_config(self, project_dir, command, force_all=False):
+        return get_config(
+            project_dir, command=command, force_all=force_all, template_rules=[]
+        )
+
+    def run_engine(self, name, command, force_all=False, sources=None):
+        project_dir = self.copy_project(name)
+        for file_name, source in (sources or {}).items():
+            (project_dir / "src" / file_name).write_text(source)
+        config = self.get_config(project_dir, command, force_all)
+        get_engine().run(config)
+        return project_dir, config
+
+    def test_generate_writes_review_file_without_touching_sources(self):
+        project_dir, _ = self.run_engine("generated", "generate")
+
+        entries = load_review_file(project_dir / ".docmancer" / "review.jsonl")
+
+        assert len(entries) == 8
+        assert {entry.status for entry in entries} == {ReviewStatus.PENDING.value}
+        assert read_sources(project_dir) == read_sources(SAMPLE_PROJECT)
+
+    def test_apply_matches_an_unattended_run(self):
+        expected = read_sources(self.run_engine("run", "run", True)[0])
+        project_dir, _ = self.run_engine("generated", "generate")
+        config = self.get_config(project_dir, "apply")
+
+        assert run_apply(config, Presenter()) == 0
+        assert read_sources(project_dir) == expected
+
+    def test_functions_of_the_same_name_get_their_own_docs(self):
+        sources = {"same_names.py": SAME_NAMES}
+        expected = read_sources(self.run_engine("run", "run", True, sources)[0])
+        project_dir, _ = self.run_engine("generated", "generate", sources=sources)
+
+        assert run_apply(self.get_config(project_dir, "apply"), Presenter()) == 0
+        text = (project_dir / "src" / "same_names.py").read_text()
+        assert text.count('"""') == 2 * 6
+        assert read_sources(project_dir) == expected
+
+    def test_functions_changed_since_generation_are_not_applied(self):
+        project_dir, _ = self.run_engine("generated", "generate")
+        source = project_dir / "src" / "test_source_1.py"
+        source.write_text(
+            source.read_text()
+            .replace("s = s[::-1]", "s = s[::-2]")
+            .replace("# This function", "# Moved down\n# This function")
+        )
+
+        run_apply(self.get_config(project_dir, "apply"), Presenter())
+        entries = load_review_file(project_dir / ".docmancer" / "review.jsonl")
+
+        status = {entry.doc.qualified_name: entry.status for entry in entries}
+        assert status.pop("test_source_1.string_manip") == ReviewStatus.STALE.value
+        assert set(status.values()) == {ReviewStatus.APPLIED.value}
+        text = source.read_text()
+        assert text.count('"""') == 2 * (len(status) - 3)  # 3 are in test_module
+
+    def test_review_decisions_are_saved(self):
+        project_dir, _ = self.run_engine("generated", "generate")
+        config = self.get_config(project_dir, "review")
+        presenter = FirstOnlyPresenter()
+
+        run_review(config, presenter)
+        entries = load_review_file(project_dir / ".docmancer" / "review.jsonl")
+
+        statuses = [entry.status for entry in entries]
+        assert statuses.count(ReviewStatus.APPLIED.value) == 1
+        assert statuses.count(ReviewStatus.SKIPPED.value) == 1
+        assert statuses.count(ReviewStatus.PENDING.value) == 6
+        resumed = FirstOnlyPresenter()
+        run_review(config, resumed)
+        assert not set(presenter.shown[:2]) & set(resumed.shown)
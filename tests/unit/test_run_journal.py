@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from docmancer.core.run_journal import RunJournal
+from docmancer.models.function_summary import FunctionSummaryModel
+from tests.unit.mocks.sample_project import SampleProjectTestCase
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Runs the engine with a fake agent that logs every completed generation and
+# kills its own process when asked to, simulating a crash mid-run.
+RUN_SCRIPT = textwrap.dedent("""
+    import os, signal, sys
+    from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+    from tests.unit.mocks.sample_project import get_config, get_engine
+
+    log_path, kill_after, resume = sys.argv[1], int(sys.argv[2]), sys.argv[3] == "1"
+
+    def on_message(message):
+        with open(log_path) as f:
+            completed = len(f.readlines())
+        if completed == kill_after:
+            os.kill(os.getpid(), getattr(signal, "SIGKILL", signal.SIGTERM))
+        name = message.split("Qualified Name: ")[1].split(chr(10))[0]
+        with open(log_path, "a") as f:
+            f.write(name + chr(10))
+
+    engine = get_engine(FakeLLMAgent(on_message=on_message))
+    engine.run(get_config(os.getcwd(), force_all=True, resume=resume))
+    """)
+
+
+class TestRunJournal(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+        self.log_path = Path(self._tmp) / "generated.log"
+        self.log_path.write_text("")
+
+    def run_engine(self, kill_after: int, resume: bool) -> int:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [str(REPO_ROOT / "src"), str(REPO_ROOT), env.get("PYTHONPATH", "")]
+        )
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                RUN_SCRIPT,
+                str(self.log_path),
+                str(kill_after),
+                "1" if resume else "0",
+            ],
+            cwd=self.project_dir,
+            env=env,
+            capture_output=True,
+            timeout=60,
+        )
+        return process.returncode
+
+    def test_resume_after_kill_generates_each_function_once(self):
+        assert self.run_engine(kill_after=3, resume=False) != 0
+        assert len(self.log_path.read_text().splitlines()) == 3
+
+        assert self.run_engine(kill_after=-1, resume=True) == 0
+
+        generated = self.log_path.read_text().splitlines()
+        assert len(generated) == 8
+        assert len(set(generated)) == len(generated)
+
+    def test_replay_ignores_truncated_last_record(self):
+        journal = RunJournal(Path(self._tmp) / "journal.jsonl")
+        journal.open()
+        key = ("a.py", "a.func", "abc")
+        journal.record_generated(
+            key, FunctionSummaryModel(summary="s", return_description="r")
+        )
+        journal.close()
+        with open(journal.path, "a") as f:
+            f.write('{"event": "reviewed", "file": "a.py"')
+
+        state = RunJournal(journal.path).replay()
+
+        assert state.summaries[key].summary == "s"
+        assert state.reviews == {}
@@ -0,0 +1,121 @@
+import os
+import unittest
+from docmancer.core.presenter import Presenter
+from docmancer.core.review_file import (
+    ReviewStatus,
+    check_shards,
+    load_review_file,
+    read_review_file_header,
+    run_merge,
+)
+from docmancer.core.sharding import Shard, get_shard_index
+from tests.unit.mocks.sample_project import (
+    SAME_NAMES,
+    SAMPLE_PROJECT,
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+    read_sources,
+)
+
+
+class TestShard(unittest.TestCase):
+
+    def test_parse(self):
+        assert Shard.parse("3/8") == Shard(3, 8)
+        assert str(Shard.parse(" 1/1 ")) == "1/1"
+        for text in ("0/8", "9/8", "3", "a/8", "3/", "-1/2"):
+            with self.assertRaises(ValueError):
+                Shard.parse(text)
+
+    def test_shards_split_files_into_disjoint_parts(self):
+        files = [f"src/pkg_{i % 7}/module_{i}.py" for i in range(400)]
+        shards = [Shard(index, 8) for index in range(1, 9)]
+
+        parts = [{f for f in files if shard.contains(f, ".")} for shard in shards]
+
+        assert sum(len(part) for part in parts) == len(files)
+        assert set().union(*parts) == set(files)
+        assert min(len(part) for part in parts) > 25
+
+    def test_shard_does_not_depend_on_working_directory(self):
+        project_dir = os.path.abspath("project")
+
+        assert get_shard_index("project/src/a.py", "project", 8) == get_shard_index(
+            os.path.join(project_dir, "src", "a.py"), project_dir, 8
+        )
+
+    def test_check_shards(self):
+        assert check_shards({"a": {}, "b": {}}) == []
+        assert check_shards({"a": {"shard": "1/2"}, "b": {"shard": "2/2"}}) == []
+        assert check_shards({"a": {"shard": "1/3"}, "b": {"shard": "2/3"}}) == [
+            "Missing shards 3/3"
+        ]
+        assert len(check_shards({"a": {"shard": "1/2"}, "b": {"shard": "1/2"}})) == 2
+        assert len(check_shards({"a": {"shard": "1/2"}, "b": {"shard": "2/3"}})) == 1
+
+
+class TestShardedRun(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.sources = {}  # Added to every copy of the project
+
+    def copy_project(self, name="project"):
+        project_dir = super().copy_project(name)
+        for file_name, source in self.sources.items():
+            (project_dir / "src" / file_name).write_text(source)
+        return project_dir
+
+    def get_config(self, project_dir, command, **values):
+        return get_config(project_dir, command=command, template_rules=[], **values)
+
+    def run_engine(self, name, command, **values):
+        """Runs on a fresh copy of the project, as a CI machine would."""
+        project_dir = self.copy_project(name)
+        get_engine().run(self.get_config(project_dir, command, **values))
+        return project_dir
+
+    def generate_shards(self, count):
+        paths = []
+        for index in range(1, count + 1):
+            project_dir = self.run_engine(
+                f"shard_{index}", "generate", shard=f"{index}/{count}"
+            )
+            path = project_dir / ".docmancer" / f"review.shard-{index}-of-{count}.jsonl"
+            assert read_review_file_header(path)["shard"] == f"{index}/{count}"
+            paths.append(str(path))
+        return paths
+
+    def test_merged_shards_match_an_unattended_run(self):
+        expected = read_sources(self.run_engine("run", "run", force_all=True))
+        merge_files = self.generate_shards(3)
+        project_dir = self.copy_project("merged")
+
+        config = self.get_config(project_dir, "merge", merge_files=merge_files)
+
+        assert run_merge(config, Presenter()) == 0
+        assert read_sources(project_dir) == expected
+        entries = load_review_file(project_dir / ".docmancer" / "review.jsonl")
+        assert len(entries) == 8
+        assert {entry.status for entry in entries} == {ReviewStatus.APPLIED.value}
+
+    def test_merge_keeps_functions_of_the_same_name(self):
+        self.sources = {"same_names.py": SAME_NAMES}
+        expected = read_sources(self.run_engine("run", "run", force_all=True))
+        merge_files = self.generate_shards(2)
+        project_dir = self.copy_project("merged")
+
+        config = self.get_config(project_dir, "merge", merge_files=merge_files)
+
+        assert run_merge(config, Presenter()) == 0
+        assert read_sources(project_dir) == expected
+
+    def test_merge_with_a_missing_shard_writes_nothing(self):
+        merge_files = self.generate_shards(3)
+        project_dir = self.copy_project("merged")
+
+        config = self.get_config(project_dir, "merge", merge_files=merge_files[1:])
+
+        assert run_merge(config, Presenter()) == 1
+        assert read_sources(project_dir) == read_sources(SAMPLE_PROJECT)
@@ -0,0 +1,84 @@
+import unittest
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.summary_validator import get_signature_parameters
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.utils.json_utils import repair_json
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+
+CONTEXT = FunctionContextModel(
+    qualified_name="module.add",
+    signature="def add(self, a: int, b=2, *rest)",
+    body="\n    return a + b",
+    comments="",
+    start_line=1,
+    end_line=2,
+)
+
+
+class TestRepairJson(unittest.TestCase):
+
+    def test_valid_json_needs_no_repairs(self):
+        assert repair_json('Here you go: {"summary": "x"}') == ({"summary": "x"}, [])
+
+    def test_fenced_single_quoted_json_with_trailing_commas(self):
+        text = "```json\n{'summary': 'Adds.', 'parameters': ['a',],}\n```"
+
+        parsed, repairs = repair_json(text)
+
+        assert parsed == {"summary": "Adds.", "parameters": ["a"]}
+        assert repairs == ["code_fence", "single_quotes", "trailing_comma"]
+
+    def test_truncated_response_keeps_complete_values(self):
+        text = '{"summary": "Adds.", "parameters": [{"name": "a"}, {"name": "b", "ty'
+
+        parsed, repairs = repair_json(text)
+
+        assert parsed == {
+            "summary": "Adds.",
+            "parameters": [{"name": "a"}, {"name": "b"}],
+        }
+        assert "truncated" in repairs
+
+    def test_text_without_json(self):
+        assert repair_json("I cannot help with that.") == (None, [])
+
+
+class TestDocumentationGeneratorValidation(unittest.TestCase):
+
+    def generate(self, responses):
+        agent = FakeLLMAgent(responses=responses)
+        generator = DocumentationGenerator(model=agent, language="python")
+        return generator, agent, generator.generate_summary(CONTEXT)
+
+    def test_signature_parameters(self):
+        assert get_signature_parameters(CONTEXT.signature) == [
+            ("a", "int"),
+            ("b", ""),
+            ("rest", ""),
+        ]
+
+    def test_missing_keys_default_from_signature(self):
+        generator, agent, summary = self.generate(['{"summary": "Adds."}'])
+
+        assert summary.summary == "Adds."
+        assert summary.return_description == ""
+        assert [p.name for p in summary.parameters] == ["a", "b", "rest"]
+        assert summary.parameters[0].type == "int"
+        assert len(agent.messages) == 1
+        assert generator.repair_stats.repaired == 1
+
+    def test_unrepairable_response_is_reprompted_with_short_request(self):
+        generator, agent, summary = self.generate(["Sorry, no JSON today."])
+
+        assert summary is not None  # The fake agent's default reply is valid
+        assert len(agent.messages) == 2
+        assert "could not be parsed" in agent.messages[1]
+        assert len(agent.messages[1]) < len(agent.messages[0])
+        assert generator.repair_stats.reprompted == 1
+        assert generator.repair_stats.reprompt_fixed == 1
+
+    def test_failed_reprompt_returns_none(self):
+        generator, agent, summary = self.generate(["nope", "still nope"])
+
+        assert summary is None
+        assert generator.repair_stats.failed == 1
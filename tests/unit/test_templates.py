@@ -0,0 +1,112 @@
+import unittest
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.templates import TemplateSummarizer
+from docmancer.models.function_context import FunctionContextModel
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+
+
+def make_context(signature, body, decorators=None):
+    name = signature.split("(")[0].split()[-1]
+    return FunctionContextModel(
+        qualified_name=f"module.{name}",
+        signature=signature,
+        body=body,
+        comments="",
+        start_line=1,
+        end_line=1 + body.count("\n") + 1,
+        decorators=decorators or [],
+    )
+
+
+class TestTemplateSummarizer(unittest.TestCase):
+
+    def setUp(self):
+        self.templates = TemplateSummarizer()
+
+    def test_getter(self):
+        summary = self.templates.get_summary(
+            make_context("def get_user_name(self)", "return self._user_name")
+        )
+
+        assert summary.summary == "Returns the user name."
+        assert self.templates.counts == {"getter": 1}
+
+    def test_setter(self):
+        summary = self.templates.get_summary(
+            make_context("def set_name(self, name: str)", "self._name = name")
+        )
+
+        assert summary.summary == "Sets the name."
+        assert [(p.name, p.type) for p in summary.parameters] == [("name", "str")]
+
+    def test_property(self):
+        summary = self.templates.get_summary(
+            make_context(
+                "def is_empty(self)",
+                '"""True without items."""\n        return len(self._items) == 0',
+                decorators=["property"],
+            )
+        )
+
+        assert summary.summary == "Returns `len(self._items) == 0`."
+
+    def test_repr(self):
+        summary = self.templates.get_summary(
+            make_context("def __repr__(self)", "return f'<Point {self.x}>'")
+        )
+
+        assert "string representation" in summary.summary
+
+    def test_passthrough(self):
+        summary = self.templates.get_summary(
+            make_context(
+                "def send(self, message, *args, **kwargs)",
+                "return self._client.send(message, *args, **kwargs)",
+            )
+        )
+
+        assert summary.summary == (
+            "Calls `self._client.send` with the same arguments and returns its result."
+        )
+        assert [p.name for p in summary.parameters] == ["message", "args", "kwargs"]
+
+    def test_functions_with_logic_are_not_templated(self):
+        for context in [
+            make_context("def get(self, key)", "return self._items[key]"),
+            make_context("def set_name(self, name)", "self._name = name.strip()"),
+            make_context("def send(self, message)", "return self._send(message, 1)"),
+            make_context("def total(self)", "x = 1\n        return self._total + x"),
+        ]:
+            assert self.templates.get_summary(context) is None, context.body
+
+    def test_special_methods_are_not_templated(self):
+        for context in [
+            make_context("def __init__(self, name)", "self.name = name"),
+            make_context("def __len__(self)", "return self._length"),
+            make_context("def __enter__(self)", "return self.open()"),
+            make_context("def __call__(self, x)", "return self._call(x)"),
+        ]:
+            assert self.templates.get_summary(context) is None, context.signature
+
+    def test_disabled_rules(self):
+        templates = TemplateSummarizer(["setter"])
+
+        assert (
+            templates.get_summary(make_context("def f(self)", "return self.a")) is None
+        )
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            TemplateSummarizer(["getter", "magic"])
+
+    def test_generator_skips_model_for_templates(self):
+        agent = FakeLLMAgent()
+        generator = DocumentationGenerator(
+            model=agent, language="python", templates=TemplateSummarizer()
+        )
+
+        generator.generate_summary(make_context("def name(self)", "return self._n"))
+        generator.generate_summary(make_context("def run(self, x)", "x += 1"))
+
+        assert len(agent.messages) == 1
+        assert generator.template_counts == {"getter": 1}
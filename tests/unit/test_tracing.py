@@ -0,0 +1,93 @@
+import json
+import threading
+import unittest
+from docmancer.core.presenter import Presenter, UserResponse, UserResponseModel
+from docmancer.core.tracing import Tracer
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+)
+
+
+class QuittingPresenter(Presenter):
+    def get_user_approval(self, doc):
+        return UserResponseModel(doc_model=None, response=UserResponse.QUIT)
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_spans_are_tagged_with_their_thread(self):
+        tracer = Tracer()
+
+        def work():
+            with tracer.span("parse", file="a.py"):
+                pass
+
+        thread = threading.Thread(target=work, name="parse-0")
+        thread.start()
+        thread.join()
+        trace = tracer.get_trace()
+
+        span = next(e for e in trace["traceEvents"] if e["ph"] == "X")
+        names = {
+            e["tid"]: e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"
+        }
+        assert span["name"] == "parse" and span["args"] == {"file": "a.py"}
+        assert names[span["tid"]] == "parse-0"
+
+    def test_events_beyond_the_limit_are_dropped(self):
+        tracer = Tracer(max_events=2)
+        for _ in range(5):
+            tracer.record("decode", 0.0, 1.0)
+
+        assert len(tracer.get_trace()["traceEvents"]) == 3  # 2 spans, 1 thread
+        assert tracer.dropped == 3
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("parse"):
+            pass
+
+        assert tracer.get_trace()["traceEvents"] == []
+
+
+class TestRunTrace(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+        self.trace_path = self.project_dir / "trace" / "run.json"
+
+    def run_engine(self, presenter, force_all):
+        config = get_config(
+            self.project_dir,
+            force_all=force_all,
+            template_rules=[],
+            trace=str(self.trace_path),
+        )
+        get_engine(presenter=presenter, tracer=Tracer()).run(config)
+        with open(self.trace_path) as f:
+            return [e for e in json.load(f)["traceEvents"] if e["ph"] == "X"]
+
+    def test_run_writes_spans_for_each_step(self):
+        events = self.run_engine(Presenter(), force_all=True)
+
+        names = {event["name"] for event in events}
+        assert {
+            "discover",
+            "parse",
+            "generate",
+            "build prompt",
+            "model request",
+            "parse response",
+            "format",
+            "commit",
+        } <= names
+        generated = [e["args"]["function"] for e in events if e["name"] == "generate"]
+        assert len(generated) == 8
+
+    def test_trace_is_written_when_the_user_quits(self):
+        events = self.run_engine(QuittingPresenter(), force_all=False)
+
+        assert "review wait" in {event["name"] for event in events}
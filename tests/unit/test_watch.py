@@ -0,0 +1,227 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from docmancer.core.functional_context_database import FunctionalContextDatabase
+from docmancer.core.presenter import Presenter
+from docmancer.core.review_file import load_review_file
+from docmancer.core.watch import WatchSession
+from docmancer.formatter.py_docstring_formatter import PyDocstringFormatter
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.parser.python_parser import PythonParser
+from docmancer.utils.file_utils import matches_glob
+from docmancer.utils.file_watcher import (
+    InotifyWatcher,
+    PollingWatcher,
+    is_inotify_available,
+)
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+from tests.unit.mocks.sample_project import (
+    SAME_NAMES,
+    SampleProjectTestCase,
+    get_config,
+)
+
+SOURCE = Path("src") / "test_source_1.py"
+
+
+class TestMatchesGlob(unittest.TestCase):
+
+    def test_matches_like_path_glob(self):
+        assert matches_glob("src/a.py", "src/**/*.py")
+        assert matches_glob("src/pkg/sub/a.py", "src/**/*.py")
+        assert not matches_glob("srcs/a.py", "src/**/*.py")
+        assert matches_glob("a.py", "*")
+        assert not matches_glob("src/a.py", "*")
+        assert matches_glob("src/.a.py.swp", "**/.*.swp")
+        assert matches_glob(".git/", ".git/**")
+
+
+class WatcherTests:
+    """Shared by the polling and inotify watchers."""
+
+    def get_watcher(self, root, ignore=None):
+        raise NotImplementedError
+
+    def setUp(self):
+        self._tmp = tempfile.mkdtemp()
+        self.root = Path(self._tmp)
+        (self.root / "src").mkdir()
+        (self.root / "src" / "a.py").write_text("x = 1\n")
+        self.watcher = self.get_watcher(self.root, ["build/**"])
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def get_changes(self):
+        return self.watcher.get_changes(timeout=2, debounce=0.3).paths
+
+    def test_reports_saved_created_and_deleted_files(self):
+        (self.root / "src" / "a.py").write_text("x = 2\n")
+        (self.root / "src" / "pkg").mkdir()
+        (self.root / "src" / "pkg" / "b.py").write_text("y = 1\n")
+
+        assert self.get_changes() == {
+            self.root / "src" / "a.py",
+            self.root / "src" / "pkg" / "b.py",
+        }
+
+        (self.root / "src" / "pkg" / "b.py").unlink()
+
+        assert self.get_changes() == {self.root / "src" / "pkg" / "b.py"}
+
+    def test_skips_ignored_paths(self):
+        (self.root / "build").mkdir()
+        (self.root / "build" / "a.py").write_text("x = 1\n")
+        (self.root / "src" / ".a.py.swp").write_text("")
+        (self.root / "src" / "a.py").write_text("x = 2\n")
+
+        assert self.get_changes() == {self.root / "src" / "a.py"}
+
+
+class TestPollingWatcher(WatcherTests, unittest.TestCase):
+
+    def get_watcher(self, root, ignore=None):
+        return PollingWatcher(root, ignore, interval=0.05)
+
+
+@unittest.skipUnless(is_inotify_available(), "inotify is not available")
+class TestInotifyWatcher(WatcherTests, unittest.TestCase):
+
+    def get_watcher(self, root, ignore=None):
+        return InotifyWatcher(root, ignore)
+
+
+class TestWatchSession(SampleProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project_dir = self.copy_project()
+        self.agent = FakeLLMAgent()
+        self.index = FunctionalContextDatabase.for_project(str(self.project_dir))
+        self.session = self.get_session()
+
+    def tearDown(self):
+        self.index.close()
+        super().tearDown()
+
+    def get_session(self):
+        config = get_config(self.project_dir, command="watch", template_rules=[])
+        session = WatchSession(
+            config,
+            parser=PythonParser(),
+            generator=DocumentationGenerator(model=self.agent, language="python"),
+            formatter=PyDocstringFormatter(),
+            presenter=Presenter(),
+            index=self.index,
+        )
+        session.scan()
+        return session
+
+    def edit(self, old, new):
+        SOURCE.write_text(SOURCE.read_text().replace(old, new))
+
+    def get_suggested(self):
+        return {
+            (str(entry.doc.file_path), entry.doc.qualified_name)
+            for entry in load_review_file(self.session.path)
+        }
+
+    def test_suggests_only_edited_undocumented_functions(self):
+        self.edit("s = s[::-1]", "s = s[::-1].strip()")
+        self.edit(
+            "def login(user, p):\n",
+            'def login(user, p):\n    """Logs a user in."""\n',
+        )
+        source = SOURCE.read_text()
+
+        assert self.session.update_file(SOURCE)
+
+        assert self.get_suggested() == {(str(SOURCE), "test_source_1.string_manip")}
+        assert len(self.agent.messages) == 1
+        assert SOURCE.read_text() == source
+
+    def test_unchanged_file_is_not_summarized_again(self):
+        self.edit("s = s[::-1]", "s = s[::-1].strip()")
+        self.session.update_file(SOURCE)
+
+        assert self.session.update_file(SOURCE)
+        self.edit("# Test file for", "# Sample file for")
+        self.session.update_file(SOURCE)
+
+        assert len(self.agent.messages) == 1
+
+    def test_documented_or_removed_functions_lose_their_suggestion(self):
+        self.edit("s = s[::-1]", "s = s[::-1].strip()")
+        self.session.update_file(SOURCE)
+
+        self.edit(
+            "def string_manip(s):\n",
+            'def string_manip(s):\n    """Reverses s."""\n',
+        )
+        self.session.update_file(SOURCE)
+
+        assert self.get_suggested() == set()
+
+    def test_functions_of_the_same_name_keep_their_own_suggestions(self):
+        path = Path("src") / "same_names.py"
+        path.write_text(SAME_NAMES)
+        self.session.update_file(path)
+        summarized = len(self.agent.messages)
+        head, _, tail = SAME_NAMES.rpartition("return 1")
+        path.write_text(head + "return 2" + tail)
+        self.session.update_file(path)
+
+        lines = [
+            (entry.doc.qualified_name, entry.doc.start_line)
+            for entry in load_review_file(self.session.path)
+        ]
+        assert sorted(lines) == [
+            ("same_names.A.close", 2),
+            ("same_names.B.close", 7),
+            ("same_names.first", 11),
+            ("same_names.first.helper", 12),
+            ("same_names.second", 18),
+            ("same_names.second.helper", 19),
+        ]
+        # The edited helper, and the function containing it
+        assert len(self.agent.messages) == summarized + 2
+
+    def test_interrupted_file_is_finished_later(self):
+        self.edit("s = s[::-1]", "s = s[::-1].strip()")
+        self.edit("return length * width", "return length * width * 1")
+
+        assert not self.session.update_file(SOURCE, interrupted=lambda: True)
+        assert self.session.update_file(SOURCE)
+
+        assert len(self.get_suggested()) == 2
+
+    def test_suggestions_survive_a_restart(self):
+        self.edit("s = s[::-1]", "s = s[::-1].strip()")
+        self.session.update_file(SOURCE)
+
+        self.session = self.get_session()
+
+        assert self.get_suggested() == {(str(SOURCE), "test_source_1.string_manip")}
+
+    def test_run_suggests_after_a_save(self):
+        watcher = PollingWatcher(self.project_dir, interval=0.05)
+        stop = threading.Event()
+        thread = threading.Thread(target=self.session.run, args=(watcher, stop))
+        thread.start()
+        try:
+            self.edit("s = s[::-1]", "s = s[::-1].strip()")
+            for _ in range(100):
+                if self.session.suggestions:
+                    break
+                stop.wait(0.05)
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+            watcher.close()
+
+        assert [entry.doc.qualified_name for entry in self.session.suggestions] == [
+            "test_source_1.string_manip"
+        ]
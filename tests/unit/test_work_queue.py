@@ -0,0 +1,200 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from docmancer.core.work_queue import QueueWorker, WorkQueue
+from docmancer.generator.documentation_generator import DocumentationGenerator
+from docmancer.generator.examples import FunctionExample
+from docmancer.generator.llm.llm_agent_base import NoModelAgent
+from docmancer.models.function_context import FunctionContextModel
+from docmancer.models.function_summary import FunctionSummaryModel
+from tests.unit.mocks.fake_llm_agent import FakeLLMAgent
+from tests.unit.mocks.sample_project import (
+    SampleProjectTestCase,
+    get_config,
+    get_engine,
+    read_sources,
+)
+
+SUMMARY = FunctionSummaryModel(summary="Does it.", return_description="Nothing.")
+
+
+def get_context(name):
+    return FunctionContextModel(
+        qualified_name=name,
+        signature=f"def {name}():",
+        body="    pass",
+        comments=[],
+        start_line=1,
+        end_line=2,
+    )
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.mkdtemp()
+        self.path = Path(self._tmp) / "queue.db"
+        self.queue = WorkQueue(self.path, lease_seconds=60, max_attempts=2)
+        self.queue.start_run()
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def test_jobs_are_leased_once_in_order(self):
+        example = FunctionExample("m.g", "def g():", "Does g.")
+        ids = self.queue.enqueue(
+            [(get_context("f"), [example]), (get_context("h"), None)]
+        )
+        other = WorkQueue(self.path)
+
+        first = self.queue.lease("a")
+        second = other.lease("b")
+
+        assert [first.id, second.id] == ids
+        assert first.context == get_context("f")
+        assert first.examples == [example]
+        assert second.examples is None
+        assert self.queue.lease("a") is None
+        other.close()
+
+    def test_results_are_collected_once(self):
+        self.queue.enqueue([(get_context("f"), None)])
+        job = self.queue.lease("a")
+
+        assert self.queue.complete(job, SUMMARY)
+        results = self.queue.collect()
+
+        assert [(r.id, r.summary, r.attempts) for r in results] == [
+            (job.id, SUMMARY, 1)
+        ]
+        assert self.queue.collect() == []
+
+    def test_expired_lease_is_retried_then_given_up(self):
+        self.queue = WorkQueue(self.path, lease_seconds=-1, max_attempts=2)
+        self.queue.enqueue([(get_context("f"), None)])
+
+        crashed = self.queue.lease("a")
+        retried = self.queue.lease("b")
+
+        assert retried.id == crashed.id
+        assert retried.attempts == 2
+        assert not self.queue.complete(crashed, SUMMARY)  # Its lease was taken back
+        assert self.queue.lease("c") is None
+        [result] = self.queue.collect()
+        assert result.summary is None
+        assert "b" in result.error
+
+    def test_failed_job_is_retried_then_given_up(self):
+        self.queue.enqueue([(get_context("f"), None)])
+
+        assert self.queue.fail(self.queue.lease("a"), "bad response")
+        assert self.queue.collect() == []
+        assert self.queue.fail(self.queue.lease("b"), "bad response")
+
+        [result] = self.queue.collect()
+        assert (result.summary, result.error, result.attempts) == (
+            None,
+            "bad response",
+            2,
+        )
+
+    def test_closed_run_drops_unfinished_jobs(self):
+        self.queue.enqueue([(get_context("f"), None), (get_context("g"), None)])
+        job = self.queue.lease("a")
+
+        self.queue.close_run()
+
+        assert self.queue.get_run()[1] is False
+        assert self.queue.lease("a") is None
+        assert not self.queue.complete(job, SUMMARY)
+        assert self.queue.get_counts() == {}
+
+    def test_busy_worker_exits_when_its_run_closes(self):
+        self.queue.enqueue([(get_context("f"), None), (get_context("g"), None)])
+        jobs = []
+
+        def on_job(job, succeeded):
+            jobs.append(job)
+            if len(jobs) == 2:
+                self.queue.close_run()
+
+        worker = QueueWorker(
+            WorkQueue(self.path),
+            DocumentationGenerator(model=FakeLLMAgent(), language="python"),
+            worker_id="a",
+            poll_seconds=0.01,
+        )
+        thread = threading.Thread(target=worker.run, args=(on_job,))
+        thread.start()
+        thread.join(timeout=3)
+        exited = not thread.is_alive()
+        worker.stop()
+        thread.join()
+        worker.queue.close()
+
+        assert exited
+        assert len(jobs) == 2
+
+    def test_worker_reports_generation_errors(self):
+        self.queue.enqueue([(get_context("f"), None)])
+        worker = QueueWorker(
+            WorkQueue(self.path, max_attempts=2),
+            DocumentationGenerator(model=NoModelAgent(), language="python"),
+            worker_id="a",
+            poll_seconds=0.01,
+        )
+        jobs = []
+
+        def on_job(job, succeeded):
+            jobs.append(succeeded)
+            if len(jobs) == 2:
+                worker.stop()
+
+        worker.run(on_job)
+        worker.queue.close()
+
+        [result] = self.queue.collect()
+        assert jobs == [False, False]
+        assert result.error == "Generation failed: No model is loaded."
+
+
+class TestQueuedRun(SampleProjectTestCase):
+
+    def run_engine(self, name, **values):
+        project_dir = self.copy_project(name)
+        config = get_config(project_dir, force_all=True, template_rules=[], **values)
+        get_engine().run(config)
+        return project_dir
+
+    def test_queued_run_matches_a_local_run(self):
+        expected = read_sources(self.run_engine("local"))
+        queue_path = Path(self._tmp) / "shared" / "queue.db"
+        # Started before the coordinator, as on build hosts
+        workers = []
+        for index in range(2):
+            worker = QueueWorker(
+                WorkQueue(queue_path),
+                DocumentationGenerator(
+                    model=FakeLLMAgent(latency=0.01), language="python"
+                ),
+                worker_id=f"worker-{index}",
+                poll_seconds=0.01,
+            )
+            thread = threading.Thread(target=worker.run)
+            thread.start()
+            workers.append((worker, thread))
+
+        try:
+            project_dir = self.run_engine("queued", queue=str(queue_path))
+        finally:
+            for worker, thread in workers:
+                thread.join(timeout=5)
+                worker.stop()
+                worker.queue.close()
+
+        assert read_sources(project_dir) == expected
+        assert not any(thread.is_alive() for _, thread in workers)
+        assert sum(worker.stats.completed for worker, _ in workers) == 8